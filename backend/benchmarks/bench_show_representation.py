@@ -0,0 +1,197 @@
+"""Memory and serialization cost of the schedule's show representation.
+
+Compares the original path (a pydantic Show per listing with a uuid4 id and
+its own timestamp, re-validated through ChannelSchedule/ScheduleResponse on
+every response) against ShowRecord objects with interned strings and
+pre-serialized ChannelDay fragments, and the size of the ?programs=true form
+(slim airings plus one programs table). Both builds fingerprint programs and
+resolve start times and ids, so build_seconds compares the same work.
+
+    python backend/benchmarks/bench_show_representation.py [--shows 10000] [--output results.json]
+
+Results for 10k shows (best of 5, since both builds do the same per-show work):
+records build in about 0.50-0.55s against 0.75s for pydantic Shows, and retain
+about 4 MB against 19.5 MB (~5x less). A warm records serialization reuses the
+cached fragments and takes ~3 ms against ~90 ms re-validating through pydantic;
+a cold one takes ~45 ms. These replace the earlier figures (~18 MB vs ~3.3 MB,
+and records slower to build), which came from a build_pydantic that skipped the
+fingerprinting and time normalization.
+"""
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server import CHANNELS, ChannelSchedule, ScheduleResponse, Show, normalize_show_times  # noqa: E402
+from show_records import (  # noqa: E402
+    ChannelDay, ShowRecord, channel_schedule_json, dumps, program_fingerprint, schedule_response_json
+)
+
+TITLES = [
+    "The Matrix", "Dune: Part Two", "House of the Dragon", "Succession", "The Last of Us",
+    "Oppenheimer", "True Detective", "The Sopranos", "Barbie", "Mad Max: Fury Road",
+    "The Wire", "Curb Your Enthusiasm", "Band of Brothers", "Inception", "Alien",
+]
+SHOWS_PER_CHANNEL_DAY = 30
+DATE = "2026-10-17"
+
+
+def fresh(value):
+    """A new string object with the same text, like the parser produces for every listing"""
+    return (value + '\x00')[:-1] if value is not None else None
+
+
+def listing_fields(count, seed=7):
+    """Parser-shaped field dicts: a few dozen programs repeated across channels"""
+    rnd = random.Random(seed)
+    listings = []
+    for i in range(count):
+        title = rnd.choice(TITLES)
+        series = TITLES.index(title) % 3 == 0
+        minute = (i % SHOWS_PER_CHANNEL_DAY) * 45
+        hour, mins = divmod(minute % 1440, 60)
+        listings.append({
+            "title": fresh(title),
+            "show_type": fresh("Series" if series else "Feature Film"),
+            "year": fresh(str(1990 + TITLES.index(title))),
+            "season": fresh("Season 2") if series else None,
+            "episode": fresh(f"Episode {rnd.randint(1, 10)}") if series else None,
+            "episode_title": fresh(f"Chapter {rnd.randint(1, 10)}") if series else None,
+            "description": fresh(f"{title}: a description that is the same every time this program airs."),
+            "start_time": fresh(f"{hour % 12 or 12}:{mins:02d} {'AM' if hour < 12 else 'PM'}"),
+        })
+    return listings
+
+
+def channel_days(listings):
+    """Split listings into per-channel lists of SHOWS_PER_CHANNEL_DAY"""
+    for start in range(0, len(listings), SHOWS_PER_CHANNEL_DAY):
+        channel = CHANNELS[(start // SHOWS_PER_CHANNEL_DAY) % len(CHANNELS)]
+        yield channel, listings[start:start + SHOWS_PER_CHANNEL_DAY]
+
+
+def build_pydantic(listings):
+    # The same per-show work as build_records: program fingerprint, start/end times and ids
+    days = []
+    for channel, fields in channel_days(listings):
+        shows = [Show(**f, channel_id=channel['id'], date=DATE, program_id=program_fingerprint(f)) for f in fields]
+        normalize_show_times(shows, DATE)
+        days.append((channel, shows))
+    return days
+
+
+def build_records(listings):
+    days = []
+    for channel, fields in channel_days(listings):
+        scraped_at = datetime.now(timezone.utc)
+        shows = [ShowRecord.from_fields(f, channel['id'], DATE, scraped_at) for f in fields]
+        normalize_show_times(shows, DATE)
+        days.append((channel, ChannelDay(channel['id'], DATE, shows)))
+    return days
+
+
+def retained_bytes(build, count):
+    """Bytes still held by the built objects once the parser output is freed"""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    listings = listing_fields(count)
+    built = build(listings)
+    del listings
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del built
+    return retained
+
+
+def serialize_pydantic(days):
+    response = ScheduleResponse(
+        channels=[
+            ChannelSchedule(channel_id=channel['id'], channel_name=channel['name'], date=DATE, shows=shows)
+            for channel, shows in days
+        ],
+        current_time="2026-10-17 12:00:00",
+    )
+    return response.model_dump_json().encode()
+
+
+def serialize_records(days):
+    fragments = [
+        channel_schedule_json(channel['id'], channel['name'], DATE, day.shows_json())
+        for channel, day in days
+    ]
+    return schedule_response_json(fragments, "2026-10-17 12:00:00", "America/New_York")
+
+
+def serialize_catalog(days):
+    fragments = []
+    programs = {}
+    for channel, day in days:
+        fragments.append(channel_schedule_json(channel['id'], channel['name'], DATE, day.airings_json()))
+        programs.update(day.programs())
+    return schedule_response_json(fragments, "2026-10-17 12:00:00", "America/New_York", dumps(programs))
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--shows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    listings = listing_fields(args.shows)
+    pydantic_days = build_pydantic(listings)
+    record_days = build_records(listings)
+
+    def cold_records():
+        for _, day in record_days:
+            day._shows_json = None
+        serialize_records(record_days)
+
+    results = {
+        "shows": args.shows,
+        "memory_bytes_per_10k_shows": {
+            "pydantic": round(retained_bytes(build_pydantic, args.shows) * 10000 / args.shows),
+            "records": round(retained_bytes(build_records, args.shows) * 10000 / args.shows),
+        },
+        "build_seconds": {
+            "pydantic": best_of(lambda: build_pydantic(listings), args.repeat),
+            "records": best_of(lambda: build_records(listings), args.repeat),
+        },
+        "serialize_seconds": {
+            "pydantic": best_of(lambda: serialize_pydantic(pydantic_days), args.repeat),
+            "records_cold": best_of(cold_records, args.repeat),
+            "records_warm": best_of(lambda: serialize_records(record_days), args.repeat),
+        },
+        "response_bytes": {
+            "pydantic": len(serialize_pydantic(pydantic_days)),
+            "records": len(serialize_records(record_days)),
+            "catalog": len(serialize_catalog(record_days)),
+        },
+    }
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,550 @@
+"""Load test: concurrent grid viewers against the app, with a local stub standing in for tvinsider.
+
+    python backend/benchmarks/load_test.py backend/benchmarks/scenarios/steady_viewers.json
+    python backend/benchmarks/load_test.py scenarios/cold_start.json scenarios/cold_start_short_deadline.json
+    python backend/benchmarks/load_test.py scenarios/steady_viewers.json --users 200 --output load.json --baseline before.json
+
+Every virtual user behaves like App.js: it streams the day's grid on arrival,
+applies /schedule/changes on the polling interval (looping while `more`,
+re-streaming on `reset`), re-checks rows still stale or pending one channel
+at a time with If-None-Match (after 30s, doubling up to 5 minutes, at most 6
+tries per date), steps through dates with the arrows, and after its session
+is replaced by a new visitor. The app runs in this process, either called
+directly over ASGI (`"transport": "asgi"`) or served by uvicorn on localhost
+(`"transport": "http"`), with the background refresher running against the
+stub so upstream fetch amplification (stub requests per client request)
+reflects the real refresh path.
+
+A scenario is a JSON file; any key left out takes the value in
+DEFAULT_SCENARIO, and "extends" names another scenario file to start from.
+"env" sets server configuration (REFRESH_INTERVAL, SCHEDULE_DEADLINE_MS, ...)
+before the app is imported, so comparing configurations is a matter of
+comparing scenario files. Several scenarios are run one after another, each
+in a fresh process, and summarized side by side.
+
+Needs a MongoDB at MONGO_URL; each run uses its own database (--db-name),
+dropped afterwards.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from run_benchmarks import compare, fixture_date, git_commit, summarize  # noqa: E402
+
+DEFAULT_SCENARIO: Dict[str, Any] = {
+    "description": "",
+    # "asgi" calls the app in-process; "http" serves it with uvicorn on localhost
+    "transport": "asgi",
+    "users": 50,
+    # Users arrive evenly spread over this many seconds
+    "ramp_seconds": 10,
+    "duration_seconds": 60,
+    # App.js polls every 15 minutes; scenarios compress that to fit a run
+    "poll_seconds": 30,
+    # App.js re-checks stale or pending rows after 30s, doubling up to 5 minutes, 6 tries per date
+    "unsettled_retry_seconds": 30,
+    "unsettled_retry_max_seconds": 300,
+    "unsettled_max_retries": 6,
+    # Mean seconds between date arrow presses, and how far from the first day users go
+    "navigate_mean_seconds": 20,
+    "date_offsets": [-1, 2],
+    # Mean visit length; a leaving user is replaced by a new one, keeping concurrency constant
+    "session_mean_seconds": 120,
+    # Refresh every channel before measuring, so the run starts from a warm store
+    "prefill": True,
+    "upstream": {"latency": 0.15, "jitter": 0.05, "error_rate": 0.0, "timeout_rate": 0.0},
+    "env": {},
+    "seed": 0,
+}
+
+
+def load_scenario(path: Path) -> Dict[str, Any]:
+    """A scenario file merged over the one it extends (if any) and DEFAULT_SCENARIO"""
+    raw = json.loads(path.read_text())
+    base = load_scenario(path.parent / raw.pop('extends')) if 'extends' in raw else dict(DEFAULT_SCENARIO)
+    scenario = {**base, **raw}
+    # upstream and env are merged key by key, so a variant only lists what it changes
+    for key in ('upstream', 'env'):
+        scenario[key] = {**base.get(key, {}), **raw.get(key, {})}
+    scenario['name'] = path.stem
+    return scenario
+
+
+class Recorder:
+    """Latency samples, status codes and sizes per endpoint, plus row statuses seen in streams"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.first_rows: List[float] = []
+        self.statuses: Dict[str, Counter] = {}
+        self.bytes: Dict[str, int] = {}
+        self.rows: Counter = Counter()
+        self.failures: Counter = Counter()
+
+    def record(self, endpoint: str, status: int, seconds: float, size: int):
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        self.statuses.setdefault(endpoint, Counter())[str(status)] += 1
+        self.bytes[endpoint] = self.bytes.get(endpoint, 0) + size
+
+    @property
+    def requests(self) -> int:
+        return sum(len(samples) for samples in self.latencies.values())
+
+    def report(self, seconds: float) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint, samples in sorted(self.latencies.items()):
+            statuses = self.statuses[endpoint]
+            endpoints[endpoint] = {
+                "requests_per_second": len(samples) / seconds,
+                "errors": sum(count for status, count in statuses.items() if not status.startswith(('2', '3'))),
+                "statuses": dict(statuses),
+                "mean_bytes": self.bytes[endpoint] / len(samples),
+                **summarize(samples),
+            }
+        if self.first_rows and 'stream' in endpoints:
+            endpoints['stream']['first_row'] = summarize(self.first_rows)
+        return {"endpoints": endpoints, "rows": dict(self.rows), "failures": dict(self.failures)}
+
+
+class AsgiClient:
+    """GETs dispatched straight into the ASGI app, timing the first body chunk containing `marker`"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def get(self, url: str, marker: Optional[bytes] = None,
+                  headers: Optional[Dict[str, str]] = None) -> Tuple[int, bytes, Optional[float], Optional[str]]:
+        path, _, query = url.partition('?')
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [(b"accept-encoding", b"identity")] + [
+                (name.lower().encode(), value.encode()) for name, value in (headers or {}).items()
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("loadtest", 80),
+        }
+        started = time.perf_counter()
+        response: Dict[str, Any] = {"status": 0, "body": bytearray(), "marked": None, "etag": None}
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Then idle like a connected client; StreamingResponse listens for a disconnect meanwhile
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["etag"] = dict(message.get("headers", [])).get(b"etag", b"").decode() or None
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                if marker is not None and response["marked"] is None and marker in chunk:
+                    response["marked"] = time.perf_counter() - started
+                response["body"].extend(chunk)
+
+        await self.app(scope, receive, send)
+        return response["status"], bytes(response["body"]), response["marked"], response["etag"]
+
+    async def close(self):
+        pass
+
+
+class HttpClient:
+    """The same GETs over a real socket to a local uvicorn"""
+
+    def __init__(self, base_url: str, users: int):
+        import aiohttp
+
+        self.base_url = base_url
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=users),
+            timeout=aiohttp.ClientTimeout(total=120),
+            auto_decompress=False
+        )
+
+    async def get(self, url: str, marker: Optional[bytes] = None,
+                  headers: Optional[Dict[str, str]] = None) -> Tuple[int, bytes, Optional[float], Optional[str]]:
+        started = time.perf_counter()
+        marked = None
+        body = bytearray()
+        async with self.session.get(self.base_url + url, headers=headers) as response:
+            async for chunk in response.content.iter_any():
+                if marker is not None and marked is None and marker in chunk:
+                    marked = time.perf_counter() - started
+                body.extend(chunk)
+            return response.status, bytes(body), marked, response.headers.get('ETag')
+
+    async def close(self):
+        await self.session.close()
+
+
+class VirtualUser:
+    """One browser tab running the schedule page, driven by the timers App.js uses"""
+
+    def __init__(self, client, recorder: Recorder, scenario: Dict[str, Any], first_day: datetime,
+                 rng: random.Random, stop_at: float):
+        self.client = client
+        self.recorder = recorder
+        self.scenario = scenario
+        self.first_day = first_day
+        self.rng = rng
+        self.stop_at = stop_at
+        self.offset = 0
+        self.version: Optional[int] = None
+        # The grid's rows as (channel_id, status), in stream order
+        self.rows: List[Tuple[str, str]] = []
+        # Last ETag per "channel_id:date", as App.js keeps them for the tab's lifetime
+        self.etags: Dict[str, str] = {}
+        self.unsettled_retries = 0
+
+    @property
+    def date(self) -> str:
+        return (self.first_day + timedelta(days=self.offset)).strftime('%Y-%m-%d')
+
+    @property
+    def unsettled(self) -> bool:
+        return any(row_status != 'fresh' for _, row_status in self.rows)
+
+    async def request(self, endpoint: str, url: str, marker: Optional[bytes] = None,
+                      headers: Optional[Dict[str, str]] = None) -> Tuple[int, bytes, Optional[str]]:
+        started = time.perf_counter()
+        try:
+            status, body, marked, etag = await self.client.get(url, marker, headers)
+        except Exception as e:
+            self.recorder.failures[type(e).__name__] += 1
+            self.recorder.record(endpoint, 599, time.perf_counter() - started, 0)
+            return 599, b'', None
+        self.recorder.record(endpoint, status, time.perf_counter() - started, len(body))
+        if marked is not None:
+            self.recorder.first_rows.append(marked)
+        return status, body, etag
+
+    async def stream(self):
+        status, body, _ = await self.request(
+            'stream', f"/api/schedule/stream?date={self.date}&programs=true", b'"type":"channel"'
+        )
+        if status != 200:
+            return
+        rows: Dict[int, Tuple[str, str]] = {}
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            if event['type'] == 'meta':
+                self.version = event['version']
+            elif event['type'] == 'channel':
+                schedule = event['schedule']
+                row_status = schedule.get('status', 'fresh')
+                self.recorder.rows[row_status] += 1
+                rows[event['index']] = (schedule['channel_id'], row_status)
+        self.rows = [rows[index] for index in sorted(rows)]
+
+    async def refetch_unsettled(self):
+        """Re-check every stale or pending row on its own, as App.js refetchUnsettled does"""
+        date = self.date
+
+        async def refetch(index: int, channel_id: str):
+            etag_key = f"{channel_id}:{date}"
+            headers = {'If-None-Match': self.etags[etag_key]} if etag_key in self.etags else None
+            status, body, etag = await self.request(
+                'channel', f"/api/schedule/{channel_id}?date={date}&programs=true", headers=headers
+            )
+            if status != 200:
+                return
+            if etag:
+                self.etags[etag_key] = etag
+            self.rows[index] = (channel_id, json.loads(body).get('status', 'fresh'))
+
+        await asyncio.gather(*(
+            refetch(index, channel_id)
+            for index, (channel_id, row_status) in enumerate(self.rows) if row_status != 'fresh'
+        ))
+
+    def next_refetch(self) -> Optional[float]:
+        """When App.js would next re-check unsettled rows, or None once they settled or it gave up"""
+        scenario = self.scenario
+        if not self.unsettled or self.unsettled_retries >= scenario['unsettled_max_retries']:
+            return None
+        delay = min(scenario['unsettled_retry_seconds'] * 2 ** self.unsettled_retries,
+                    scenario['unsettled_retry_max_seconds'])
+        return time.monotonic() + delay
+
+    async def apply_changes(self):
+        more = True
+        while more:
+            if self.version is None:
+                return await self.stream()
+            status, body = await self.request('changes', f"/api/schedule/changes?since={self.version}&date={self.date}")
+            if status != 200:
+                return
+            feed = json.loads(body)
+            if feed['reset']:
+                return await self.stream()
+            self.version = feed['version']
+            more = feed['more']
+            # A row with changes applied is shown as fresh again
+            changed = {change['channel_id'] for change in feed['changes']}
+            self.rows = [(channel_id, 'fresh' if channel_id in changed else row_status)
+                         for channel_id, row_status in self.rows]
+
+    async def run(self):
+        scenario = self.scenario
+        low, high = scenario['date_offsets']
+        now = time.monotonic()
+        leave_at = min(self.stop_at, now + self.rng.expovariate(1 / scenario['session_mean_seconds']))
+        next_poll = now + scenario['poll_seconds']
+        next_navigate = now + self.rng.expovariate(1 / scenario['navigate_mean_seconds'])
+
+        await self.stream()
+        refetch_at = self.next_refetch()
+        while True:
+            due = min(t for t in (leave_at, next_poll, next_navigate, refetch_at) if t is not None)
+            await asyncio.sleep(max(0.0, due - time.monotonic()))
+            now = time.monotonic()
+            if now >= leave_at:
+                return
+            grid = (self.offset, list(self.rows), self.unsettled_retries)
+            if refetch_at is not None and now >= refetch_at:
+                await self.refetch_unsettled()
+                self.unsettled_retries += 1
+            elif now >= next_navigate:
+                # Arrows stay within the days the scenario covers
+                step = self.rng.choice([-1, 1])
+                self.offset = self.offset + step if low <= self.offset + step <= high else self.offset - step
+                # A new date starts its retries over
+                self.unsettled_retries = 0
+                await self.stream()
+                next_navigate = time.monotonic() + self.rng.expovariate(1 / scenario['navigate_mean_seconds'])
+                # App.js restarts its polling timer whenever the date changes
+                next_poll = time.monotonic() + scenario['poll_seconds']
+            elif now >= next_poll:
+                await self.apply_changes()
+                next_poll = time.monotonic() + scenario['poll_seconds']
+            if not self.unsettled:
+                self.unsettled_retries = 0
+            # Like App.js, the retry timer restarts whenever the grid or the retry count changes
+            if (self.offset, self.rows, self.unsettled_retries) != grid:
+                refetch_at = self.next_refetch()
+
+
+async def user_slot(index: int, client, recorder: Recorder, scenario: Dict[str, Any], first_day: datetime,
+                    stop_at: float):
+    """Keep one concurrent user alive from its ramp-up slot to the end of the run"""
+    rng = random.Random(scenario['seed'] * 100003 + index)
+    await asyncio.sleep(scenario['ramp_seconds'] * index / max(1, scenario['users']))
+    while time.monotonic() < stop_at:
+        await VirtualUser(client, recorder, scenario, first_day, rng, stop_at).run()
+
+
+async def prefill(server, first_day: datetime):
+    """Refresh every channel once, as the background refresher would have before traffic arrived"""
+    semaphore = asyncio.Semaphore(server.REFRESH_CONCURRENCY)
+    date = first_day.strftime('%Y-%m-%d')
+
+    async def refresh(channel):
+        async with semaphore:
+            await server.refresh_channel_day(channel, date)
+
+    await asyncio.gather(*(refresh(channel) for channel in server.CHANNELS))
+
+
+async def start_app(server, scenario: Dict[str, Any]):
+    """Run the app's startup hooks and return (client, stop callable) for the scenario's transport"""
+    if scenario['transport'] == 'asgi':
+        await server.app.router.startup()
+        return AsgiClient(server.app), server.app.router.shutdown
+
+    import uvicorn
+
+    config = uvicorn.Config(server.app, host='127.0.0.1', port=0, log_level='warning', lifespan='on')
+    uvicorn_server = uvicorn.Server(config)
+    serving = asyncio.create_task(uvicorn_server.serve())
+    while not uvicorn_server.started:
+        if serving.done():
+            serving.result()
+        await asyncio.sleep(0.05)
+    port = uvicorn_server.servers[0].sockets[0].getsockname()[1]
+
+    async def stop():
+        uvicorn_server.should_exit = True
+        await serving
+
+    return HttpClient(f"http://127.0.0.1:{port}", scenario['users']), stop
+
+
+async def run_scenario(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    import server
+    from stub_upstream import StubUpstream
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    try:
+        await asyncio.wait_for(server.db.command('ping'), 3)
+    except Exception as e:
+        raise SystemExit(f"MongoDB unavailable at MONGO_URL: {str(e) or type(e).__name__}")
+    await server.client.drop_database(server.db.name)
+
+    stub = StubUpstream(seed=scenario['seed'], **scenario['upstream'])
+    server.TVINSIDER_BASE_URL = await stub.start()
+    client, stop_app = await start_app(server, scenario)
+    first_day = datetime.strptime(fixture_date(server, stub.pages), '%Y-%m-%d')
+
+    try:
+        if scenario['prefill']:
+            await prefill(server, first_day)
+
+        recorder = Recorder()
+        upstream_before = stub.stats()
+        started = time.monotonic()
+        stop_at = started + scenario['duration_seconds']
+        await asyncio.gather(*(
+            user_slot(index, client, recorder, scenario, first_day, stop_at)
+            for index in range(scenario['users'])
+        ))
+        elapsed = time.monotonic() - started
+        upstream_after = stub.stats()
+    finally:
+        await client.close()
+        await server.client.drop_database(server.db.name)
+        await stop_app()
+        await stub.stop()
+
+    upstream = {key: upstream_after[key] - upstream_before[key] for key in upstream_after}
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "scenario": scenario,
+        },
+        "seconds": elapsed,
+        "requests": recorder.requests,
+        "requests_per_second": recorder.requests / elapsed,
+        **recorder.report(elapsed),
+        "upstream": {
+            **upstream,
+            "requests_per_second": upstream['requests'] / elapsed,
+            # Upstream fetches caused per client request; the refresher's share counts too
+            "amplification": upstream['requests'] / recorder.requests if recorder.requests else None,
+        },
+    }
+
+
+def headline(results: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    stream = results['endpoints'].get('stream', {})
+    return {
+        "rps": results['requests_per_second'],
+        "stream p50": stream.get('p50_ms'),
+        "stream p95": stream.get('p95_ms'),
+        "stream p99": stream.get('p99_ms'),
+        "first row p95": stream.get('first_row', {}).get('p95_ms'),
+        "errors": sum(endpoint['errors'] for endpoint in results['endpoints'].values()),
+        "amplification": results['upstream']['amplification'],
+    }
+
+
+def print_comparison(runs: Dict[str, Dict[str, Any]]):
+    """One row per scenario with the numbers worth comparing first"""
+    rows = {name: headline(results) for name, results in runs.items()}
+    columns = list(next(iter(rows.values())))
+    width = max(len(name) for name in rows) + 2
+    print("\n" + "scenario".ljust(width) + "".join(f"{column:>15}" for column in columns))
+    for name, row in rows.items():
+        cells = "".join(f"{'-' if value is None else format(value, '.3f'):>15}" for value in row.values())
+        print(name.ljust(width) + cells)
+
+
+# Command-line overrides of scenario keys
+OVERRIDES = {'users': '--users', 'duration_seconds': '--duration', 'transport': '--transport'}
+
+
+def apply_overrides(scenario: Dict[str, Any], args) -> Dict[str, Any]:
+    for key in OVERRIDES:
+        value = getattr(args, key)
+        if value is not None:
+            scenario[key] = value
+    return scenario
+
+
+def run_in_child(path: Path, args) -> Dict[str, Any]:
+    """Run one scenario in a fresh interpreter, since its env has to be set before the app is imported"""
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        output = Path(f.name)
+    try:
+        command = [sys.executable, __file__, str(path), '--output', str(output), '--quiet', '--db-name', args.db_name]
+        for key, flag in OVERRIDES.items():
+            if getattr(args, key) is not None:
+                command += [flag, str(getattr(args, key))]
+        subprocess.run(command, check=True)
+        return json.loads(output.read_text())
+    finally:
+        output.unlink(missing_ok=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the schedule app with App.js-like virtual users")
+    parser.add_argument('scenarios', nargs='+', help="scenario JSON files")
+    parser.add_argument('--users', type=int, help="override the scenario's concurrent users")
+    parser.add_argument('--duration', dest='duration_seconds', type=float, help="override the run length in seconds")
+    parser.add_argument('--transport', choices=['asgi', 'http'], help="override the scenario's transport")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--baseline', help="earlier results JSON (from one scenario) to compare against")
+    parser.add_argument('--db-name', default='tv_schedule_load', help="MongoDB database used and dropped by the run")
+    parser.add_argument('--quiet', action='store_true', help="do not print the results")
+    args = parser.parse_args()
+    if args.baseline and len(args.scenarios) > 1:
+        parser.error("--baseline compares a single scenario run")
+
+    paths = [Path(path) for path in args.scenarios]
+    if len(paths) == 1:
+        scenario = apply_overrides(load_scenario(paths[0]), args)
+        # Before server is imported: a throwaway database, nothing written beside the app, the stub as upstream
+        os.environ.update({
+            'DB_NAME': args.db_name,
+            'PAGE_ARCHIVE_DIR': '',
+            'SNAPSHOT_PATH': '',
+            **{key: str(value) for key, value in scenario['env'].items()},
+        })
+        results = asyncio.run(run_scenario(scenario))
+        runs = {scenario['name']: results}
+    else:
+        runs = {path.stem: run_in_child(path, args) for path in paths}
+        results = runs
+
+    output = json.dumps(results, indent=2)
+    if not args.quiet:
+        print(output)
+        print_comparison(runs)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    if args.baseline:
+        compare(json.loads(Path(args.baseline).read_text()), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""Write channel schedule pages into benchmarks/fixtures for the offline benchmarks and tests.
+
+    python backend/benchmarks/record_fixtures.py              # fetch live pages from tvinsider
+    python backend/benchmarks/record_fixtures.py --synthetic  # write generated pages, no network
+    python backend/benchmarks/record_fixtures.py --from-archive backend/page_archive  # newest archived pages
+
+Live and archived pages are kept byte for byte. Synthetic pages follow the
+markup the parser expects (page chrome, day headings and a.show-upcoming
+containers) and are deterministic. The committed fixtures are synthetic: the
+machine they were generated on could not reach tvinsider, so no live page has
+been checked in yet. Replace them with live or archived pages when you can.
+"""
+import argparse
+import asyncio
+import random
+import sys
+from datetime import datetime, timedelta
+from html import escape
+from pathlib import Path
+
+import aiohttp
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+# A spread of premium, basic-cable and kids channels; url_name values from server.CHANNELS
+FIXTURE_CHANNELS = [
+    'hbo', 'cinemax', 'showtime', 'starz', 'starz-encore-westerns',
+    'tnt', 'amc', 'fx', 'cartoon-network', 'court-tv',
+]
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+PROGRAMS = [
+    ("The Matrix", "Feature Film", "1999"), ("Dune: Part Two", "Feature Film", "2024"),
+    ("Oppenheimer", "Feature Film", "2023"), ("Barbie", "Feature Film", "2023"),
+    ("Mad Max: Fury Road", "Feature Film", "2015"), ("Alien", "Feature Film", "1979"),
+    ("The Good, the Bad and the Ugly", "Feature Film", "1966"), ("Paddington 2", "Feature Film", "2017"),
+    ("Amélie", "Feature Film", "2001"), ("Heat", "Feature Film", "1995"),
+    ("House of the Dragon", "Series", "2022"), ("The Last of Us", "Series", "2023"),
+    ("Succession", "Series", "2018"), ("True Detective", "Series", "2014"),
+    ("Law & Order", "Series", "1990"), ("Adventure Time", "Series", "2010"),
+    ("Court Cam", "Series", "2019"), ("The Walking Dead", "Series", "2010"),
+    ("Shōgun", "Series", "2024"), ("Real Time With Bill Maher", "Talk", "2003"),
+]
+
+DESCRIPTIONS = [
+    "A hacker learns the world he knows is a simulation and joins a rebellion against its makers.",
+    "Family loyalties are tested as a struggle for power threatens to tear an empire apart.",
+    "Survivors cross a ruined country, trusting no one and hunted at every turn.",
+    "Detectives reopen a case that has haunted a small town for a generation.",
+    "An unlikely hero sets out on a journey that changes everyone it touches.",
+]
+
+SLOT_LENGTHS = [30, 60, 60, 90, 105, 120, 135]
+
+
+def _clock(minute: int) -> str:
+    hour, mins = divmod(minute % 1440, 60)
+    return f"{hour % 12 or 12}:{mins:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def _chrome(rnd: random.Random, kind: str) -> str:
+    """Navigation, promo and script blocks: the bulk of a real page that is not listings"""
+    links = "".join(
+        f'<li class="nav-item"><a href="/{kind}/{i}" data-track="nav-{i}">{escape(rnd.choice(PROGRAMS)[0])}</a></li>'
+        for i in range(120)
+    )
+    promos = "".join(
+        f'<div class="promo-card"><img src="/img/{rnd.randrange(10 ** 8)}.jpg" alt="">'
+        f'<span>{escape(rnd.choice(DESCRIPTIONS))}</span></div>'
+        for _ in range(40)
+    )
+    script = "window.__DATA__=" + repr([rnd.randrange(10 ** 6) for _ in range(800)]) + ";"
+    return f'<nav class="{kind}"><ul>{links}</ul></nav><aside>{promos}</aside><script>{script}</script>'
+
+
+def _listing(rnd: random.Random, minute: int, index: int) -> str:
+    title, show_type, year = rnd.choice(PROGRAMS)
+    new = ' <span class="new">New</span>' if rnd.random() < 0.15 else ''
+    episode = ''
+    if show_type == "Series":
+        season, number = rnd.randint(1, 8), rnd.randint(1, 12)
+        episode = (
+            f'<h5>{escape(f"Chapter {number}")}</h5>'
+            f'<h6>Season {season} • Episode {number}</h6>'
+        )
+    return (
+        f'<a class="show-upcoming" href="/show/{index}" data-id="{rnd.randrange(10 ** 6)}">'
+        f'<time>{_clock(minute)}</time>'
+        f'<div class="show-upcoming-info"><h3>{escape(title)}{new}</h3>'
+        f'<h4>{show_type} • {year}</h4>{episode}'
+        f'<p>{escape(rnd.choice(DESCRIPTIONS))}</p></div></a>'
+    )
+
+
+def synthetic_page(url_name: str, start: datetime, days: int = 3) -> str:
+    """A deterministic schedule page for one channel covering `days` days from `start`"""
+    rnd = random.Random(url_name)
+    sections = []
+    minute = rnd.choice([0, 30, 60, 300, 360])
+    index = 0
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        listings = []
+        while minute < (offset + 1) * 1440:
+            listings.append(_listing(rnd, minute, index))
+            minute += rnd.choice(SLOT_LENGTHS)
+            index += 1
+        sections.append(
+            f'<section class="schedule-day"><h2>{day.strftime("%A, %B")} {day.day}</h2>'
+            + "\n".join(listings) + '</section>'
+        )
+    return (
+        f'<!DOCTYPE html><html><head><title>{escape(url_name)} Schedule | TV Insider</title></head><body>'
+        + _chrome(rnd, 'header')
+        + '<main class="network-schedule">' + "\n".join(sections) + '</main>'
+        + _chrome(rnd, 'footer')
+        + '</body></html>'
+    )
+
+
+def write_synthetic(channels, start: datetime):
+    FIXTURES_DIR.mkdir(exist_ok=True)
+    for url_name in channels:
+        page = synthetic_page(url_name, start)
+        (FIXTURES_DIR / f'{url_name}.html').write_text(page, encoding='utf-8')
+        print(f"{url_name}: {len(page)} bytes (synthetic)")
+
+
+async def record_live(channels, base_url: str):
+    FIXTURES_DIR.mkdir(exist_ok=True)
+    async with aiohttp.ClientSession(headers={'User-Agent': USER_AGENT}) as session:
+        for url_name in channels:
+            async with session.get(f"{base_url}/network/{url_name}/schedule/") as response:
+                if response.status != 200:
+                    print(f"{url_name}: HTTP {response.status}, skipped", file=sys.stderr)
+                    continue
+                page = await response.text()
+            (FIXTURES_DIR / f'{url_name}.html').write_text(page, encoding='utf-8')
+            print(f"{url_name}: {len(page)} bytes")
+
+
+def copy_from_archive(channels, archive_dir: Path):
+    """Write each channel's newest archived page (see page_archive.py), keyed by url_name like live recording"""
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from page_archive import PageArchive
+    from server import CHANNELS
+
+    # The archive is keyed by channel id, fixtures by url_name
+    channel_ids = {channel['url_name']: channel['id'] for channel in CHANNELS}
+    archive = PageArchive(archive_dir)
+    FIXTURES_DIR.mkdir(exist_ok=True)
+    for url_name in channels:
+        page = archive.latest(channel_ids.get(url_name, url_name))
+        if page is None:
+            print(f"{url_name}: not in archive, skipped", file=sys.stderr)
+            continue
+        content = page.read()
+        (FIXTURES_DIR / f'{url_name}.html').write_text(content, encoding='utf-8')
+        print(f"{url_name}: {len(content)} bytes (archived {page.fetched_at.isoformat()})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write schedule page fixtures for the offline benchmarks")
+    parser.add_argument('--synthetic', action='store_true', help="generate pages instead of fetching them")
+    parser.add_argument('--start', default='2026-10-17', help="first listed date of synthetic pages")
+    parser.add_argument('--base-url', default='https://www.tvinsider.com')
+    parser.add_argument('--from-archive', type=Path, help="copy pages from a page archive directory instead")
+    parser.add_argument('channels', nargs='*', default=FIXTURE_CHANNELS, help="url_name values to write")
+    args = parser.parse_args()
+
+    if args.from_archive:
+        copy_from_archive(args.channels, args.from_archive)
+    elif args.synthetic:
+        write_synthetic(args.channels, datetime.strptime(args.start, '%Y-%m-%d'))
+    else:
+        asyncio.run(record_live(args.channels, args.base_url.rstrip('/')))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,379 @@
+"""Offline benchmark suite for the schedule backend.
+
+    python backend/benchmarks/run_benchmarks.py --output bench.json [--baseline previous.json]
+
+Sections:
+  parse      parser throughput over the fixture pages, per parser backend
+  scrape     scrape_channel_schedule for every channel against a local stub upstream
+  schedule   end-to-end GET /api/schedule latency through the ASGI app (p50/p95/p99)
+  serialize  cost of serializing and compressing a full-grid response
+
+Nothing leaves the machine: fixtures come from benchmarks/fixtures (see
+record_fixtures.py) and are served by stub_upstream.py. The schedule section
+needs a MongoDB at MONGO_URL and uses its own database (--db-name), dropped
+afterwards; without MongoDB that section is reported as skipped.
+Results are written as JSON; --baseline prints the change of every metric
+against an earlier run.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+
+def summarize(seconds: List[float]) -> Dict[str, float]:
+    """Nearest-rank percentiles of latency samples, in milliseconds"""
+    ordered = sorted(seconds)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+async def asgi_get(app, url: str, headers: Dict[str, str] = None):
+    """Run one GET through the ASGI app in-process and return (status, response headers, body)"""
+    path, _, query = url.partition('?')
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80),
+    }
+    response: Dict[str, Any] = {"status": None, "headers": {}, "body": bytearray()}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode(): v.decode() for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            response["body"].extend(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], bytes(response["body"])
+
+
+def bench_parse(pages: Dict[str, str], repeat: int) -> Dict[str, Any]:
+    from schedule_parser import PARSERS
+
+    results = {}
+    page_bytes = sum(len(page.encode('utf-8')) for page in pages.values())
+    for backend, parse in PARSERS.items():
+        shows = 0
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for page in pages.values():
+                shows += len(parse(page))
+        elapsed = time.perf_counter() - started
+        results[backend] = {
+            "pages": len(pages) * repeat,
+            "shows": shows,
+            "seconds": elapsed,
+            "shows_per_second": shows / elapsed,
+            "pages_per_second": len(pages) * repeat / elapsed,
+            "mb_per_second": page_bytes * repeat / elapsed / 1e6,
+        }
+    return results
+
+
+def fixture_date(server, pages: Dict[str, str]) -> str:
+    """The first date the fixture pages list, so the store benchmarks query a day that has shows"""
+    from schedule_parser import heading_date, parse_schedule
+
+    today = server.today_et()
+    first = pages[sorted(pages)[0]]
+    heading = next((fields['day'] for fields in parse_schedule(first) if fields.get('day')), None)
+    listed = heading_date(heading, datetime.strptime(today, '%Y-%m-%d').date()) if heading else None
+    return listed.strftime('%Y-%m-%d') if listed else today
+
+
+async def scrape_round(server, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    outcome = {"shows": 0, "failed": 0, "unchanged": 0}
+
+    async def scrape(channel):
+        async with semaphore:
+            started = time.perf_counter()
+            harvest = await server.scrape_channel_schedule(server.upstream.session, channel)
+            latencies.append(time.perf_counter() - started)
+        if harvest is None:
+            outcome["unchanged"] += 1
+        elif not harvest:
+            outcome["failed"] += 1
+        else:
+            outcome["shows"] += sum(len(shows) for shows in harvest.values())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(scrape(channel) for channel in server.CHANNELS))
+    outcome["seconds"] = time.perf_counter() - started
+    return outcome, latencies
+
+
+async def bench_scrape(server, stub, rounds: int, concurrency: int) -> Dict[str, Any]:
+    from upstream import PageValidators
+
+    totals = {"shows": 0, "failed": 0, "seconds": 0.0}
+    latencies: List[float] = []
+    for _ in range(rounds):
+        # Forget validators so every round downloads and parses every page
+        server.page_validators = PageValidators()
+        outcome, round_latencies = await scrape_round(server, concurrency)
+        latencies.extend(round_latencies)
+        for key in totals:
+            totals[key] += outcome[key]
+
+    # One more round with validators kept: the steady-state cost when nothing changed upstream
+    revalidate, revalidate_latencies = await scrape_round(server, concurrency)
+
+    return {
+        "channels": len(server.CHANNELS),
+        "rounds": rounds,
+        "concurrency": concurrency,
+        "shows": totals["shows"],
+        "failed": totals["failed"],
+        "shows_per_second": totals["shows"] / totals["seconds"],
+        "latency": summarize(latencies),
+        "revalidate": {
+            "seconds": revalidate["seconds"],
+            "unchanged": revalidate["unchanged"],
+            "latency": summarize(revalidate_latencies),
+        },
+        "stub": stub.stats(),
+    }
+
+
+async def bench_schedule(server, requests: int, date: str) -> Dict[str, Any]:
+    try:
+        await asyncio.wait_for(server.db.command('ping'), 3)
+    except Exception as e:
+        return {"skipped": f"MongoDB unavailable: {str(e) or type(e).__name__}"}
+
+    await server.ensure_indexes()
+    server.page_validators = server.PageValidators()
+    for channel in server.CHANNELS:
+        await server.refresh_channel_day(channel, date)
+
+    everything = f"0-{len(server.CHANNELS) - 1}"
+    scenarios = {
+        # Default first page of channels, body already rendered and compressed
+        "warm": (f"/api/schedule?date={date}", False, False),
+        # Every request reads the store, renders and compresses from scratch
+        "cold": (f"/api/schedule?date={date}", False, True),
+        # A poll from a client holding the current version
+        "not_modified": (f"/api/schedule?date={date}", True, False),
+        "all_channels_warm": (f"/api/schedule?date={date}&channels={everything}", False, False),
+        "viewport_slice": (f"/api/schedule?date={date}&channels=0-9&from=18:00&to=21:00&fields=id,title,start_minute,duration", False, False),
+    }
+
+    results = {}
+    for name, (url, conditional, cold) in scenarios.items():
+        headers = {"Accept-Encoding": "br, gzip"}
+        _, first_headers, _ = await asgi_get(server.app, url, headers)
+        if conditional:
+            headers["If-None-Match"] = first_headers["etag"]
+
+        latencies = []
+        status = size = None
+        for _ in range(requests):
+            if cold:
+                server.schedule_cache.clear()
+                server.response_cache.clear()
+            started = time.perf_counter()
+            status, _, body = await asgi_get(server.app, url, headers)
+            latencies.append(time.perf_counter() - started)
+            size = len(body)
+        results[name] = {"status": status, "bytes": size, **summarize(latencies)}
+
+    await server.client.drop_database(server.db.name)
+    return results
+
+
+def bench_serialize(server, pages: Dict[str, str], repeat: int, date: str) -> Dict[str, Any]:
+    import response_cache
+    from schedule_parser import parse_schedule
+    from show_records import ChannelDay, ShowRecord, channel_schedule_json, schedule_response_json
+
+    page_list = [pages[name] for name in sorted(pages)]
+    parsed = [parse_schedule(page) for page in page_list]
+    scraped_at = datetime.now(timezone.utc)
+
+    def build_days():
+        days = []
+        for i, channel in enumerate(server.CHANNELS):
+            shows = [ShowRecord.from_fields(fields, channel['id'], date, scraped_at) for fields in parsed[i % len(parsed)]]
+            server.normalize_show_times(shows, date)
+            days.append((channel, ChannelDay(channel['id'], date, shows)))
+        return days
+
+    def render(days):
+        fragments = [channel_schedule_json(c['id'], c['name'], date, day.shows_json()) for c, day in days]
+        return schedule_response_json(fragments, "2026-10-17 12:00:00", "America/New_York")
+
+    def best_of(func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    days = build_days()
+    body = render(days)
+    results = {
+        "channels": len(days),
+        "shows": sum(len(day) for _, day in days),
+        "bytes": len(body),
+        "build_records_ms": best_of(build_days) * 1000,
+        # Fresh ChannelDay wrappers have no serialized shows yet
+        "render_cold_ms": best_of(lambda: render([(c, ChannelDay(day.channel_id, date, day.shows)) for c, day in days])) * 1000,
+        "render_warm_ms": best_of(lambda: render(days)) * 1000,
+    }
+    encodings = ('gzip', 'br') if response_cache.brotli is not None else ('gzip',)
+    for encoding in encodings:
+        results[f"{encoding}_ms"] = best_of(lambda: response_cache.compress(body, encoding)) * 1000
+        results[f"{encoding}_bytes"] = len(response_cache.compress(body, encoding))
+    return results
+
+
+def flatten(results: Dict[str, Any], prefix: str = '') -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline: Dict[str, Any], results: Dict[str, Any]):
+    """Print every metric next to its baseline value and the relative change"""
+    before = flatten({k: v for k, v in baseline.items() if k != 'meta'})
+    after = flatten({k: v for k, v in results.items() if k != 'meta'})
+    print(f"\nCompared with {baseline.get('meta', {}).get('commit') or 'baseline'}:")
+    for name in sorted(set(before) & set(after)):
+        old, new = before[name], after[name]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"  {name:55} {old:>14.3f} -> {new:>14.3f}  {change}")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return ''
+
+
+async def run(args) -> Dict[str, Any]:
+    import server
+    from stub_upstream import StubUpstream
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    stub = StubUpstream(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+    server.TVINSIDER_BASE_URL = await stub.start()
+    server.parse_executor = server.create_parse_executor()
+    await server.upstream.start()
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parser_backend": server.PARSER_BACKEND,
+            "parse_executor": server.PARSE_EXECUTOR,
+            "fixtures": sorted(stub.pages),
+            "args": vars(args),
+        }
+    }
+    date = fixture_date(server, stub.pages)
+    try:
+        sections = set(args.sections)
+        if 'parse' in sections:
+            results["parse"] = bench_parse(stub.pages, args.repeat)
+        if 'scrape' in sections:
+            results["scrape"] = await bench_scrape(server, stub, args.rounds, args.concurrency)
+        if 'schedule' in sections:
+            results["schedule"] = await bench_schedule(server, args.requests, date)
+        if 'serialize' in sections:
+            results["serialize"] = bench_serialize(server, stub.pages, args.repeat, date)
+    finally:
+        await server.upstream.close()
+        server.parse_executor.shutdown(wait=False)
+        await stub.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the schedule backend")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--baseline', help="earlier results JSON to compare against")
+    parser.add_argument('--sections', nargs='+', default=['parse', 'scrape', 'schedule', 'serialize'])
+    parser.add_argument('--repeat', type=int, default=5, help="passes over the fixtures for parse/serialize")
+    parser.add_argument('--rounds', type=int, default=3, help="full-grid scrape rounds")
+    parser.add_argument('--concurrency', type=int, default=4, help="concurrent scrapes, like REFRESH_CONCURRENCY")
+    parser.add_argument('--requests', type=int, default=200, help="requests per /api/schedule scenario")
+    parser.add_argument('--latency', type=float, default=0.05, help="stub upstream latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db-name', default='tv_schedule_bench', help="MongoDB database used and dropped by the run")
+    args = parser.parse_args()
+
+    # Before server is imported: never touch the app's real database or page archive, or start background refreshes
+    os.environ['DB_NAME'] = args.db_name
+    os.environ['REFRESH_ENABLED'] = 'false'
+    os.environ['PAGE_ARCHIVE_DIR'] = ''
+    # Measure the scraper, not the politeness limits meant for the real site
+    os.environ['UPSTREAM_RATE'] = '1000'
+    os.environ['UPSTREAM_BURST'] = str(args.concurrency)
+    os.environ['UPSTREAM_CONCURRENCY'] = str(args.concurrency)
+    os.environ['UPSTREAM_CONCURRENCY_MAX'] = str(args.concurrency)
+    os.environ['UPSTREAM_LIMIT_PER_HOST'] = str(args.concurrency)
+
+    results = asyncio.run(run(args))
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    if args.baseline:
+        compare(json.loads(Path(args.baseline).read_text()), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Local stand-in for tvinsider serving the fixture pages with configurable latency and errors.
+
+    python backend/benchmarks/stub_upstream.py --port 8089 --latency 0.15 --jitter 0.05 --error-rate 0.02
+
+Point the backend at it with TVINSIDER_BASE_URL=http://127.0.0.1:8089.
+Channels without a fixture of their own are served one of the other fixture pages.
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import zlib
+from pathlib import Path
+from typing import Dict, Optional
+
+from aiohttp import web
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+
+class StubUpstream:
+    """aiohttp server for /network/{url_name}/schedule/ with ETags, delays and injected 5xx/timeouts"""
+
+    def __init__(self, fixtures_dir: Path = FIXTURES_DIR, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, timeout_rate: float = 0.0, seed: int = 0):
+        self.pages: Dict[str, str] = {
+            path.stem: path.read_text(encoding='utf-8') for path in sorted(fixtures_dir.glob('*.html'))
+        }
+        if not self.pages:
+            raise FileNotFoundError(f"No fixtures in {fixtures_dir}; run record_fixtures.py first")
+        self.etags = {
+            name: '"' + hashlib.blake2b(page.encode('utf-8'), digest_size=8).hexdigest() + '"'
+            for name, page in self.pages.items()
+        }
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url: Optional[str] = None
+
+    def page_name(self, url_name: str) -> str:
+        if url_name in self.pages:
+            return url_name
+        names = sorted(self.pages)
+        return names[zlib.crc32(url_name.encode('utf-8')) % len(names)]
+
+    async def handle_schedule(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        if self.random.random() < self.timeout_rate:
+            # Long enough to trip any sane client timeout
+            delay = 3600
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.random.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=503, text="Service Unavailable")
+
+        name = self.page_name(request.match_info['url_name'])
+        etag = self.etags[name]
+        if request.headers.get('If-None-Match') == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(text=self.pages[name], content_type='text/html', headers={'ETag': etag})
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_get('/network/{url_name}/schedule/', self.handle_schedule)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{bound_port}"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests, "errors": self.errors, "not_modified": self.not_modified}
+
+
+async def serve(args):
+    stub = StubUpstream(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate, seed=args.seed
+    )
+    base_url = await stub.start(args.host, args.port)
+    print(f"Serving {len(stub.pages)} fixtures at {base_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await stub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the schedule fixture pages like tvinsider")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="+/- seconds of uniform random latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help="fraction of requests that never answer")
+    parser.add_argument('--seed', type=int, default=0)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import asyncio
+from typing import Any, Dict, List, Tuple
+
+from show_records import VOLATILE_FIELDS
+
+
+def _content(show: Any) -> Dict[str, Any]:
+    content = show.to_dict()
+    for field in VOLATILE_FIELDS:
+        content.pop(field, None)
+    return content
+
+
+def diff_shows(previous: List[Any], current: List[Any]) -> Tuple[List[Any], List[Any], List[str]]:
+    """(added, modified, removed ids) between two listings of the same channel and date.
+
+    Shows are matched by id, which is derived from channel, date and start
+    time, so a lineup swap in a slot shows up as a modification of that slot.
+    """
+    before = {show.id: show for show in previous}
+    after = {show.id: show for show in current}
+
+    added = [show for show_id, show in after.items() if show_id not in before]
+    modified = [
+        show for show_id, show in after.items()
+        if show_id in before and _content(show) != _content(before[show_id])
+    ]
+    removed = [show_id for show_id in before if show_id not in after]
+    return added, modified, removed
+
+
+class ChangeSignal:
+    """Wakes change-feed streams in this process as soon as a change is recorded"""
+
+    def __init__(self):
+        self._event = asyncio.Event()
+
+    def notify(self):
+        self._event.set()
+        self._event = asyncio.Event()
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait for the next change or the timeout, whichever comes first"""
+        event = self._event
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+
+from pymongo.errors import DuplicateKeyError
+
+
+def worker_identity() -> str:
+    """Identifies this process among the workers sharing a store: host, pid and a random suffix"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseManager:
+    """Expiring, owner-tagged leases kept in a Mongo collection.
+
+    A lease is one document keyed by name. Taking it is a single upsert that
+    only matches when the lease is free, expired or already ours; when another
+    worker holds it the upsert collides on _id and the attempt fails. Leases
+    expire on their own, so a worker that dies mid-refresh blocks nobody for
+    longer than its TTL.
+
+    Several tasks in this worker can hold the same lease at once (taking it
+    again renews it); it is only given up when the last of them releases it.
+    """
+
+    def __init__(self, collection, owner: str):
+        self.collection = collection
+        self.owner = owner
+        self._holders: Dict[str, int] = {}
+        self.acquired = 0
+        self.contended = 0
+        self.errors = 0
+
+    async def acquire(self, name: str, ttl: float) -> bool:
+        """Take a lease for one task. Every successful acquire must be paired with a release."""
+        # Counted before the round trip, so a concurrent release by another local holder keeps the lease
+        self._holders[name] = self._holders.get(name, 0) + 1
+        if await self.renew(name, ttl):
+            return True
+        self._drop_holder(name)
+        return False
+
+    async def renew(self, name: str, ttl: float) -> bool:
+        """Take or extend a lease without counting a holder, for leases kept until they lapse.
+        
+        Fails open when the store is unreachable, as a lone worker would.
+        """
+        now = datetime.now(timezone.utc)
+        try:
+            await self.collection.update_one(
+                {"_id": name, "$or": [{"expires_at": {"$lte": now}}, {"owner": self.owner}]},
+                {"$set": {"owner": self.owner, "acquired_at": now, "expires_at": now + timedelta(seconds=ttl)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            self.contended += 1
+            return False
+        except Exception as e:
+            self.errors += 1
+            logging.error(f"Error acquiring lease {name}: {str(e)}")
+            return True
+        self.acquired += 1
+        return True
+
+    def _drop_holder(self, name: str) -> int:
+        remaining = self._holders.get(name, 1) - 1
+        if remaining > 0:
+            self._holders[name] = remaining
+        else:
+            self._holders.pop(name, None)
+        return remaining
+
+    async def release(self, name: str):
+        if self._drop_holder(name) > 0:
+            return
+        try:
+            await self.collection.delete_one({"_id": name, "owner": self.owner})
+        except Exception as e:
+            logging.error(f"Error releasing lease {name}: {str(e)}")
+
+    async def wait_released(self, name: str, timeout: float, poll: float = 0.5) -> bool:
+        """Wait until nobody holds the lease; False if it is still held after timeout"""
+        loop = asyncio.get_running_loop()
+        give_up_at = loop.time() + timeout
+        while True:
+            try:
+                held = await self.collection.find_one(
+                    {"_id": name, "expires_at": {"$gt": datetime.now(timezone.utc)}}, {"_id": 1}
+                )
+            except Exception as e:
+                logging.error(f"Error reading lease {name}: {str(e)}")
+                return False
+            if held is None:
+                return True
+            if loop.time() >= give_up_at:
+                return False
+            await asyncio.sleep(poll)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "owner": self.owner,
+            "held": sorted(self._holders),
+            "acquired": self.acquired,
+            "contended": self.contended,
+            "errors": self.errors,
+        }
@@ -0,0 +1,115 @@
+import re
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+import pytz
+
+from show_records import AIRING_FIELDS, PROGRAM_FIELDS, dumps
+
+ET = pytz.timezone('America/New_York')
+
+XMLTV_HEADER = (
+    b'<?xml version="1.0" encoding="UTF-8"?>\n'
+    b'<!DOCTYPE tv SYSTEM "xmltv.dtd">\n'
+    b'<tv generator-info-name="Live TV Schedule" source-info-name="TV Insider">\n'
+)
+XMLTV_FOOTER = b'</tv>\n'
+
+# Control characters XML 1.0 does not allow, even escaped
+INVALID_XML_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# Shows stored without a known length get this much airtime in the export
+DEFAULT_PROGRAMME_MINUTES = 60
+
+
+def _text(value: str) -> str:
+    return escape(INVALID_XML_RE.sub('', value))
+
+
+def xmltv_time(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, ET).strftime('%Y%m%d%H%M%S %z')
+
+
+def _number(label: Optional[str]) -> Optional[int]:
+    """1-based number out of "Season 2" / "Episode 5"; None when it is not there"""
+    if not label:
+        return None
+    digits = ''.join(ch for ch in label if ch.isdigit())
+    return int(digits) if digits else None
+
+
+def xmltv_channel(channel: Dict[str, str]) -> bytes:
+    return (
+        f'  <channel id={quoteattr(channel["id"])}>'
+        f'<display-name>{_text(channel["name"])}</display-name></channel>\n'
+    ).encode('utf-8')
+
+
+def xmltv_programme(show: Dict[str, Any]) -> bytes:
+    """One <programme> for a stored show document; it must have a start_epoch"""
+    start = show['start_epoch']
+    stop = start + 60 * (show.get('duration') or DEFAULT_PROGRAMME_MINUTES)
+    parts = [
+        f'  <programme start="{xmltv_time(start)}" stop="{xmltv_time(stop)}" channel={quoteattr(show["channel_id"])}>',
+        f'<title>{_text(show["title"])}</title>',
+    ]
+    if show.get('episode_title'):
+        parts.append(f'<sub-title>{_text(show["episode_title"])}</sub-title>')
+    if show.get('description'):
+        parts.append(f'<desc>{_text(show["description"])}</desc>')
+    if show.get('year'):
+        parts.append(f'<date>{_text(show["year"])}</date>')
+    if show.get('show_type') and show['show_type'] != 'Unknown':
+        parts.append(f'<category>{_text(show["show_type"])}</category>')
+
+    season, episode = _number(show.get('season')), _number(show.get('episode'))
+    if season is not None and episode is not None:
+        # xmltv_ns counts from zero
+        parts.append(f'<episode-num system="xmltv_ns">{season - 1}.{episode - 1}.</episode-num>')
+        parts.append(f'<episode-num system="onscreen">S{season}E{episode}</episode-num>')
+    parts.append('</programme>\n')
+    return ''.join(parts).encode('utf-8')
+
+
+def jsonl_channel(channel: Dict[str, str]) -> bytes:
+    return dumps({"type": "channel", "channel_id": channel["id"], "channel_name": channel["name"]}) + b'\n'
+
+
+def jsonl_show(show: Dict[str, Any]) -> bytes:
+    return dumps({"type": "show", **show}) + b'\n'
+
+
+def jsonl_program(show: Dict[str, Any]) -> bytes:
+    program = {name: show.get(name) for name in PROGRAM_FIELDS}
+    return dumps({"type": "program", "program_id": show["program_id"], **program}) + b'\n'
+
+
+def jsonl_airing(show: Dict[str, Any]) -> bytes:
+    return dumps({"type": "airing", **{name: show.get(name) for name in AIRING_FIELDS}}) + b'\n'
+
+
+async def buffered(chunks: AsyncIterator[bytes], size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """Coalesce many small chunks into writes of about `size` bytes"""
+    pending = []
+    pending_bytes = 0
+    async for chunk in chunks:
+        pending.append(chunk)
+        pending_bytes += len(chunk)
+        if pending_bytes >= size:
+            yield b''.join(pending)
+            pending = []
+            pending_bytes = 0
+    if pending:
+        yield b''.join(pending)
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Gzip a byte stream incrementally, holding only zlib's window in memory"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,62 @@
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+# Fallback length for a channel's last known show, which has no following show to end it
+DEFAULT_LAST_SHOW_SECONDS = 60 * 60
+
+
+class IntervalIndex:
+    """Per-channel sorted airing intervals answering "what is on at time T" with a bisect.
+
+    Shows are added one (channel, date) at a time; each update re-merges only
+    that channel's days into a sorted array of start epochs.
+    """
+
+    def __init__(self, max_days: int = 16):
+        self.max_days = max_days
+        self._days: Dict[str, Dict[str, List[Any]]] = {}
+        self._starts: Dict[str, List[int]] = {}
+        self._intervals: Dict[str, List[Tuple[int, int, Any]]] = {}
+
+    def update(self, channel_id: str, date: str, shows: List[Any]):
+        """Replace a channel's shows for one date; shows need start_epoch set to be indexed"""
+        days = self._days.setdefault(channel_id, {})
+        days[date] = [show for show in shows if show.start_epoch is not None]
+
+        # Keep only the most recent dates so the index stays bounded
+        for stale_date in sorted(days)[:-self.max_days]:
+            del days[stale_date]
+
+        self._rebuild(channel_id)
+
+    def _rebuild(self, channel_id: str):
+        by_start: Dict[int, Any] = {}
+        # Later dates win when two dates list the same airing (a page carried past midnight)
+        for date in sorted(self._days[channel_id]):
+            for show in self._days[channel_id][date]:
+                by_start[show.start_epoch] = show
+
+        starts = sorted(by_start)
+        intervals = []
+        for i, start in enumerate(starts):
+            end = starts[i + 1] if i + 1 < len(starts) else start + DEFAULT_LAST_SHOW_SECONDS
+            intervals.append((start, end, by_start[start]))
+
+        self._starts[channel_id] = starts
+        self._intervals[channel_id] = intervals
+
+    def at(self, channel_id: str, epoch: int) -> Optional[Any]:
+        """The show airing on a channel at the given unix time, if known"""
+        starts = self._starts.get(channel_id)
+        if not starts:
+            return None
+
+        position = bisect_right(starts, epoch) - 1
+        if position < 0:
+            return None
+
+        start, end, show = self._intervals[channel_id][position]
+        return show if start <= epoch < end else None
+
+    def channel_count(self) -> int:
+        return sum(1 for starts in self._starts.values() if starts)
@@ -0,0 +1,185 @@
+import gzip
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from schedule_parser import parse_schedule_counted
+
+# <channel_id>/<fetched_at UTC>-<content hash>.html.gz
+FILENAME_RE = re.compile(r'(\d{8}T\d{6})Z-([0-9a-f]{16})\.html\.gz')
+TIMESTAMP_FORMAT = '%Y%m%dT%H%M%S'
+
+
+def _safe_name(channel_id: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_-]', '_', channel_id)
+
+
+class ArchivedPage:
+    """One stored page: which channel it is, when it was fetched and where it lives"""
+    __slots__ = ('channel_id', 'fetched_at', 'digest', 'path', 'size')
+
+    def __init__(self, channel_id: str, fetched_at: datetime, digest: str, path: Path, size: int):
+        self.channel_id = channel_id
+        self.fetched_at = fetched_at
+        self.digest = digest
+        self.path = path
+        self.size = size
+
+    def read(self) -> str:
+        return read_archived_page(self.path)
+
+
+def read_archived_page(path: Path) -> str:
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return f.read()
+
+
+def parse_archived_page(path: str, backend: str = "lxml") -> Tuple[List[Dict[str, Optional[str]]], int]:
+    """Parse one archived page; a top-level function so replay can fan it out to worker processes"""
+    return parse_schedule_counted(read_archived_page(Path(path)), backend)
+
+
+class PageArchive:
+    """Gzipped raw schedule pages on local disk, one directory per channel.
+
+    Every fetched page is kept under its fetch time and content hash so the
+    store can be rebuilt with a newer parser without going back upstream. A
+    page identical to the channel's previous one is not written again. Pages
+    older than retention_days, and the oldest pages beyond max_bytes, are
+    pruned at most once per prune_interval.
+    """
+
+    def __init__(self, root: Path, retention_days: float = 14, max_bytes: int = 2 * 1024 ** 3,
+                 prune_interval: float = 3600):
+        self.root = Path(root)
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+        self.prune_interval = prune_interval
+        self._last_digest: Dict[str, str] = {}
+        self._last_pruned = 0.0
+        self.stored = 0
+        self.duplicates = 0
+        self.pruned = 0
+        self.errors = 0
+
+    @staticmethod
+    def digest(content: str) -> str:
+        return hashlib.blake2b(content.encode('utf-8'), digest_size=8).hexdigest()
+
+    def store(self, channel_id: str, content: str, fetched_at: Optional[datetime] = None) -> Optional[Path]:
+        """Compress and write one page; returns its path, or None if it duplicates the previous page.
+
+        Blocking: call it from a thread, not the event loop.
+        """
+        fetched_at = fetched_at or datetime.now(timezone.utc)
+        digest = self.digest(content)
+        if self._last_digest.get(channel_id) == digest:
+            self.duplicates += 1
+            return None
+
+        directory = self.root / _safe_name(channel_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{fetched_at.astimezone(timezone.utc).strftime(TIMESTAMP_FORMAT)}Z-{digest}.html.gz"
+
+        # Write beside the target and rename, so readers never see a half-written page
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6, mtime=0) as f:
+                f.write(content.encode('utf-8'))
+            os.replace(temp_path, path)
+        except Exception:
+            self.errors += 1
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+        self._last_digest[channel_id] = digest
+        self.stored += 1
+        if time.monotonic() - self._last_pruned >= self.prune_interval:
+            self.prune()
+        return path
+
+    def entries(self, channel_ids: Optional[Iterable[str]] = None, since: Optional[datetime] = None,
+                until: Optional[datetime] = None) -> Iterator[ArchivedPage]:
+        """Archived pages, oldest first within each channel, optionally filtered by channel and fetch time"""
+        if not self.root.is_dir():
+            return
+        if channel_ids is not None:
+            directories = [self.root / _safe_name(channel_id) for channel_id in channel_ids]
+        else:
+            directories = sorted(path for path in self.root.iterdir() if path.is_dir())
+
+        for directory in directories:
+            if not directory.is_dir():
+                continue
+            for path in sorted(directory.iterdir()):
+                match = FILENAME_RE.fullmatch(path.name)
+                if match is None:
+                    continue
+                fetched_at = datetime.strptime(match.group(1), TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+                if since is not None and fetched_at < since:
+                    continue
+                if until is not None and fetched_at > until:
+                    continue
+                yield ArchivedPage(directory.name, fetched_at, match.group(2), path, path.stat().st_size)
+
+    def latest(self, channel_id: str) -> Optional[ArchivedPage]:
+        pages = list(self.entries([channel_id]))
+        return pages[-1] if pages else None
+
+    def prune(self) -> int:
+        """Drop pages past retention, then the oldest ones until the archive fits max_bytes"""
+        self._last_pruned = time.monotonic()
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+        removed = 0
+        kept: List[ArchivedPage] = []
+        for page in self.entries():
+            if page.fetched_at < cutoff:
+                removed += self._remove(page)
+            else:
+                kept.append(page)
+
+        total = sum(page.size for page in kept)
+        for page in sorted(kept, key=lambda page: page.fetched_at):
+            if total <= self.max_bytes:
+                break
+            total -= page.size
+            removed += self._remove(page)
+
+        self.pruned += removed
+        if removed:
+            logging.info(f"Pruned {removed} archived schedule pages")
+        return removed
+
+    def _remove(self, page: ArchivedPage) -> int:
+        try:
+            page.path.unlink()
+            return 1
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            logging.error(f"Error pruning archived page {page.path}: {str(e)}")
+            return 0
+
+    def stats(self) -> Dict[str, Any]:
+        pages = list(self.entries())
+        return {
+            "root": str(self.root),
+            "pages": len(pages),
+            "bytes": sum(page.size for page in pages),
+            "channels": len({page.channel_id for page in pages}),
+            "oldest": min((page.fetched_at for page in pages), default=None),
+            "newest": max((page.fetched_at for page in pages), default=None),
+            "retention_days": self.retention_days,
+            "max_bytes": self.max_bytes,
+            "stored": self.stored,
+            "duplicates": self.duplicates,
+            "pruned": self.pruned,
+            "errors": self.errors,
+        }
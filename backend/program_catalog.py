@@ -0,0 +1,65 @@
+import sys
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class ProgramCatalog:
+    """Bounded LRU of program_id -> program fields, shared by every channel and day in the process.
+
+    Program ids are fingerprints of their fields, so an entry never goes stale
+    and never needs invalidating. The catalog also remembers how long each
+    program is already kept in the store, so unchanged programs are not
+    written again on every refresh.
+    """
+
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+        self._programs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._stored_until: Dict[str, datetime] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, program_id: str) -> Optional[Dict[str, Any]]:
+        program = self._programs.get(program_id)
+        if program is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._programs.move_to_end(program_id)
+        return program
+
+    def put(self, program_id: str, program: Dict[str, Any]):
+        if program_id in self._programs:
+            self._programs.move_to_end(program_id)
+            return
+        self._programs[program_id] = {
+            name: sys.intern(value) if isinstance(value, str) else value for name, value in program.items()
+        }
+        while len(self._programs) > self.max_entries:
+            evicted, _ = self._programs.popitem(last=False)
+            self._stored_until.pop(evicted, None)
+            self.evictions += 1
+
+    def missing(self, program_ids: Iterable[str]) -> List[str]:
+        """The ids among program_ids that are not in memory"""
+        return [program_id for program_id in dict.fromkeys(program_ids) if program_id not in self._programs]
+
+    def needs_store(self, program_id: str, expires_at: datetime) -> bool:
+        """Whether the store might not keep this program until expires_at"""
+        stored_until = self._stored_until.get(program_id)
+        return stored_until is None or stored_until < expires_at
+
+    def mark_stored(self, program_id: str, expires_at: datetime):
+        if program_id in self._programs:
+            self._stored_until[program_id] = max(expires_at, self._stored_until.get(program_id, expires_at))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "programs": len(self._programs),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
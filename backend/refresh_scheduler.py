@@ -0,0 +1,402 @@
+import asyncio
+import itertools
+import logging
+import random
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+# (channel_id, date)
+RefreshKey = Tuple[str, str]
+
+# (day rank, on-screen rank, grid position); lower runs first
+Priority = Tuple[int, int, int]
+
+# Priority used for refreshes somebody is waiting on: ahead of every scheduled refresh
+URGENT_PRIORITY = (-1, -1, -1)
+
+
+class RefreshJob:
+    """A batch of (channel, date) refreshes whose progress can be polled"""
+
+    def __init__(self, keys: List[RefreshKey], reason: str):
+        self.id = str(uuid.uuid4())
+        self.keys = keys
+        self.reason = reason
+        self.total = len(keys)
+        self.succeeded = 0
+        self.failed = 0
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+
+    @property
+    def status(self) -> str:
+        if self.finished_at is not None:
+            return "completed"
+        if self.succeeded or self.failed:
+            return "running"
+        return "queued"
+
+    def record(self, success: bool):
+        if success:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        if self.succeeded + self.failed >= self.total:
+            self.finished_at = datetime.utcnow()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "reason": self.reason,
+            "total": self.total,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class RefreshPolicy:
+    """Per-channel refresh intervals that follow how often each channel's listings change.
+
+    Every fetch that reaches upstream updates an exponentially weighted change
+    rate for its channel, and the channel's interval slides between
+    max_interval (listings never change) and min_interval (they change on
+    every fetch). A channel entry can pin "refresh_interval", or narrow the
+    bounds with "min_refresh_interval" / "max_refresh_interval".
+    """
+
+    def __init__(self, channels: List[Dict[str, Any]], min_interval: float, max_interval: float,
+                 smoothing: float = 0.2, initial_rate: float = 0.5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.smoothing = smoothing
+        self.initial_rate = initial_rate
+        self._channels = {channel['id']: channel for channel in channels}
+        self._rates: Dict[str, float] = {}
+        self._fetches: Dict[str, int] = {}
+        self._changes: Dict[str, int] = {}
+
+    def bounds(self, channel_id: str) -> Tuple[float, float]:
+        channel = self._channels.get(channel_id, {})
+        if 'refresh_interval' in channel:
+            return float(channel['refresh_interval']), float(channel['refresh_interval'])
+        low = float(channel.get('min_refresh_interval', self.min_interval))
+        high = float(channel.get('max_refresh_interval', self.max_interval))
+        return low, max(low, high)
+
+    def change_rate(self, channel_id: str) -> float:
+        return self._rates.get(channel_id, self.initial_rate)
+
+    def interval(self, channel_id: str) -> float:
+        low, high = self.bounds(channel_id)
+        rate = self.change_rate(channel_id)
+        return high - (high - low) * rate
+
+    def record(self, channel_id: str, changed: bool):
+        """Count one upstream fetch of a channel and whether its listings changed"""
+        rate = self.change_rate(channel_id)
+        self._rates[channel_id] = rate + self.smoothing * ((1.0 if changed else 0.0) - rate)
+        self._fetches[channel_id] = self._fetches.get(channel_id, 0) + 1
+        if changed:
+            self._changes[channel_id] = self._changes.get(channel_id, 0) + 1
+
+    def export(self) -> Dict[str, Dict[str, float]]:
+        return {
+            channel_id: {"rate": rate, "fetches": self._fetches.get(channel_id, 0), "changes": self._changes.get(channel_id, 0)}
+            for channel_id, rate in self._rates.items()
+        }
+
+    def restore(self, state: Dict[str, Dict[str, float]]):
+        for channel_id, entry in state.items():
+            if channel_id in self._channels and channel_id not in self._rates:
+                self._rates[channel_id] = float(entry['rate'])
+                self._fetches[channel_id] = int(entry.get('fetches', 0))
+                self._changes[channel_id] = int(entry.get('changes', 0))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            channel_id: {
+                "interval_seconds": round(self.interval(channel_id)),
+                "change_rate": round(self.change_rate(channel_id), 3),
+                "fetches": self._fetches.get(channel_id, 0),
+                "changes": self._changes.get(channel_id, 0),
+            }
+            for channel_id in self._channels
+        }
+
+
+class RefreshScheduler:
+    """Background pre-scraper for every channel, today and the next few days.
+
+    Every `tick` the channels that are due under the refresh policy are
+    enqueued for every date, with a random delay so upstream fetches are
+    staggered instead of fired at once. A fixed pool of workers
+    drains a priority queue: anything a request is waiting on first, then
+    the dates under the hours on screen (today, and tomorrow once those hours
+    run past midnight) before later days, channels whose on-screen hours have
+    no listings before those that have them, and channels higher in the grid
+    first.
+
+    Requests can expedite a refresh, but not one of a channel-day attempted
+    within `retry_after` seconds (default: the channel's shortest policy
+    interval), whatever its outcome, so a date the page does not list or an
+    unreachable upstream is not fetched again for every request.
+
+    `viewport(channel_id, date)` reports whether a channel's listings cover
+    the hours on screen on that date, or None when none of them fall on it.
+    Without it, today stands in for the hours on screen.
+
+    With several workers, `leader` elects the one that schedules cycles; the
+    others only run the refreshes their own requests ask for.
+    """
+
+    def __init__(self, refresh: Callable[[Dict[str, str], str], Awaitable[bool]],
+                 channels: List[Dict[str, str]], today: Callable[[], str],
+                 days_ahead: int = 2, interval: float = 900, jitter: float = 60,
+                 concurrency: int = 4, max_jobs: int = 100,
+                 leader: Optional[Callable[[], Awaitable[bool]]] = None,
+                 policy: Optional[RefreshPolicy] = None, tick: Optional[float] = None,
+                 viewport: Optional[Callable[[str, str], Optional[bool]]] = None,
+                 retry_after: Optional[float] = None):
+        self.refresh = refresh
+        self.channels = channels
+        self.today = today
+        self.days_ahead = days_ahead
+        self.interval = interval
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self.max_jobs = max_jobs
+        self.leader = leader
+        self.viewport = viewport
+        self.retry_after = retry_after
+        # Without a policy every channel refreshes every `interval`, as one fixed cycle
+        self.policy = policy or RefreshPolicy(channels, interval, interval)
+        # Check often enough to honour the shortest interval any channel can reach
+        self.tick = tick if tick is not None else min(
+            [interval] + [self.policy.bounds(channel['id'])[0] for channel in channels]
+        )
+        self._next_due: Dict[str, float] = {}
+
+        self._queue: "asyncio.PriorityQueue[Tuple[Priority, int, RefreshKey]]" = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._queued: Dict[RefreshKey, Priority] = {}
+        self._running: Set[RefreshKey] = set()
+        self._attempted: Dict[RefreshKey, float] = {}
+        self._waiters: Dict[RefreshKey, List[asyncio.Future]] = {}
+        self._job_keys: Dict[RefreshKey, List[RefreshJob]] = {}
+        self._jobs: "OrderedDict[str, RefreshJob]" = OrderedDict()
+        self._tasks: List[asyncio.Task] = []
+        self._channels_by_id = {channel['id']: channel for channel in channels}
+
+        self.cycles = 0
+        self.refreshed = 0
+        self.failed = 0
+        self.last_cycle_at: Optional[datetime] = None
+        self.is_leader = leader is None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._cycle_loop()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def dates(self) -> List[str]:
+        """Today and the following days_ahead dates, in ET"""
+        start = datetime.strptime(self.today(), '%Y-%m-%d')
+        return [(start + timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(self.days_ahead + 1)]
+
+    def priority(self, channel_id: str, day_offset: int, date: str, position: int) -> Priority:
+        """Where a scheduled refresh of one channel-day sits in the queue"""
+        if self.viewport is None:
+            return (day_offset, 0, position)
+        covered = self.viewport(channel_id, date)
+        if covered is None:
+            # Off screen: after every date under the viewport, in date order
+            return (1 + day_offset, 0, position)
+        return (0, 1 if covered else 0, position)
+
+    def enqueue(self, key: RefreshKey, priority: Priority, delay: float = 0):
+        """Queue a refresh, keeping the better priority if the key is already queued"""
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self.enqueue, key, priority)
+            return
+
+        queued_priority = self._queued.get(key)
+        if queued_priority is not None and queued_priority <= priority:
+            return
+        self._queued[key] = priority
+        self._queue.put_nowait((priority, next(self._sequence), key))
+
+    def submit(self, channel_ids: Optional[List[str]] = None, dates: Optional[List[str]] = None,
+               reason: str = "manual") -> RefreshJob:
+        """Queue an urgent refresh for the given channels and dates and return a trackable job"""
+        channel_ids = channel_ids or [channel['id'] for channel in self.channels]
+        dates = dates or self.dates()
+        job = RefreshJob([(channel_id, date) for date in dates for channel_id in channel_ids], reason)
+
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+
+        for key in job.keys:
+            self._job_keys.setdefault(key, []).append(job)
+            self.enqueue(key, URGENT_PRIORITY)
+        return job
+
+    def job(self, job_id: str) -> Optional[RefreshJob]:
+        return self._jobs.get(job_id)
+
+    def recently_attempted(self, key: RefreshKey) -> bool:
+        attempted = self._attempted.get(key)
+        if attempted is None:
+            return False
+        retry_after = self.retry_after if self.retry_after is not None else self.policy.bounds(key[0])[0]
+        return time.monotonic() - attempted < retry_after
+
+    def expedite(self, channel_id: str, date: str) -> bool:
+        """Move one key to the front of the queue unless it is being refreshed or was just attempted"""
+        key = (channel_id, date)
+        if key in self._running or self.recently_attempted(key):
+            return False
+        self.enqueue(key, URGENT_PRIORITY)
+        return True
+
+    async def wait_for(self, channel_id: str, date: str, timeout: float) -> bool:
+        """Ask for an urgent refresh of one key and wait up to timeout for it to finish.
+        
+        False straight away when the key was just attempted and nothing is pending for it.
+        """
+        key = (channel_id, date)
+        if key not in self._running and key not in self._queued and self.recently_attempted(key):
+            return False
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, []).append(future)
+        self.expedite(channel_id, date)
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            waiters = self._waiters.get(key)
+            if waiters and future in waiters:
+                waiters.remove(future)
+                if not waiters:
+                    del self._waiters[key]
+
+    async def _cycle_loop(self):
+        while True:
+            try:
+                if self.leader is not None:
+                    self.is_leader = await self.leader()
+                if self.is_leader:
+                    self.schedule_due()
+            except Exception as e:
+                logging.error(f"Error scheduling refresh cycle: {str(e)}")
+            await asyncio.sleep(self.tick)
+
+    def schedule_due(self) -> int:
+        """Enqueue the channels whose policy interval has elapsed; returns how many were due"""
+        now = time.monotonic()
+        due = {channel['id'] for channel in self.channels if self._next_due.get(channel['id'], 0) <= now}
+        if due:
+            self.schedule_cycle(due)
+        return len(due)
+
+    def schedule_cycle(self, channel_ids: Optional[Set[str]] = None):
+        """Enqueue the given channels (default: all) for every covered date, staggered over the jitter window"""
+        self.cycles += 1
+        self.last_cycle_at = datetime.utcnow()
+        now = time.monotonic()
+        dates = self.dates()
+        for key in [key for key in self._attempted if key[1] not in dates]:
+            del self._attempted[key]
+        for day_offset, date in enumerate(dates):
+            for position, channel in enumerate(self.channels):
+                if channel_ids is not None and channel['id'] not in channel_ids:
+                    continue
+                self.enqueue(
+                    (channel['id'], date),
+                    self.priority(channel['id'], day_offset, date, position),
+                    delay=random.uniform(0, self.jitter)
+                )
+        for channel in self.channels:
+            if channel_ids is None or channel['id'] in channel_ids:
+                self._next_due[channel['id']] = now + self.policy.interval(channel['id'])
+
+    def record_fetch(self, channel_id: str, changed: bool):
+        """Feed one upstream fetch into the policy and push the channel's next refresh out accordingly"""
+        self.policy.record(channel_id, changed)
+        self._next_due[channel_id] = time.monotonic() + self.policy.interval(channel_id)
+
+    async def _worker(self):
+        while True:
+            priority, _, key = await self._queue.get()
+            try:
+                # Skip entries superseded by a higher-priority copy of the same key
+                if self._queued.get(key) != priority:
+                    continue
+                del self._queued[key]
+                await self._run(key)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, key: RefreshKey):
+        channel_id, date = key
+        channel = self._channels_by_id.get(channel_id)
+        self._running.add(key)
+        self._attempted[key] = time.monotonic()
+
+        success = False
+        started = time.monotonic()
+        try:
+            if channel is not None:
+                success = await self.refresh(channel, date)
+        except Exception as e:
+            logging.error(f"Error refreshing {channel_id} for {date}: {str(e)}")
+        finally:
+            self._running.discard(key)
+
+        if success:
+            self.refreshed += 1
+        else:
+            self.failed += 1
+        logging.debug(f"Refreshed {channel_id} for {date} in {time.monotonic() - started:.2f}s")
+
+        for waiter in self._waiters.pop(key, []):
+            if not waiter.done():
+                waiter.set_result(success)
+        for job in self._job_keys.pop(key, []):
+            job.record(success)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "leader": self.is_leader,
+            "days_ahead": self.days_ahead,
+            "interval_seconds": self.interval,
+            "tick_seconds": self.tick,
+            "jitter_seconds": self.jitter,
+            "concurrency": self.concurrency,
+            "queued": len(self._queued),
+            "in_progress": len(self._running),
+            "cycles": self.cycles,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "last_cycle_at": self.last_cycle_at.isoformat() if self.last_cycle_at else None,
+        }
@@ -0,0 +1,141 @@
+"""Rebuild the schedule store by re-parsing archived pages with the current parser.
+
+    python backend/replay_archive.py                                  # whole archive, every channel
+    python backend/replay_archive.py --channels hbo,tnt --since 2026-10-10 --workers 8
+    python backend/replay_archive.py --latest --dry-run               # parse and report, write nothing
+
+Pages are parsed in parallel worker processes. For every channel and date the
+page fetched most recently wins, exactly as if it had just been scraped, and
+is published through the same path as a refresh (change feed, store, refresh
+times). Nothing is fetched from upstream.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import pytz
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import server  # noqa: E402
+from page_archive import ArchivedPage, PageArchive, parse_archived_page  # noqa: E402
+from show_records import ShowRecord  # noqa: E402
+
+ET = pytz.timezone('America/New_York')
+
+
+def parse_pages(pages: List[ArchivedPage], workers: int, backend: str) -> List[Tuple[List[Dict[str, Any]], int]]:
+    paths = [str(page.path) for page in pages]
+    if workers <= 1:
+        return [parse_archived_page(path, backend) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(parse_archived_page, paths, [backend] * len(paths), chunksize=4))
+
+
+def harvest_latest(pages: List[ArchivedPage], parsed) -> Dict[Tuple[str, str], Tuple[datetime, List[ShowRecord]]]:
+    """(channel_id, date) -> (fetched_at, shows) from the newest page listing that date"""
+    latest: Dict[Tuple[str, str], Tuple[datetime, List[ShowRecord]]] = {}
+    for page, (show_fields, _) in sorted(zip(pages, parsed), key=lambda item: item[0].fetched_at):
+        # Day headings are read relative to the day the page was fetched, not today
+        fetched_day = page.fetched_at.astimezone(ET).strftime('%Y-%m-%d')
+        harvest = server.harvest_shows(show_fields, page.channel_id, fetched_day, page.fetched_at)
+        for date, shows in harvest.items():
+            latest[(page.channel_id, date)] = (page.fetched_at, shows)
+    return latest
+
+
+async def publish(latest, concurrency: int) -> int:
+    await server.ensure_indexes()
+    semaphore = asyncio.Semaphore(concurrency)
+    now = datetime.now(timezone.utc)
+    published = 0
+
+    async def publish_one(channel_id: str, date: str, fetched_at: datetime, shows: List[ShowRecord]):
+        nonlocal published
+        async with semaphore:
+            await server.publish_channel_shows(channel_id, date, shows, fetched_at.timestamp())
+            published += 1
+
+    await asyncio.gather(*(
+        publish_one(channel_id, date, fetched_at, shows)
+        for (channel_id, date), (fetched_at, shows) in latest.items()
+        # Days already past retention would only be dropped again by the TTL index
+        if server.show_expiry(date) > now
+    ))
+    return published
+
+
+def parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+async def run(args) -> Dict[str, Any]:
+    archive = PageArchive(Path(args.archive))
+    channel_ids = [c.strip() for c in args.channels.split(',') if c.strip()] if args.channels else None
+    known = {channel['id'] for channel in server.CHANNELS}
+
+    pages = [
+        page for page in archive.entries(
+            channel_ids,
+            parse_time(args.since) if args.since else None,
+            parse_time(args.until) if args.until else None
+        )
+        if page.channel_id in known
+    ]
+    if args.latest:
+        newest: Dict[str, ArchivedPage] = {}
+        for page in pages:
+            newest[page.channel_id] = page
+        pages = list(newest.values())
+
+    started = time.perf_counter()
+    parsed = parse_pages(pages, args.workers, server.PARSER_BACKEND)
+    parse_seconds = time.perf_counter() - started
+    latest = harvest_latest(pages, parsed)
+
+    published = 0
+    if not args.dry_run and latest:
+        published = await publish(latest, args.concurrency)
+
+    return {
+        "pages": len(pages),
+        "page_bytes": sum(page.size for page in pages),
+        "parse_errors": sum(errors for _, errors in parsed),
+        "channel_days": len(latest),
+        "shows": sum(len(shows) for _, shows in latest.values()),
+        "published": published,
+        "workers": args.workers,
+        "parse_seconds": round(parse_seconds, 3),
+        "pages_per_second": round(len(pages) / parse_seconds, 1) if parse_seconds else None,
+        "total_seconds": round(time.perf_counter() - started, 3),
+        "dry_run": args.dry_run,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-parse archived schedule pages into the store")
+    parser.add_argument('--archive', default=server.PAGE_ARCHIVE_DIR or str(server.ROOT_DIR / 'page_archive'))
+    parser.add_argument('--channels', help="comma-separated channel ids (default: all)")
+    parser.add_argument('--since', help="only pages fetched at or after this ISO time (UTC if no offset)")
+    parser.add_argument('--until', help="only pages fetched at or before this ISO time")
+    parser.add_argument('--latest', action='store_true', help="only each channel's newest page")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="parser processes")
+    parser.add_argument('--concurrency', type=int, default=8, help="concurrent channel-day writes")
+    parser.add_argument('--dry-run', action='store_true', help="parse and report without writing to the store")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+import gzip
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it responses fall back to gzip
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Bodies smaller than this are sent uncompressed; the headers would cost more than they save
+MIN_COMPRESS_BYTES = 512
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong entity tag over the given version parts"""
+    digest = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\x00')
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check; uses the weak comparison RFC 7232 prescribes for this header"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(','))
+    return any(tag[2:] == etag if tag.startswith('W/') else tag == etag for tag in candidates)
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """Content codings from an Accept-Encoding header mapped to their q-values"""
+    accepted: Dict[str, float] = {}
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> str:
+    """The best coding the client accepts: br, then gzip, else identity"""
+    accepted = accepted_encodings(accept_encoding)
+    wildcard = accepted.get('*', 0.0)
+    for coding in ('br', 'gzip'):
+        if coding == 'br' and brotli is None:
+            continue
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return 'identity'
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        # mtime=0 keeps the bytes identical for identical input
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+
+class EncodedBody:
+    """A response body and its compressed variants, each produced at most once"""
+    __slots__ = ('body', '_encoded')
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self._encoded: Dict[str, bytes] = {'identity': body}
+
+    def encoded(self, encoding: str) -> Tuple[bytes, bool]:
+        """(bytes for the coding, whether they were compressed just now)"""
+        if len(self.body) < MIN_COMPRESS_BYTES:
+            encoding = 'identity'
+        cached = self._encoded.get(encoding)
+        if cached is not None:
+            return cached, False
+        data = self._encoded[encoding] = compress(self.body, encoding)
+        return data, True
+
+
+class ResponseCache:
+    """LRU of rendered response bodies keyed by ETag.
+
+    An ETag names one version of one view, so a cached body never needs
+    invalidating: when the underlying schedule changes the ETag changes too and
+    the old entry simply ages out.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, EncodedBody]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.compressions = 0
+        self.bytes_sent = 0
+        self.bytes_uncompressed = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_render(self, etag: str, render: Callable[[], bytes]) -> EncodedBody:
+        entry = self._entries.get(etag)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(etag)
+            return entry
+
+        self.misses += 1
+        entry = self._entries[etag] = EncodedBody(render())
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def encode(self, entry: EncodedBody, encoding: str) -> Tuple[bytes, str]:
+        """Body bytes for the negotiated coding and the coding actually applied"""
+        data, compressed_now = entry.encoded(encoding)
+        if compressed_now:
+            self.compressions += 1
+        applied = encoding if data is not entry.body else 'identity'
+        self.bytes_sent += len(data)
+        self.bytes_uncompressed += len(entry.body)
+        return data, applied
+
+    def clear(self):
+        self._entries.clear()
+
+    def record_not_modified(self):
+        self.not_modified += 1
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.hits + self.misses + self.not_modified
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "brotli": brotli is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "not_modified_rate": round(self.not_modified / requests, 4) if requests else 0.0,
+            "compressions": self.compressions,
+            "bytes_sent": self.bytes_sent,
+            "bytes_uncompressed": self.bytes_uncompressed,
+        }
+
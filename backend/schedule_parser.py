@@ -0,0 +1,233 @@
+import logging
+import re
+from datetime import date as Date, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+import lxml.html
+
+# Raw text pulled from one a.show-upcoming container, keyed by the tag it came from
+ContainerText = Dict[str, Optional[str]]
+
+CONTAINER_TAGS = ('time', 'h3', 'h4', 'h5', 'h6', 'p')
+
+SHOW_CONTAINER_XPATH = "//a[contains(concat(' ', normalize-space(@class), ' '), ' show-upcoming ')]"
+
+SEASON_EPISODE_RE = re.compile(r'Season (\d+).*Episode (\d+)')
+
+# Headings that group a page's listings by day, outside the show containers themselves
+DAY_HEADING_TAGS = ('h2', 'h3')
+
+DAY_HEADING_XPATH = ' | '.join(
+    f"//{tag}[not(ancestor::a[contains(concat(' ', normalize-space(@class), ' '), ' show-upcoming ')])]"
+    for tag in DAY_HEADING_TAGS
+)
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+MONTHS = ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec')
+
+# "Friday, October 17", "Today", "Tomorrow, Oct. 18th", "Sat Oct 18, 2026"
+DAY_HEADING_RE = re.compile(
+    r'(?:(today|tonight|tomorrow)\W*)?'
+    r'(?:(mon(?:day)?|tue(?:s|sday)?|wed(?:nesday)?|thu(?:rs?|rsday)?|fri(?:day)?|sat(?:urday)?|sun(?:day)?)\.?\W*)?'
+    r'(?:(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sept?(?:ember)?|oct(?:ober)?'
+    r'|nov(?:ember)?|dec(?:ember)?)\.?\s+(\d{1,2})(?:st|nd|rd|th)?)?'
+    r'(?:,?\s*(\d{4}))?',
+    re.IGNORECASE
+)
+
+
+def build_show_fields(texts: ContainerText) -> Optional[Dict[str, Optional[str]]]:
+    """Turn the text of one show container into Show fields, or None if it is not a listing"""
+    start_time = texts.get('time')
+    if start_time is None:
+        return None
+
+    title_text = texts.get('h3')
+    if title_text is None:
+        return None
+
+    # Remove "New" indicator if present
+    title = title_text.replace(' New', '') if ' New' in title_text else title_text
+
+    # Extract show type and year
+    show_type = "Unknown"
+    year = None
+    type_text = texts.get('h4')
+    if type_text is not None and '•' in type_text:
+        parts = type_text.split('•')
+        show_type = parts[0].strip()
+        if len(parts) > 1:
+            year = parts[1].strip()
+
+    # Parse "Season X • Episode Y"
+    season = None
+    episode = None
+    se_text = texts.get('h6')
+    if se_text is not None and 'Season' in se_text and 'Episode' in se_text:
+        match = SEASON_EPISODE_RE.search(se_text)
+        if match:
+            season = f"Season {match.group(1)}"
+            episode = f"Episode {match.group(2)}"
+
+    return {
+        "title": title,
+        "show_type": show_type,
+        "year": year,
+        "season": season,
+        "episode": episode,
+        "episode_title": texts.get('h5'),
+        "description": texts.get('p'),
+        "start_time": start_time,
+    }
+
+
+def is_day_heading(text: str) -> bool:
+    match = DAY_HEADING_RE.fullmatch(text.strip())
+    return match is not None and any(match.group(i) for i in (1, 2, 3))
+
+
+def heading_date(heading: str, today: Date) -> Optional[Date]:
+    """The date a day heading refers to, as seen from `today` (the date the page was fetched, ET).
+
+    Headings without a year take the year that puts them nearest today, so a
+    page fetched on December 31 can list "Thursday, January 1" correctly.
+    """
+    match = DAY_HEADING_RE.fullmatch(heading.strip())
+    if match is None:
+        return None
+    relative, weekday, month, day, year = match.groups()
+
+    if month is not None:
+        month_number = MONTHS.index(month[:3].lower()) + 1
+        years = [int(year)] if year else [today.year - 1, today.year, today.year + 1]
+        candidates = []
+        for candidate_year in years:
+            try:
+                candidates.append(Date(candidate_year, month_number, int(day)))
+            except ValueError:
+                continue
+        return min(candidates, key=lambda candidate: abs(candidate - today)) if candidates else None
+
+    if relative is not None:
+        return today + timedelta(days=1 if relative.lower() == 'tomorrow' else 0)
+
+    if weekday is not None:
+        # A bare weekday is the nearest such day from yesterday on
+        target = [name[:3] for name in WEEKDAYS].index(weekday[:3].lower())
+        start = today - timedelta(days=1)
+        return start + timedelta(days=(target - start.weekday()) % 7)
+    return None
+
+
+def _collect(nodes: Iterable[Tuple[Optional[str], object]],
+             extract: Callable[[object], ContainerText]) -> Tuple[List[Dict[str, Optional[str]]], int]:
+    """Show fields for every container that parses, and how many did not.
+
+    `nodes` pairs each show container with the day heading it is listed under
+    (None when the page has none); the heading text is kept as the `day` field.
+    """
+    shows = []
+    errors = 0
+    for day, container in nodes:
+        try:
+            fields = build_show_fields(extract(container))
+            if fields is not None:
+                if day is not None:
+                    fields['day'] = day
+                shows.append(fields)
+        except Exception as e:
+            logging.error(f"Error parsing show: {str(e)}")
+            errors += 1
+            continue
+    return shows, errors
+
+
+def _bs4_container_text(container) -> ContainerText:
+    texts = {}
+    for tag in CONTAINER_TAGS:
+        elem = container.find(tag)
+        texts[tag] = elem.get_text(strip=True) if elem else None
+    return texts
+
+
+def _bs4_is_container(tag) -> bool:
+    return tag.name == 'a' and 'show-upcoming' in (tag.get('class') or [])
+
+
+def _bs4_containers(content: str):
+    soup = BeautifulSoup(content, 'html.parser')
+    nodes = []
+    day = None
+    # find_all walks the document in order, so each container follows the heading it sits under
+    for tag in soup.find_all(lambda tag: tag.name in DAY_HEADING_TAGS or _bs4_is_container(tag)):
+        if _bs4_is_container(tag):
+            nodes.append((day, tag))
+        elif tag.find_parent(_bs4_is_container) is None:
+            text = tag.get_text(' ', strip=True)
+            if is_day_heading(text):
+                day = text
+    return nodes, _bs4_container_text
+
+
+def parse_schedule_bs4(content: str) -> List[Dict[str, Optional[str]]]:
+    """Reference parser: BeautifulSoup over html.parser, walking every show container"""
+    return _collect(*_bs4_containers(content))[0]
+
+
+def _lxml_text(elem) -> str:
+    # Same result as BeautifulSoup's get_text(strip=True): stripped text nodes joined without a separator
+    return ''.join(text.strip() for text in elem.xpath('.//text()'))
+
+
+def _lxml_container_text(container) -> ContainerText:
+    texts = {}
+    for tag in CONTAINER_TAGS:
+        elem = container.find(f'.//{tag}')
+        texts[tag] = _lxml_text(elem) if elem is not None else None
+    return texts
+
+
+def _lxml_containers(content: str):
+    if not content.strip():
+        return [], _lxml_container_text
+    parser = lxml.html.HTMLParser(encoding='utf-8')
+    root = lxml.html.fromstring(content.encode('utf-8'), parser=parser)
+    nodes = []
+    day = None
+    # An XPath union comes back in document order
+    for elem in root.xpath(f"{SHOW_CONTAINER_XPATH} | {DAY_HEADING_XPATH}"):
+        if elem.tag == 'a':
+            nodes.append((day, elem))
+        else:
+            text = ' '.join(''.join(elem.itertext()).split())
+            if is_day_heading(text):
+                day = text
+    return nodes, _lxml_container_text
+
+
+def parse_schedule_lxml(content: str) -> List[Dict[str, Optional[str]]]:
+    """Fast parser: libxml2 builds the tree in C and XPath hands back only the show containers"""
+    return _collect(*_lxml_containers(content))[0]
+
+
+PARSERS: Dict[str, Callable[[str], List[Dict[str, Optional[str]]]]] = {
+    "bs4": parse_schedule_bs4,
+    "lxml": parse_schedule_lxml,
+}
+
+
+CONTAINER_FINDERS = {
+    "bs4": _bs4_containers,
+    "lxml": _lxml_containers,
+}
+
+
+def parse_schedule(content: str, backend: str = "lxml") -> List[Dict[str, Optional[str]]]:
+    """Parse a schedule page into Show field dicts with the selected parser backend"""
+    return PARSERS[backend](content)
+
+
+def parse_schedule_counted(content: str, backend: str = "lxml") -> Tuple[List[Dict[str, Optional[str]]], int]:
+    """Like parse_schedule, also returning how many show containers failed to parse"""
+    return _collect(*CONTAINER_FINDERS[backend](content))
@@ -0,0 +1,128 @@
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, Set, Tuple
+
+TOKEN_RE = re.compile(r'[0-9a-z]+')
+
+SEARCH_FIELDS = ('title', 'episode_title', 'description', 'show_type', 'year')
+
+# (channel_id, date, position of the show in that day's listing)
+DocId = Tuple[str, str, int]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, accent-folded alphanumeric tokens"""
+    folded = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return TOKEN_RE.findall(folded.lower())
+
+
+class SearchIndex:
+    """Inverted index over show text with token and prefix matching.
+
+    Updates replace one (channel, date) at a time and only touch the postings
+    of that day's shows. A sorted vocabulary makes prefix lookups a bisect.
+    """
+
+    def __init__(self, max_days: int = 16):
+        self.max_days = max_days
+        self._postings: Dict[str, Set[DocId]] = {}
+        self._vocabulary: List[str] = []
+        self._docs: Dict[DocId, Any] = {}
+        self._doc_tokens: Dict[DocId, Set[str]] = {}
+        self._day_docs: Dict[Tuple[str, str], List[DocId]] = {}
+        self._channel_dates: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def update(self, channel_id: str, date: str, shows: List[Any]):
+        """Replace the indexed shows for one channel and date"""
+        self.remove(channel_id, date)
+
+        doc_ids = []
+        for position, show in enumerate(shows):
+            doc_id = (channel_id, date, position)
+            tokens = set()
+            for field in SEARCH_FIELDS:
+                value = getattr(show, field, None)
+                if value:
+                    tokens.update(tokenize(value))
+
+            self._docs[doc_id] = show
+            self._doc_tokens[doc_id] = tokens
+            for token in tokens:
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = set()
+                    insort(self._vocabulary, token)
+                postings.add(doc_id)
+            doc_ids.append(doc_id)
+
+        self._day_docs[(channel_id, date)] = doc_ids
+
+        dates = self._channel_dates.setdefault(channel_id, set())
+        dates.add(date)
+        # Past days stop matching once a channel has max_days newer ones indexed; dropping
+        # them also frees their documents and any tokens no other show uses
+        for stale_date in sorted(dates)[:-self.max_days]:
+            self.remove(channel_id, stale_date)
+
+    def remove(self, channel_id: str, date: str):
+        self._channel_dates.get(channel_id, set()).discard(date)
+        for doc_id in self._day_docs.pop((channel_id, date), []):
+            del self._docs[doc_id]
+            for token in self._doc_tokens.pop(doc_id):
+                postings = self._postings[token]
+                postings.discard(doc_id)
+                if not postings:
+                    del self._postings[token]
+                    del self._vocabulary[bisect_left(self._vocabulary, token)]
+
+    def _matching(self, token: str, prefix: bool) -> Set[DocId]:
+        if not prefix:
+            return self._postings.get(token, set())
+
+        matches: Set[DocId] = set()
+        i = bisect_left(self._vocabulary, token)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(token):
+            matches |= self._postings[self._vocabulary[i]]
+            i += 1
+        return matches
+
+    def search(self, query: str, limit: int = 50, prefix: bool = True, after_epoch: int = None) -> Tuple[int, List[Any]]:
+        """Shows containing every query token (the last one as a prefix), ordered by start time.
+
+        Returns the total match count and the first `limit` matches.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return 0, []
+
+        candidates = [self._matching(token, prefix and i == len(tokens) - 1) for i, token in enumerate(tokens)]
+        candidates.sort(key=len)
+        matches = candidates[0]
+        for other in candidates[1:]:
+            matches = matches & other
+            if not matches:
+                return 0, []
+
+        shows = [self._docs[doc_id] for doc_id in matches]
+        if after_epoch is not None:
+            shows = [show for show in shows if show.start_epoch is not None and show.start_epoch >= after_epoch]
+
+        # Unknown start times sort last
+        ordered = heapq.nsmallest(
+            limit,
+            shows,
+            key=lambda show: (show.start_epoch is None, show.start_epoch or 0, show.channel_id)
+        )
+        return len(shows), ordered
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "documents": len(self._docs),
+            "tokens": len(self._vocabulary),
+            "channel_days": len(self._day_docs),
+        }
@@ -1,4 +1,5 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -6,15 +7,39 @@ import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator, Callable, Tuple, Union
 import uuid
 from datetime import datetime, timedelta, timezone
 import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
+import time
+from contextlib import asynccontextmanager
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 import re
 import json
 import pytz
+from pymongo import UpdateOne, ReplaceOne, DeleteMany, ReturnDocument
+from pymongo.errors import BulkWriteError
+from schedule_cache import ScheduleCache
+from upstream import AdaptiveConcurrency, CircuitOpenError, PageValidators, UpstreamClient, UpstreamError, UpstreamPool
+from schedule_parser import PARSERS, heading_date, parse_schedule_counted
+from refresh_scheduler import RefreshPolicy, RefreshScheduler
+from interval_index import IntervalIndex
+from search_index import SearchIndex
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry
+from change_feed import ChangeSignal, diff_shows
+from coordination import LeaseManager, worker_identity
+from page_archive import PageArchive
+from snapshot import SnapshotError, read_snapshot, write_snapshot
+from epg_export import (
+    XMLTV_FOOTER, XMLTV_HEADER, buffered, gzip_stream, jsonl_airing, jsonl_channel, jsonl_program, jsonl_show,
+    xmltv_channel, xmltv_programme
+)
+from response_cache import ResponseCache, accepted_encodings, choose_encoding, etag_matches, make_etag
+from show_records import (
+    ChannelDay, ShowRecord, channel_schedule_json, dumps, program_fingerprint, schedule_response_json, show_id
+)
+from program_catalog import ProgramCatalog
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -24,6 +49,155 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Scraped shows are kept this many days past their air date before the TTL index drops them
+SHOW_RETENTION_DAYS = int(os.environ.get('SHOW_RETENTION_DAYS', '7'))
+
+# Prometheus metrics served at /api/metrics
+metrics = MetricsRegistry(namespace='tv')
+scrape_stage_seconds = metrics.histogram(
+    'scrape_stage_seconds', 'Time spent per channel in each scrape stage: fetch, parse, build, serialize', ['channel', 'stage']
+)
+upstream_responses = metrics.counter('upstream_responses_total', 'Upstream schedule responses by HTTP status', ['channel', 'status'])
+upstream_errors = metrics.counter('upstream_errors_total', 'Upstream requests that failed without a response', ['channel', 'error'])
+upstream_retries = metrics.counter('upstream_retries_total', 'Upstream requests retried after a transient failure', ['channel'])
+parse_errors = metrics.counter('parse_errors_total', 'Show containers or whole pages that failed to parse', ['channel'])
+empty_results = metrics.counter('empty_results_total', 'Schedule pages that parsed to no shows', ['channel'])
+scrapes_in_flight = metrics.gauge('scrapes_in_flight', 'Channel scrapes currently running')
+semaphore_wait_seconds = metrics.histogram(
+    'semaphore_wait_seconds', 'Time spent waiting for a concurrency slot', ['semaphore']
+)
+semaphore_waiting = metrics.gauge('semaphore_waiting', 'Tasks currently waiting for a concurrency slot', ['semaphore'])
+channels_served = metrics.counter('channels_served_total', 'Channel schedules served, by freshness', ['status'])
+
+# In-process cache of channel schedules keyed by (channel_id, date)
+schedule_cache = ScheduleCache(
+    max_entries=int(os.environ.get('SCHEDULE_CACHE_SIZE', '512')),
+    ttl=float(os.environ.get('SCHEDULE_CACHE_TTL', '300'))
+)
+
+# Rendered schedule responses and their gzip/brotli variants, keyed by ETag
+response_cache = ResponseCache(max_entries=int(os.environ.get('RESPONSE_CACHE_SIZE', '256')))
+
+# Program metadata shared by airings across channels and days, keyed by program_id
+program_catalog = ProgramCatalog(max_entries=int(os.environ.get('PROGRAM_CACHE_SIZE', '50000')))
+
+# Conditional-request validators and listing hashes so unchanged pages skip parsing and writes
+page_validators = PageValidators()
+
+# Per-channel sorted airing intervals for "what's on" lookups
+interval_index = IntervalIndex()
+
+# Full-text index over show titles, episodes and descriptions across channels and days
+search_index = SearchIndex()
+
+# Schedule site scraped for listings; the offline benchmarks point this at a local stub
+TVINSIDER_BASE_URL = os.environ.get('TVINSIDER_BASE_URL', 'https://www.tvinsider.com').rstrip('/')
+
+# Pooled keep-alive session shared by all upstream fetches, opened in the startup hook
+upstream = UpstreamPool(
+    limit=int(os.environ.get('UPSTREAM_LIMIT', '10')),
+    limit_per_host=int(os.environ.get('UPSTREAM_LIMIT_PER_HOST', '5')),
+    dns_ttl=int(os.environ.get('UPSTREAM_DNS_TTL', '300')),
+    keepalive_timeout=float(os.environ.get('UPSTREAM_KEEPALIVE_TIMEOUT', '30')),
+    total_timeout=float(os.environ.get('UPSTREAM_TIMEOUT', '30')),
+    on_connection_wait=semaphore_wait_seconds.labels('upstream_connection').observe
+)
+
+# Retries, rate limiting, adaptive concurrency and per-channel circuit breaking for upstream fetches
+upstream_client = UpstreamClient(
+    attempt_timeout=float(os.environ.get('UPSTREAM_ATTEMPT_TIMEOUT', '10')),
+    max_attempts=int(os.environ.get('UPSTREAM_MAX_ATTEMPTS', '3')),
+    backoff_base=float(os.environ.get('UPSTREAM_BACKOFF_BASE', '0.5')),
+    backoff_max=float(os.environ.get('UPSTREAM_BACKOFF_MAX', '8')),
+    rate=float(os.environ.get('UPSTREAM_RATE', '2')),
+    burst=int(os.environ.get('UPSTREAM_BURST', '5')),
+    concurrency=AdaptiveConcurrency(
+        initial=int(os.environ.get('UPSTREAM_CONCURRENCY', '4')),
+        minimum=int(os.environ.get('UPSTREAM_CONCURRENCY_MIN', '1')),
+        maximum=int(os.environ.get('UPSTREAM_CONCURRENCY_MAX', os.environ.get('UPSTREAM_LIMIT_PER_HOST', '5'))),
+        target_latency=float(os.environ.get('UPSTREAM_TARGET_LATENCY', '2'))
+    ),
+    breaker_failures=int(os.environ.get('UPSTREAM_BREAKER_FAILURES', '5')),
+    breaker_cooldown=float(os.environ.get('UPSTREAM_BREAKER_COOLDOWN', '60')),
+    breaker_max_cooldown=float(os.environ.get('UPSTREAM_BREAKER_MAX_COOLDOWN', '900'))
+)
+
+# HTML parsing runs off the event loop; PARSER_BACKEND is "lxml" (fast) or "bs4" (reference)
+PARSER_BACKEND = os.environ.get('PARSER_BACKEND', 'lxml')
+if PARSER_BACKEND not in PARSERS:
+    raise ValueError(f"Unknown PARSER_BACKEND {PARSER_BACKEND!r}, expected one of {sorted(PARSERS)}")
+PARSE_EXECUTOR = os.environ.get('PARSE_EXECUTOR', 'thread')  # "thread" or "process"
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', str(min(4, os.cpu_count() or 1))))
+parse_executor: Optional[Executor] = None
+
+# Raw pages kept for replay_archive.py (empty PAGE_ARCHIVE_DIR turns archiving off)
+PAGE_ARCHIVE_DIR = os.environ.get('PAGE_ARCHIVE_DIR', str(ROOT_DIR / 'page_archive'))
+PAGE_ARCHIVE_RETENTION_DAYS = float(os.environ.get('PAGE_ARCHIVE_RETENTION_DAYS', '14'))
+PAGE_ARCHIVE_MAX_MB = int(os.environ.get('PAGE_ARCHIVE_MAX_MB', '2048'))
+page_archive = PageArchive(
+    Path(PAGE_ARCHIVE_DIR),
+    retention_days=PAGE_ARCHIVE_RETENTION_DAYS,
+    max_bytes=PAGE_ARCHIVE_MAX_MB * 1024 * 1024
+) if PAGE_ARCHIVE_DIR else None
+
+# How many channels a schedule request (streamed or not) loads at once
+SCHEDULE_STREAM_CONCURRENCY = int(os.environ.get('SCHEDULE_STREAM_CONCURRENCY', '5'))
+
+# Background refresh: the scheduler is the only thing that scrapes upstream
+REFRESH_ENABLED = os.environ.get('REFRESH_ENABLED', 'true').lower() == 'true'
+REFRESH_DAYS_AHEAD = int(os.environ.get('REFRESH_DAYS_AHEAD', '2'))
+REFRESH_INTERVAL = float(os.environ.get('REFRESH_INTERVAL', '900'))
+REFRESH_JITTER = float(os.environ.get('REFRESH_JITTER', '60'))
+REFRESH_CONCURRENCY = int(os.environ.get('REFRESH_CONCURRENCY', '4'))
+# Hours of the grid on screen from now; channels missing listings for them refresh first
+REFRESH_VIEWPORT_HOURS = float(os.environ.get('REFRESH_VIEWPORT_HOURS', '3'))
+# Each channel's interval adapts between these bounds to how often its listings change per fetch;
+# channel entries can override them with min_refresh_interval / max_refresh_interval / refresh_interval
+REFRESH_MIN_INTERVAL = float(os.environ.get('REFRESH_MIN_INTERVAL', str(REFRESH_INTERVAL / 3)))
+REFRESH_MAX_INTERVAL = float(os.environ.get('REFRESH_MAX_INTERVAL', str(REFRESH_INTERVAL * 4)))
+# Latency budget for a schedule request (?deadline_ms= overrides it up to the cap); channels
+# not refreshed within it are served stale or pending while their refresh carries on
+SCHEDULE_DEADLINE_MS = int(os.environ.get('SCHEDULE_DEADLINE_MS', '2000'))
+SCHEDULE_DEADLINE_MAX_MS = int(os.environ.get('SCHEDULE_DEADLINE_MAX_MS', '10000'))
+# A listing not confirmed against upstream for this long is served as stale; unset, it is
+# two of the channel's current refresh intervals
+STALE_AFTER_SECONDS = float(os.environ['STALE_AFTER_SECONDS']) if os.environ.get('STALE_AFTER_SECONDS') else None
+
+# Multi-worker coordination: how long one worker may hold a channel's refresh lease, and how
+# often each worker looks for refreshes its peers made so it can drop its own copies
+REFRESH_LEASE_SECONDS = float(os.environ.get('REFRESH_LEASE_SECONDS', '120'))
+PEER_SYNC_SECONDS = float(os.environ.get('PEER_SYNC_SECONDS', '5'))
+# One scrape fills every date on a channel's page; refreshes of those dates within this window reuse it
+PAGE_REUSE_SECONDS = float(os.environ.get('PAGE_REUSE_SECONDS', str(REFRESH_MIN_INTERVAL / 2)))
+
+# Warm start: where the schedule snapshot lives (empty turns it off) and how often the refresh leader rewrites it
+SNAPSHOT_PATH = os.environ.get('SNAPSHOT_PATH', str(ROOT_DIR / 'schedule_snapshot.bin'))
+SNAPSHOT_INTERVAL = float(os.environ.get('SNAPSHOT_INTERVAL', '300'))
+
+# XMLTV/JSON-lines export: longest ?days= window and how many shows each store round trip fetches
+EXPORT_MAX_DAYS = int(os.environ.get('EXPORT_MAX_DAYS', '14'))
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '500'))
+
+# Change feed: how long per-show deltas are kept, and how often open change streams re-check the store
+CHANGE_RETENTION_HOURS = float(os.environ.get('CHANGE_RETENTION_HOURS', '48'))
+CHANGE_POLL_SECONDS = float(os.environ.get('CHANGE_POLL_SECONDS', '15'))
+CHANGE_GAP_GRACE_SECONDS = float(os.environ.get('CHANGE_GAP_GRACE_SECONDS', '5'))
+change_signal = ChangeSignal()
+
+# Every worker shares the store; leases make sure only one of them scrapes a given channel at a time
+WORKER_ID = worker_identity()
+refresh_leases = LeaseManager(db.refresh_leases, WORKER_ID)
+# Last listing version this worker published or picked up from a peer, per (channel_id, date)
+known_versions: Dict[Tuple[str, str], str] = {}
+peer_sync_task: Optional[asyncio.Task] = None
+background_tasks: List[asyncio.Task] = []
+# Dates the last harvested page of each channel listed, confirmed again when that page comes back unchanged
+harvested_dates: Dict[str, List[str]] = {}
+# One refresh of a channel at a time in this worker; the lease keeps other workers out
+channel_refresh_locks: Dict[str, asyncio.Lock] = {}
+# When each channel's page was last scraped by this worker, changed or not
+channel_scraped_at: Dict[str, float] = {}
+
 # Create the main app without a prefix
 app = FastAPI()
 
@@ -66,7 +240,7 @@ CHANNELS = [
     {"id": "starz_encore_family", "name": "Starz Encore Family", "url_name": "starz-encore-family"},
     {"id": "starz_encore_suspense", "name": "Starz Encore Suspense", "url_name": "starz-encore-suspense"},
     {"id": "starz_encore_westerns", "name": "Starz Encore Westerns", "url_name": "starz-encore-westerns"},
-    {"id": "tnt", "name": "TNT", "url_name": "tnt"},
+    {"id": "tnt", "name": "TNT", "url_name": "tnt", "max_refresh_interval": 900},
     {"id": "syfy", "name": "SYFY", "url_name": "syfy"},
     {"id": "amc", "name": "AMC", "url_name": "amc"},
     {"id": "fx", "name": "FX", "url_name": "fx"},
@@ -75,7 +249,7 @@ CHANNELS = [
     {"id": "bbc_america", "name": "BBC America", "url_name": "bbc-america"},
     {"id": "bounce_tv", "name": "Bounce TV", "url_name": "bounce-tv"},
     {"id": "cartoon", "name": "Cartoon Network", "url_name": "cartoon-network"},
-    {"id": "court_tv", "name": "Court TV", "url_name": "court-tv"},
+    {"id": "court_tv", "name": "Court TV", "url_name": "court-tv", "max_refresh_interval": 900},
     {"id": "freeform", "name": "Freeform", "url_name": "freeform"},
     {"id": "heroes_icons", "name": "Heroes & Icons", "url_name": "heroes-icons"},
     {"id": "ion_mystery", "name": "ION Mystery", "url_name": "ion-mystery"},
@@ -87,8 +261,10 @@ CHANNELS = [
 ]
 
 # Define Models
+# These describe the API; internally shows are ShowRecord objects serialized straight to JSON
 class Show(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    program_id: Optional[str] = None  # fingerprint of the program fields, shared by every airing of the program
     title: str
     show_type: str  # "Series" or "Feature Film" or "Sports"
     year: Optional[str] = None
@@ -97,6 +273,8 @@ class Show(BaseModel):
     episode_title: Optional[str] = None
     description: Optional[str] = None
     start_time: str
+    start_minute: Optional[int] = None  # minutes after midnight of `date`, >= 1440 once the listing rolls past midnight
+    start_epoch: Optional[int] = None  # unix time of the start, resolved in America/New_York
     end_time: Optional[str] = None
     duration: Optional[int] = None  # in minutes
     genre: Optional[str] = None
@@ -104,121 +282,975 @@ class Show(BaseModel):
     date: str  # YYYY-MM-DD format
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class Program(BaseModel):
+    title: str
+    show_type: str
+    year: Optional[str] = None
+    season: Optional[str] = None
+    episode: Optional[str] = None
+    episode_title: Optional[str] = None
+    description: Optional[str] = None
+    genre: Optional[str] = None
+
+class Airing(BaseModel):
+    """A Show without its program fields, which are in the response's `programs` table under program_id"""
+    id: str
+    program_id: str
+    start_time: str
+    start_minute: Optional[int] = None
+    start_epoch: Optional[int] = None
+    end_time: Optional[str] = None
+    duration: Optional[int] = None
+    channel_id: str
+    date: str
+    timestamp: datetime
+
 class ChannelSchedule(BaseModel):
     channel_id: str
     channel_name: str
     date: str
-    shows: List[Show]
+    status: str = "fresh"  # fresh, stale (last known good copy) or pending (nothing stored yet)
+    shows: List[Union[Show, Airing]]  # Airing objects with ?programs=true
+    programs: Optional[Dict[str, Program]] = None
 
 class ScheduleResponse(BaseModel):
     channels: List[ChannelSchedule]
+    programs: Optional[Dict[str, Program]] = None  # with ?programs=true: every program the airings reference
     current_time: str
     timezone: str = "America/New_York"
 
-async def scrape_channel_schedule(session: aiohttp.ClientSession, channel: Dict[str, str], target_date: str = None) -> List[Show]:
-    """Scrape schedule for a specific channel"""
-    if target_date is None:
-        target_date = datetime.now(pytz.timezone('America/New_York')).strftime('%Y-%m-%d')
+def parse_start_minute(start_time: str) -> Optional[int]:
+    """Convert an 'h:mm AM/PM' time string to minutes since midnight"""
+    match = re.search(r'(\d{1,2}):(\d{2})\s*(AM|PM)', start_time, re.IGNORECASE)
+    if not match:
+        return None
+    
+    hours = int(match.group(1)) % 12
+    minutes = int(match.group(2))
+    if match.group(3).upper() == 'PM':
+        hours += 12
+    
+    return hours * 60 + minutes
+
+def normalize_show_times(shows: List[ShowRecord], date: str) -> List[ShowRecord]:
+    """Resolve start times once on the server, derive end_time/duration from the next show
+    and give each show its deterministic id.
+    
+    Shows are listed in air order, so a start time earlier than the previous one
+    means the listing has rolled past midnight.
+    """
+    et_tz = pytz.timezone('America/New_York')
+    midnight = datetime.strptime(date, '%Y-%m-%d')
+    
+    day_offset = 0
+    previous = None
+    for show in shows:
+        minute = parse_start_minute(show.start_time)
+        if minute is None:
+            continue
+        if previous is not None and minute + day_offset < previous:
+            day_offset += 1440
+        show.start_minute = minute + day_offset
+        show.start_epoch = int(et_tz.localize(midnight + timedelta(minutes=show.start_minute)).timestamp())
+        previous = show.start_minute
+    
+    timed = [show for show in shows if show.start_minute is not None]
+    for show, next_show in zip(timed, timed[1:]):
+        show.end_time = next_show.start_time
+        show.duration = next_show.start_minute - show.start_minute
+    
+    for show in shows:
+        start = show.start_minute if show.start_minute is not None else show.start_time
+        show.id = show_id(show.channel_id, date, start)
+    
+    return shows
+
+def harvest_shows(show_fields: List[Dict[str, Optional[str]]], channel_id: str, today: str,
+                  scraped_at: datetime) -> Dict[str, List[ShowRecord]]:
+    """Shard one page's listings into per-date buckets, in date order.
+    
+    Listings are dated by the day heading they sit under. A page without day
+    headings is read as one run starting `today`, moving to the next date
+    whenever a start time goes backwards past midnight. Each bucket is
+    normalized on its own; a day's last show ends where the next day's first
+    one starts.
+    """
+    first_day = datetime.strptime(today, '%Y-%m-%d').date()
+    headed = any(fields.get('day') for fields in show_fields)
+    
+    buckets: Dict[str, List[ShowRecord]] = {}
+    current = first_day
+    heading = None
+    previous_minute = None
+    for fields in show_fields:
+        if headed:
+            if fields.get('day') != heading:
+                heading = fields.get('day')
+                current = (heading_date(heading, first_day) if heading else None) or current
+        else:
+            minute = parse_start_minute(fields['start_time'])
+            if minute is not None:
+                if previous_minute is not None and minute < previous_minute:
+                    current += timedelta(days=1)
+                previous_minute = minute
+        date = current.strftime('%Y-%m-%d')
+        buckets.setdefault(date, []).append(ShowRecord.from_fields(fields, channel_id, date, scraped_at))
+    
+    harvest = {date: normalize_show_times(buckets[date], date) for date in sorted(buckets)}
+    
+    days = list(harvest.values())
+    for shows, next_shows in zip(days, days[1:]):
+        last = next((show for show in reversed(shows) if show.start_epoch is not None), None)
+        first = next((show for show in next_shows if show.start_epoch is not None), None)
+        if last is not None and first is not None and last.duration is None and first.start_epoch > last.start_epoch:
+            last.end_time = first.start_time
+            last.duration = (first.start_epoch - last.start_epoch) // 60
+    return harvest
+
+async def ensure_indexes():
+    """Create the indexes backing the schedule store"""
+    await db.shows.create_index(
+        [("channel_id", 1), ("date", 1), ("start_minute", 1)],
+        unique=True,
+        name="channel_date_start"
+    )
+    await db.shows.create_index("expires_at", expireAfterSeconds=0, name="expires_at_ttl")
+    await db.programs.create_index("expires_at", expireAfterSeconds=0, name="expires_at_ttl")
+    await db.schedule_changes.create_index("seq", unique=True, name="seq")
+    await db.schedule_changes.create_index("expires_at", expireAfterSeconds=0, name="expires_at_ttl")
+    await db.channel_refreshes.create_index("expires_at", expireAfterSeconds=0, name="expires_at_ttl")
+    await db.channel_refreshes.create_index("published_at", name="published_at")
+    await db.refresh_leases.create_index("expires_at", expireAfterSeconds=0, name="expires_at_ttl")
+
+def show_expiry(date: str) -> datetime:
+    """When shows airing on `date` should be dropped from the store"""
+    day = datetime.strptime(date, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    return day + timedelta(days=1 + SHOW_RETENTION_DAYS)
+
+async def save_programs(shows: List[ShowRecord], expires_at: datetime):
+    """Make sure the store keeps the shows' programs at least until expires_at"""
+    operations = []
+    pending = []
+    for program_id, program in {show.program_id: show.program_dict() for show in shows}.items():
+        program_catalog.put(program_id, program)
+        if not program_catalog.needs_store(program_id, expires_at):
+            continue
+        # Ids are content fingerprints: an existing program only ever needs its expiry pushed out
+        operations.append(UpdateOne(
+            {"_id": program_id},
+            {"$setOnInsert": program, "$max": {"expires_at": expires_at}},
+            upsert=True
+        ))
+        pending.append(program_id)
+    if not operations:
+        return
     
-    url = f"https://www.tvinsider.com/network/{channel['url_name']}/schedule/"
+    try:
+        await db.programs.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        # Another worker inserting the same new program at the same moment is harmless
+        if any(error.get('code') != 11000 for error in e.details.get('writeErrors', [])):
+            raise
+    for program_id in pending:
+        program_catalog.mark_stored(program_id, expires_at)
+
+async def save_channel_shows(channel_id: str, date: str, shows: List[ShowRecord]) -> bool:
+    """Store a channel's airings for a date, and their programs, and drop listings that are no longer on the page.
+    
+    Returns whether the write succeeded.
+    """
+    try:
+        expires_at = show_expiry(date)
+        # Programs first, so a reader never finds an airing whose program is missing
+        await save_programs(shows, expires_at)
+        operations = []
+        start_minutes = []
+        
+        for show in shows:
+            if show.start_minute is None:
+                logging.warning(f"Skipping show without a parseable start time on {channel_id}: {show.start_time}")
+                continue
+            key = {"channel_id": channel_id, "date": date, "start_minute": show.start_minute}
+            document = show.airing_dict()
+            document['expires_at'] = expires_at
+            # A replace, so documents stored with full program fields are slimmed too
+            operations.append(ReplaceOne(key, document, upsert=True))
+            start_minutes.append(show.start_minute)
+        
+        operations.append(DeleteMany({
+            "channel_id": channel_id,
+            "date": date,
+            "start_minute": {"$nin": start_minutes}
+        }))
+        
+        await db.shows.bulk_write(operations, ordered=False)
+        return True
+    except Exception as e:
+        logging.error(f"Error saving shows for {channel_id} on {date}: {str(e)}")
+        return False
+
+async def mark_channel_refreshed(channel_id: str, date: str, refreshed_at: float, version: Optional[str] = None):
+    """Record when a channel's listing for a date was last confirmed against upstream, and by which worker.
+    
+    published_at is always now, so peers pick up the record even when
+    refreshed_at lies in the past, as it does for replayed pages.
+    """
+    update = {
+        "channel_id": channel_id,
+        "date": date,
+        "refreshed_at": datetime.fromtimestamp(refreshed_at, timezone.utc),
+        "published_at": datetime.now(timezone.utc),
+        "worker": WORKER_ID,
+        "expires_at": show_expiry(date)
+    }
+    if version is not None:
+        update["version"] = version
+    try:
+        await db.channel_refreshes.update_one({"_id": f"{channel_id}:{date}"}, {"$set": update}, upsert=True)
+    except Exception as e:
+        logging.error(f"Error recording refresh of {channel_id} on {date}: {str(e)}")
+
+async def load_refreshed_at(channel_id: str, date: str, shows: List[ShowRecord]) -> Optional[float]:
+    """When a stored listing was last confirmed, falling back to its newest scrape timestamp"""
+    moment = None
+    try:
+        document = await db.channel_refreshes.find_one({"_id": f"{channel_id}:{date}"})
+        if document is not None:
+            moment = document['refreshed_at']
+    except Exception as e:
+        logging.error(f"Error reading refresh time of {channel_id} on {date}: {str(e)}")
+    
+    if moment is None and shows:
+        moment = max(show.timestamp for show in shows)
+    if moment is None:
+        return None
+    # Mongo hands datetimes back naive, in UTC
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+async def load_programs(program_ids: List[str]):
+    """Read the programs that are not in the catalog yet from the store into it"""
+    missing = program_catalog.missing(program_ids)
+    if not missing:
+        return
+    async for document in db.programs.find({"_id": {"$in": missing}}, {"expires_at": 0}):
+        program_catalog.put(document.pop('_id'), document)
+
+async def with_programs(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fill stored airing documents in with their program fields; airings whose program is gone are dropped"""
+    await load_programs([document['program_id'] for document in documents if 'title' not in document])
+    
+    shows = []
+    for document in documents:
+        if 'title' not in document:
+            program = program_catalog.get(document['program_id'])
+            if program is None:
+                logging.warning(f"Program {document['program_id']} of {document['channel_id']} on {document['date']} is missing")
+                continue
+            document.update(program)
+        elif not document.get('program_id'):
+            # Stored before the program catalog
+            document['program_id'] = program_fingerprint(document)
+        shows.append(document)
+    return shows
+
+async def load_stored_schedule(channel_ids: List[str], date: str) -> Dict[str, List[ShowRecord]]:
+    """Read stored shows for the given channels and date, grouped by channel id"""
+    schedule: Dict[str, List[ShowRecord]] = {}
+    try:
+        cursor = db.shows.find(
+            {"channel_id": {"$in": channel_ids}, "date": date},
+            {"_id": 0, "expires_at": 0}
+        ).sort([("channel_id", 1), ("start_minute", 1)])
+        
+        for document in await with_programs(await cursor.to_list(length=None)):
+            schedule.setdefault(document['channel_id'], []).append(ShowRecord.from_document(document))
+    except Exception as e:
+        logging.error(f"Error reading stored schedule for {date}: {str(e)}")
+    return schedule
+
+async def record_schedule_change(channel_id: str, date: str, previous: List[ShowRecord], shows: List[ShowRecord]) -> Optional[int]:
+    """Append the delta between two listings to the change feed.
+    
+    Versions come from one store-wide counter, so each (channel_id, date)
+    version increases monotonically and a single `since` covers the whole grid.
+    Returns the new version, or None when nothing changed.
+    """
+    added, modified, removed = diff_shows(previous, shows)
+    if not (added or modified or removed):
+        return None
+    
+    try:
+        counter = await db.counters.find_one_and_update(
+            {"_id": "schedule_changes"},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        now = datetime.utcnow()
+        await db.schedule_changes.insert_one({
+            "seq": counter['seq'],
+            "channel_id": channel_id,
+            "date": date,
+            "added": [show.to_dict() for show in added],
+            "modified": [show.to_dict() for show in modified],
+            "removed": removed,
+            "created_at": now,
+            "expires_at": now + timedelta(hours=CHANGE_RETENTION_HOURS)
+        })
+    except Exception as e:
+        logging.error(f"Error recording schedule change for {channel_id} on {date}: {str(e)}")
+        return None
+    
+    change_signal.notify()
+    return counter['seq']
+
+async def current_change_version() -> int:
+    counter = await db.counters.find_one({"_id": "schedule_changes"})
+    return counter['seq'] if counter else 0
+
+async def read_schedule_changes(since: int, date: Optional[str], channel_ids: Optional[List[str]], limit: int) -> Dict[str, Any]:
+    """Changes after `since`, oldest first, with the cursor to pass as the next `since`.
+    
+    Versions are taken before their change is written, so the cursor only
+    advances over versions that are all present; a hole is skipped once the
+    entry after it is older than CHANGE_GAP_GRACE_SECONDS (a write that failed).
+    `reset` means the changes after `since` have expired or `since` is from
+    another store, and the client has to reload the schedule instead.
+    """
+    current = await current_change_version()
+    oldest = await db.schedule_changes.find_one({}, {"seq": 1}, sort=[("seq", 1)])
+    if since > current or (since < current and (oldest is None or oldest['seq'] > since + 1)):
+        return {"version": current, "reset": True, "more": False, "changes": []}
+    
+    settled = since
+    scanned = 0
+    grace_cutoff = datetime.utcnow() - timedelta(seconds=CHANGE_GAP_GRACE_SECONDS)
+    cursor = db.schedule_changes.find({"seq": {"$gt": since}}, {"_id": 0, "seq": 1, "created_at": 1}).sort("seq", 1).limit(limit)
+    async for entry in cursor:
+        if entry['seq'] != settled + 1 and entry['created_at'] > grace_cutoff:
+            break
+        settled = entry['seq']
+        scanned += 1
+    
+    query: Dict[str, Any] = {"seq": {"$gt": since, "$lte": settled}}
+    if date is not None:
+        query["date"] = date
+    if channel_ids is not None:
+        query["channel_id"] = {"$in": channel_ids}
+    
+    changes = []
+    if settled > since:
+        cursor = db.schedule_changes.find(query, {"_id": 0, "created_at": 0, "expires_at": 0}).sort("seq", 1)
+        async for document in cursor:
+            changes.append({"version": document.pop('seq'), **document})
+    
+    return {
+        "version": settled,
+        "reset": False,
+        "more": scanned == limit,
+        "changes": changes
+    }
+
+def create_parse_executor() -> Executor:
+    if PARSE_EXECUTOR == 'process':
+        return ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+    return ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix='schedule-parser')
+
+async def parse_schedule_page(content: str) -> Tuple[List[Dict[str, Optional[str]]], int]:
+    """Parse a schedule page in the parse executor with the configured backend; also returns the parse error count"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(parse_executor, parse_schedule_counted, content, PARSER_BACKEND)
+
+async def archive_page(channel_id: str, content: str):
+    """Keep a fetched page for replay; archiving problems never fail a scrape"""
+    if page_archive is None:
+        return
+    try:
+        with scrape_stage_seconds.labels(channel_id, 'archive').time():
+            await asyncio.get_running_loop().run_in_executor(None, page_archive.store, channel_id, content)
+    except Exception as e:
+        logging.error(f"Error archiving {channel_id} schedule page: {str(e)}")
+
+async def scrape_channel_schedule(
+    session: aiohttp.ClientSession,
+    channel: Dict[str, str],
+    publish: Optional[Callable[[Dict[str, List[ShowRecord]]], Any]] = None
+) -> Optional[Dict[str, List[ShowRecord]]]:
+    """Scrape a channel's schedule page into shows for every date it lists.
+    
+    The page covers several days, so one fetch yields {date: shows} for all
+    of them. Returns None when the page is unchanged since it was last
+    scraped (a 304, or identical listings) so callers can skip publishing,
+    and an empty dict when the scrape failed.
+    
+    The page's validators are only remembered once `publish` (awaited with
+    the harvest) returns true, so a page whose shows could not be stored is
+    downloaded and processed again on the next refresh. Errors raised by
+    `publish` propagate to the caller, which knows what it already published.
+    """
+    url = f"{TVINSIDER_BASE_URL}/network/{channel['url_name']}/schedule/"
+    page_key = url
     
     headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        **page_validators.request_headers(page_key)
     }
     
+    channel_id = channel['id']
+    stage = 'fetch'
+    scrapes_in_flight.inc()
     try:
-        async with session.get(url, headers=headers) as response:
-            if response.status != 200:
-                logging.error(f"Failed to fetch {channel['name']} schedule: {response.status}")
-                return []
-            
-            content = await response.text()
-            soup = BeautifulSoup(content, 'html.parser')
-            
-            shows = []
-            
-            # Find all show containers
-            show_containers = soup.find_all('a', class_='show-upcoming')
-            
-            for container in show_containers:
-                try:
-                    # Extract time
-                    time_elem = container.find('time')
-                    if not time_elem:
-                        continue
-                    start_time = time_elem.get_text(strip=True)
-                    
-                    # Extract title
-                    title_elem = container.find('h3')
-                    if not title_elem:
-                        continue
-                    title_text = title_elem.get_text(strip=True)
-                    
-                    # Remove "New" indicator if present
-                    title = title_text.replace(' New', '') if ' New' in title_text else title_text
-                    
-                    # Extract show type and year
-                    type_elem = container.find('h4')
-                    show_type = "Unknown"
-                    year = None
-                    if type_elem:
-                        type_text = type_elem.get_text(strip=True)
-                        if '•' in type_text:
-                            parts = type_text.split('•')
-                            show_type = parts[0].strip()
-                            if len(parts) > 1:
-                                year = parts[1].strip()
-                    
-                    # Extract episode info
-                    episode_title = None
-                    season = None
-                    episode = None
-                    
-                    episode_title_elem = container.find('h5')
-                    if episode_title_elem:
-                        episode_title = episode_title_elem.get_text(strip=True)
-                    
-                    season_episode_elem = container.find('h6')
-                    if season_episode_elem:
-                        se_text = season_episode_elem.get_text(strip=True)
-                        # Parse "Season X • Episode Y"
-                        if 'Season' in se_text and 'Episode' in se_text:
-                            match = re.search(r'Season (\d+).*Episode (\d+)', se_text)
-                            if match:
-                                season = f"Season {match.group(1)}"
-                                episode = f"Episode {match.group(2)}"
-                    
-                    # Extract description
-                    description = None
-                    desc_elem = container.find('p')
-                    if desc_elem:
-                        description = desc_elem.get_text(strip=True)
-                    
-                    show = Show(
-                        title=title,
-                        show_type=show_type,
-                        year=year,
-                        season=season,
-                        episode=episode,
-                        episode_title=episode_title,
-                        description=description,
-                        start_time=start_time,
-                        channel_id=channel['id'],
-                        date=target_date
-                    )
-                    
-                    shows.append(show)
-                    
-                except Exception as e:
-                    logging.error(f"Error parsing show for {channel['name']}: {str(e)}")
-                    continue
-            
-            logging.info(f"Scraped {len(shows)} shows for {channel['name']}")
-            return shows
+        try:
+            with scrape_stage_seconds.labels(channel_id, 'fetch').time():
+                result = await upstream_client.fetch(session, channel_id, url, headers)
+        except UpstreamError as e:
+            record_upstream_attempts(channel_id, e.attempts)
+            if isinstance(e, CircuitOpenError):
+                upstream_errors.labels(channel_id, 'CircuitOpen').inc()
+                logging.warning(f"Skipping {channel['name']} schedule: {str(e)}")
+            else:
+                logging.error(f"Failed to fetch {channel['name']} schedule: {str(e)}")
+            return {}
+        
+        record_upstream_attempts(channel_id, result.attempts)
+        if result.status == 304:
+            page_validators.record_not_modified(page_key)
+            logging.info(f"{channel['name']} schedule not modified")
+            return None
+        
+        if result.status != 200:
+            logging.error(f"Failed to fetch {channel['name']} schedule: {result.status}")
+            return {}
+        
+        content = result.text
+        response_headers = result.headers
+        await archive_page(channel_id, content)
+        
+        digest = page_validators.digest(content)
+        if page_validators.is_unchanged(page_key, digest):
+            logging.info(f"{channel['name']} schedule unchanged")
+            return None
+        
+        # Parse in the executor so the event loop keeps serving other requests
+        stage = 'parse'
+        with scrape_stage_seconds.labels(channel_id, 'parse').time():
+            show_fields, failed_shows = await parse_schedule_page(content)
+        if failed_shows:
+            parse_errors.labels(channel_id).inc(failed_shows)
+        
+        stage = 'build'
+        with scrape_stage_seconds.labels(channel_id, 'build').time():
+            harvest = harvest_shows(show_fields, channel_id, today_et(), datetime.now(timezone.utc))
+        
+        if harvest:
+            stage = 'publish'
+            if publish is None or await publish(harvest):
+                page_validators.remember(page_key, response_headers, digest, len(content))
+        else:
+            empty_results.labels(channel_id).inc()
+        logging.info(
+            f"Scraped {sum(len(shows) for shows in harvest.values())} shows over {len(harvest)} days for {channel['name']}"
+        )
+        return harvest
             
     except Exception as e:
+        if stage == 'publish':
+            raise
+        if stage == 'fetch':
+            upstream_errors.labels(channel_id, type(e).__name__).inc()
+        else:
+            parse_errors.labels(channel_id).inc()
         logging.error(f"Error scraping {channel['name']}: {str(e)}")
-        return []
+        return {}
+    finally:
+        scrapes_in_flight.dec()
+
+def record_upstream_attempts(channel_id: str, attempts: List[Any]):
+    for attempt in attempts:
+        if attempt.status is not None:
+            upstream_responses.labels(channel_id, str(attempt.status)).inc()
+        else:
+            upstream_errors.labels(channel_id, attempt.error).inc()
+    if len(attempts) > 1:
+        upstream_retries.labels(channel_id).inc(len(attempts) - 1)
+
+def build_channel_day(channel_id: str, date: str, shows: List[ShowRecord],
+                      refreshed_at: Optional[float] = None) -> ChannelDay:
+    """Wrap shows for the cache, serializing the airings and computing its version up front.
+    
+    The full shows array is built on the first request that asks for it, so
+    days only ever served with a programs table never hold both.
+    """
+    day = ChannelDay(channel_id, date, shows, refreshed_at)
+    with scrape_stage_seconds.labels(channel_id, 'serialize').time():
+        day.airings_json()
+        day.version
+    return day
+
+async def publish_channel_shows(channel_id: str, date: str, shows: List[ShowRecord],
+                                refreshed_at: Optional[float] = None) -> Optional[bool]:
+    """Make freshly scraped shows visible: store, change feed, cache and lookup indexes.
+    
+    refreshed_at defaults to now; replays pass the time their page was fetched.
+    Returns whether the listing differed from the stored one, or None when it
+    could not be stored; this worker still serves it, but the refresh is not
+    recorded, so the next one writes it again.
+    """
+    # Diff against the store rather than this worker's cache, which may be stale or evicted
+    previous = await load_stored_schedule([channel_id], date)
+    stored = await save_channel_shows(channel_id, date, shows)
+    # Only feed changes the store holds; a failed write is diffed and recorded again on retry
+    version = await record_schedule_change(channel_id, date, previous.get(channel_id, []), shows) if stored else None
+    refreshed_at = refreshed_at if refreshed_at is not None else time.time()
+    day = build_channel_day(channel_id, date, shows, refreshed_at)
+    known_versions[(channel_id, date)] = day.version
+    if stored:
+        await mark_channel_refreshed(channel_id, date, refreshed_at, day.version)
+    schedule_cache.put((channel_id, date), day)
+    interval_index.update(channel_id, date, shows)
+    search_index.update(channel_id, date, shows)
+    return version is not None if stored else None
+
+def resident_dates() -> List[str]:
+    """Yesterday through the last refreshed day: the dates kept warm in memory and in snapshots"""
+    start = datetime.strptime(today_et(), '%Y-%m-%d') - timedelta(days=1)
+    return [(start + timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(REFRESH_DAYS_AHEAD + 2)]
+
+async def warm_indexes():
+    """Load stored shows around today into the in-memory indexes after a restart"""
+    channel_ids = [c['id'] for c in CHANNELS]
+    for date in resident_dates():
+        stored = await load_stored_schedule(channel_ids, date)
+        for channel_id, shows in stored.items():
+            interval_index.update(channel_id, date, shows)
+            search_index.update(channel_id, date, shows)
+
+async def collect_snapshot() -> Optional[Dict[str, Any]]:
+    """Stored shows, refresh times and page validators for the resident dates; None if the store had nothing"""
+    dates = resident_dates()
+    channel_ids = [c['id'] for c in CHANNELS]
+    refreshed: Dict[Tuple[str, str], float] = {}
+    async for document in db.channel_refreshes.find({"date": {"$in": dates}}, {"channel_id": 1, "date": 1, "refreshed_at": 1}):
+        refreshed[(document['channel_id'], document['date'])] = document['refreshed_at'].replace(tzinfo=timezone.utc).timestamp()
+    
+    days = []
+    programs: Dict[str, Dict[str, Any]] = {}
+    for date in dates:
+        stored = await load_stored_schedule(channel_ids, date)
+        for channel_id, shows in stored.items():
+            days.append({
+                "channel_id": channel_id,
+                "date": date,
+                "refreshed_at": refreshed.get((channel_id, date)),
+                "shows": [show.airing_dict() for show in shows]
+            })
+            for show in shows:
+                programs.setdefault(show.program_id, show.program_dict())
+    if not days:
+        return None
+    return {
+        "created_at": datetime.now(timezone.utc),
+        "worker": WORKER_ID,
+        "days": days,
+        "programs": programs,
+        "validators": page_validators.export(),
+        "harvested_dates": harvested_dates,
+        "refresh_policy": refresh_scheduler.policy.export()
+    }
+
+async def save_schedule_snapshot() -> Optional[int]:
+    """Write the snapshot file from the store; returns its size, or None when there was nothing to write"""
+    payload = await collect_snapshot()
+    if payload is None:
+        # Never replace a good snapshot with an empty one because the store was unreachable
+        return None
+    return await asyncio.get_running_loop().run_in_executor(None, write_snapshot, Path(SNAPSHOT_PATH), payload)
+
+def restore_schedule_snapshot() -> int:
+    """Load the snapshot into the cache, lookup indexes and validators; returns how many channel-days it held.
+    
+    Runs before the app takes traffic. Restored days keep the refresh time
+    they were saved with, so anything old is served stale and refreshed
+    (conditionally, thanks to the saved validators) in the background. A
+    snapshot that cannot be read or applied, e.g. one written with another
+    schema, is ignored and the worker starts cold.
+    """
+    try:
+        payload = read_snapshot(Path(SNAPSHOT_PATH))
+    except (SnapshotError, OSError) as e:
+        logging.error(f"Ignoring schedule snapshot {SNAPSHOT_PATH}: {str(e)}")
+        return 0
+    if payload is None:
+        return 0
+    
+    try:
+        return apply_schedule_snapshot(payload)
+    except Exception as e:
+        logging.error(f"Ignoring schedule snapshot {SNAPSHOT_PATH}: {type(e).__name__}: {str(e)}")
+        discard_restored_state()
+        return 0
+
+def apply_schedule_snapshot(payload: Dict[str, Any]) -> int:
+    dates = set(resident_dates())
+    known_channels = {c['id'] for c in CHANNELS}
+    programs = payload.get('programs', {})
+    restored = 0
+    for entry in payload.get('days', []):
+        channel_id, date = entry['channel_id'], entry['date']
+        if date not in dates or channel_id not in known_channels:
+            continue
+        shows = []
+        for document in entry['shows']:
+            document['timestamp'] = datetime.fromisoformat(document['timestamp'].replace('Z', '+00:00'))
+            if 'title' not in document:
+                document.update(programs[document['program_id']])
+            shows.append(ShowRecord.from_document(document))
+        day = build_channel_day(channel_id, date, shows, entry.get('refreshed_at'))
+        schedule_cache.put((channel_id, date), day)
+        known_versions[(channel_id, date)] = day.version
+        interval_index.update(channel_id, date, shows)
+        search_index.update(channel_id, date, shows)
+        restored += 1
+    
+    for program_id, program in programs.items():
+        program_catalog.put(program_id, program)
+    page_validators.restore(payload.get('validators', {}))
+    for channel_id, covered in payload.get('harvested_dates', {}).items():
+        harvested_dates.setdefault(channel_id, covered)
+    refresh_scheduler.policy.restore(payload.get('refresh_policy', {}))
+    logging.info(f"Restored {restored} channel-days from snapshot taken {payload.get('created_at')}")
+    return restored
+
+def discard_restored_state():
+    """Forget whatever a failed snapshot restore had already loaded"""
+    global program_catalog, page_validators, interval_index, search_index
+    schedule_cache.clear()
+    known_versions.clear()
+    harvested_dates.clear()
+    program_catalog = ProgramCatalog(max_entries=program_catalog.max_entries)
+    page_validators = PageValidators()
+    interval_index = IntervalIndex(max_days=interval_index.max_days)
+    search_index = SearchIndex(max_days=search_index.max_days)
+    refresh_scheduler.policy = RefreshPolicy(CHANNELS, REFRESH_MIN_INTERVAL, REFRESH_MAX_INTERVAL)
+
+async def snapshot_loop():
+    """Rewrite the snapshot every SNAPSHOT_INTERVAL from the worker leading the refresh cycles"""
+    while True:
+        await asyncio.sleep(SNAPSHOT_INTERVAL)
+        if not refresh_scheduler.is_leader:
+            continue
+        try:
+            await save_schedule_snapshot()
+        except Exception as e:
+            logging.error(f"Error writing schedule snapshot: {str(e)}")
+
+async def prepare_store():
+    """Store setup that used to hold up startup: indexes, then the in-memory lookup indexes"""
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        logging.error(f"Error creating schedule store indexes: {str(e)}")
+    try:
+        await warm_indexes()
+    except Exception as e:
+        logging.error(f"Error warming schedule indexes: {str(e)}")
+
+def today_et() -> str:
+    return datetime.now(pytz.timezone('America/New_York')).strftime('%Y-%m-%d')
+
+def viewport_coverage(channel_id: str, date: str) -> Optional[bool]:
+    """Whether the index has a show on air for every on-screen hour of `date`; None if none of them fall on it"""
+    et_tz = pytz.timezone('America/New_York')
+    midnight = datetime.strptime(date, '%Y-%m-%d')
+    day_start = int(et_tz.localize(midnight).timestamp())
+    day_end = int(et_tz.localize(midnight + timedelta(days=1)).timestamp())
+    now = int(time.time())
+    start, end = max(now, day_start), min(now + int(REFRESH_VIEWPORT_HOURS * 3600), day_end)
+    if start >= end:
+        return None
+    # Sample every quarter hour; a gap shorter than that is not worth jumping the queue for
+    return all(interval_index.at(channel_id, epoch) is not None for epoch in range(start, end, 15 * 60))
+
+async def refresh_channel_day(channel: Dict[str, str], target_date: str) -> bool:
+    """Bring one channel-day up to date in the store and cache; used by the refresh scheduler.
+    
+    A channel's page lists several days, so one scrape refreshes all of them:
+    a date already harvested within PAGE_REUSE_SECONDS costs no fetch. Only
+    the worker holding the channel's lease scrapes it; any other worker waits
+    for that refresh to land in the store and reads it from there. Within this
+    worker, refreshes of the same channel take turns, so dates refreshed in
+    parallel share the first one's fetch, and a date missing from a page
+    scraped within PAGE_REUSE_SECONDS fails without fetching it again.
+    """
+    lease = f"refresh:{channel['id']}"
+    if not await refresh_leases.acquire(lease, REFRESH_LEASE_SECONDS):
+        return await wait_for_peer_refresh(channel['id'], target_date, lease)
+    try:
+        async with channel_refresh_locks.setdefault(channel['id'], asyncio.Lock()):
+            if await recently_refreshed(channel['id'], target_date):
+                return True
+            scraped_at = channel_scraped_at.get(channel['id'])
+            if scraped_at is not None and time.time() - scraped_at < PAGE_REUSE_SECONDS:
+                return False
+            return await scrape_and_publish(channel, target_date)
+    finally:
+        await refresh_leases.release(lease)
+
+async def recently_refreshed(channel_id: str, target_date: str) -> bool:
+    """True when the channel-day was confirmed within PAGE_REUSE_SECONDS, e.g. by a scrape for another date"""
+    try:
+        document = await db.channel_refreshes.find_one({"_id": f"{channel_id}:{target_date}"}, {"refreshed_at": 1})
+    except Exception as e:
+        logging.error(f"Error reading refresh time of {channel_id} on {target_date}: {str(e)}")
+        return False
+    if document is None:
+        return False
+    age = datetime.now(timezone.utc) - document['refreshed_at'].replace(tzinfo=timezone.utc)
+    return age.total_seconds() < PAGE_REUSE_SECONDS
+
+async def wait_for_peer_refresh(channel_id: str, target_date: str, lease: str) -> bool:
+    """Wait out another worker's refresh of a channel; True if it confirmed the listing for target_date"""
+    started = datetime.now(timezone.utc).replace(microsecond=0)
+    if not await refresh_leases.wait_released(lease, REFRESH_LEASE_SECONDS):
+        return False
+    try:
+        document = await db.channel_refreshes.find_one({"_id": f"{channel_id}:{target_date}"})
+    except Exception as e:
+        logging.error(f"Error reading refresh time of {channel_id} on {target_date}: {str(e)}")
+        return False
+    if document is None or document['refreshed_at'].replace(tzinfo=timezone.utc) < started:
+        return False
+    # Drop this worker's copy so the caller reads the peer's result from the store
+    schedule_cache.invalidate((channel_id, target_date))
+    return True
+
+async def scrape_and_publish(channel: Dict[str, str], target_date: str) -> bool:
+    """Scrape a channel's page once and publish every date on it; True if target_date was among them"""
+    published: Dict[str, Optional[bool]] = {}
+    
+    async def publish(harvest: Dict[str, List[ShowRecord]]) -> bool:
+        for date, shows in harvest.items():
+            published[date] = await publish_channel_shows(channel['id'], date, shows)
+        return None not in published.values()
+    
+    try:
+        harvest = await scrape_channel_schedule(upstream.session, channel, publish)
+    except Exception as e:
+        logging.error(f"Error publishing {channel['name']} schedule: {str(e)}")
+        # Account for the dates published before the error, as for a complete harvest
+        harvest = {date: [] for date, stored in published.items() if stored is not None}
+        if not harvest:
+            return False
+    if harvest is not None and not harvest:
+        return False
+    channel_scraped_at[channel['id']] = time.time()
+    if harvest is None:
+        # Unchanged upstream: what is already published is still current, and now confirmed so
+        refreshed_at = time.time()
+        covered = harvested_dates.get(channel['id'], [target_date])
+        for date in covered:
+            cached = schedule_cache.get((channel['id'], date))
+            if cached is not None:
+                cached.refreshed_at = refreshed_at
+            await mark_channel_refreshed(channel['id'], date, refreshed_at, cached.version if cached else None)
+        refresh_scheduler.record_fetch(channel['id'], False)
+        return target_date in covered
+    
+    changed = any(published.values())
+    harvested_dates[channel['id']] = list(harvest)
+    refresh_scheduler.record_fetch(channel['id'], changed)
+    if target_date not in harvest:
+        if target_date not in published:
+            logging.warning(f"{channel['name']} page does not list {target_date}")
+        return False
+    return True
+
+refresh_scheduler = RefreshScheduler(
+    refresh_channel_day,
+    CHANNELS,
+    today=today_et,
+    days_ahead=REFRESH_DAYS_AHEAD,
+    interval=REFRESH_INTERVAL,
+    jitter=REFRESH_JITTER,
+    concurrency=REFRESH_CONCURRENCY,
+    policy=RefreshPolicy(CHANNELS, REFRESH_MIN_INTERVAL, REFRESH_MAX_INTERVAL),
+    viewport=viewport_coverage,
+    # One worker schedules the cycles; the lease outlives an interval so it stays put while that worker is alive
+    leader=lambda: refresh_leases.renew("refresh-cycle", 2 * REFRESH_INTERVAL + REFRESH_JITTER)
+)
+
+async def apply_peer_refreshes(since: datetime) -> datetime:
+    """Bring this worker's cache and indexes up to date with channel-days other workers refreshed.
+    
+    Re-reads a little before `since` so refreshes committed out of order are
+    not missed; applying one twice is harmless. Returns the next `since`.
+    """
+    cursor = db.channel_refreshes.find({
+        "published_at": {"$gt": since - timedelta(seconds=PEER_SYNC_SECONDS)},
+        "worker": {"$ne": WORKER_ID}
+    }).sort("published_at", 1)
+    
+    changed = False
+    async for document in cursor:
+        key = (document['channel_id'], document['date'])
+        refreshed_at = document['refreshed_at'].replace(tzinfo=timezone.utc)
+        since = max(since, document['published_at'].replace(tzinfo=timezone.utc))
+        
+        cached = schedule_cache.get(key)
+        if document.get('version') is not None and document['version'] != known_versions.get(key):
+            # New content: the next read loads it from the store
+            known_versions[key] = document['version']
+            schedule_cache.invalidate(key)
+            stored = await load_stored_schedule([key[0]], key[1])
+            interval_index.update(key[0], key[1], stored.get(key[0], []))
+            search_index.update(key[0], key[1], stored.get(key[0], []))
+            changed = True
+        elif cached is not None:
+            cached.refreshed_at = max(cached.refreshed_at or 0, refreshed_at.timestamp())
+    
+    if changed:
+        change_signal.notify()
+    return since
+
+async def follow_peer_refreshes():
+    """Background loop applying other workers' refreshes every PEER_SYNC_SECONDS"""
+    since = datetime.now(timezone.utc)
+    while True:
+        await asyncio.sleep(PEER_SYNC_SECONDS)
+        try:
+            since = await apply_peer_refreshes(since)
+        except Exception as e:
+            logging.error(f"Error following peer refreshes: {str(e)}")
+        
+        # Forget versions of days that have rolled out of the refresh window
+        oldest = refresh_scheduler.dates()[0]
+        for key in [key for key in known_versions if key[1] < oldest]:
+            del known_versions[key]
+
+async def load_channel_schedule(channel: Dict[str, str], target_date: str) -> ChannelDay:
+    """Load a channel's shows from the store; requests never scrape upstream themselves"""
+    stored = await load_stored_schedule([channel['id']], target_date)
+    shows = stored.get(channel['id'], [])
+    refreshed_at = await load_refreshed_at(channel['id'], target_date, shows)
+    return build_channel_day(channel['id'], target_date, shows, refreshed_at)
+
+async def get_cached_channel_schedule(channel: Dict[str, str], target_date: str) -> ChannelDay:
+    """Channel shows for a date, served from the in-process cache when possible"""
+    return await schedule_cache.get_or_load(
+        (channel['id'], target_date),
+        lambda: load_channel_schedule(channel, target_date)
+    )
+
+def stale_after(channel_id: str) -> float:
+    """Seconds after its last refresh that a channel's listing is served as stale"""
+    if STALE_AFTER_SECONDS is not None:
+        return STALE_AFTER_SECONDS
+    return 2 * refresh_scheduler.policy.interval(channel_id) + REFRESH_JITTER
+
+def channel_status(day: ChannelDay) -> str:
+    """fresh, stale (older than stale_after) or pending (nothing stored yet)"""
+    if not day.shows:
+        return "pending"
+    if day.date not in refresh_scheduler.dates():
+        # Past days are no longer refreshed, so what is stored is final
+        return "fresh"
+    if day.refreshed_at is None or time.time() - day.refreshed_at > stale_after(day.channel_id):
+        return "stale"
+    return "fresh"
+
+def request_deadline(deadline_ms: Optional[int]) -> float:
+    """Monotonic time by which a schedule request should answer"""
+    budget_ms = SCHEDULE_DEADLINE_MS if deadline_ms is None else min(deadline_ms, SCHEDULE_DEADLINE_MAX_MS)
+    return time.monotonic() + budget_ms / 1000
+
+async def freshen_channel_day(channel: Dict[str, str], day: ChannelDay, deadline: float) -> Tuple[ChannelDay, str]:
+    """Wait for a stale or pending channel's refresh, but only until the deadline.
+    
+    Past it, the last known good copy (or nothing, for a pending channel) is
+    returned with its status while the urgent refresh carries on in the
+    background, so slow upstream responses never hold up the request.
+    """
+    status = channel_status(day)
+    if status == "fresh" or not refresh_scheduler.running or day.date not in refresh_scheduler.dates():
+        return day, status
+    
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        refresh_scheduler.expedite(channel['id'], day.date)
+        return day, status
+    
+    if await refresh_scheduler.wait_for(channel['id'], day.date, remaining):
+        day = await get_cached_channel_schedule(channel, day.date)
+        status = channel_status(day)
+    return day, status
+
+async def resolve_channel_day(channel: Dict[str, str], target_date: str, deadline: float,
+                              semaphore: asyncio.Semaphore, name: str) -> Tuple[ChannelDay, str]:
+    """Load a channel-day under a concurrency slot, then give its refresh what is left of the budget"""
+    async with concurrency_slot(semaphore, name):
+        day = await get_cached_channel_schedule(channel, target_date)
+    day, status = await freshen_channel_day(channel, day, deadline)
+    channels_served.labels(status).inc()
+    return day, status
+
+@asynccontextmanager
+async def concurrency_slot(semaphore: asyncio.Semaphore, name: str):
+    """Hold a semaphore slot, recording how long it took to get one"""
+    waiting = semaphore_waiting.labels(name)
+    waiting.inc()
+    started = time.perf_counter()
+    try:
+        await semaphore.acquire()
+    finally:
+        waiting.dec()
+    semaphore_wait_seconds.labels(name).observe(time.perf_counter() - started)
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+async def iter_channel_schedules(channels: List[Dict[str, str]], target_date: str,
+                                 deadline: float) -> AsyncIterator[Tuple[int, ChannelDay, str]]:
+    """Yield (index, channel day, status) for each channel as soon as it is loaded, not in list order"""
+    semaphore = asyncio.Semaphore(SCHEDULE_STREAM_CONCURRENCY)
+    
+    async def load(index, channel):
+        # The semaphore is FIFO, so channels earlier in the list start loading first
+        try:
+            day, status = await resolve_channel_day(channel, target_date, deadline, semaphore, 'schedule_stream')
+        except Exception as e:
+            logging.error(f"Error loading {channel['name']} schedule: {str(e)}")
+            day, status = ChannelDay(channel['id'], target_date, []), "pending"
+        return index, day, status
+    
+    tasks = [asyncio.ensure_future(load(i, channel)) for i, channel in enumerate(channels)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client went away: stop waiting, shared cache loads keep running for other requests
+        for task in tasks:
+            task.cancel()
+
+def versioned_response(request: Request, etag: str, render: Callable[[], bytes]) -> Response:
+    """304 if the client already holds this version, else the cached body in the best accepted coding"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        response_cache.record_not_modified()
+        return Response(status_code=304, headers=headers)
+    
+    entry = response_cache.get_or_render(etag, render)
+    content, encoding = response_cache.encode(entry, choose_encoding(request.headers.get('accept-encoding')))
+    if encoding != 'identity':
+        headers["Content-Encoding"] = encoding
+    return Response(content=content, media_type="application/json", headers=headers)
+
+def format_stream_event(event: str, payload: bytes, stream_format: str) -> bytes:
+    if stream_format == 'sse':
+        return b"event: " + event.encode() + b"\ndata: " + payload + b"\n\n"
+    return payload + b"\n"
 
 @api_router.get("/")
 async def root():
@@ -229,10 +1261,74 @@ async def get_channels():
     """Get list of all available channels"""
     return {"channels": CHANNELS}
 
+# Assumed length of a channel's last listed show, which has no next show to end it
+DEFAULT_LAST_SHOW_MINUTES = 60
+
+def select_channels(spec: str) -> List[Dict[str, str]]:
+    """Resolve a comma-separated list of channel ids and/or inclusive index ranges like 0-9"""
+    channels_by_id = {c['id']: c for c in CHANNELS}
+    selected = []
+    for part in (p.strip() for p in spec.split(',')):
+        if not part:
+            continue
+        range_match = re.fullmatch(r'(\d+)-(\d+)', part)
+        if range_match:
+            start, end = int(range_match.group(1)), int(range_match.group(2))
+            selected.extend(CHANNELS[start:end + 1])
+        elif part.isdigit():
+            selected.extend(CHANNELS[int(part):int(part) + 1])
+        elif part in channels_by_id:
+            selected.append(channels_by_id[part])
+        else:
+            raise HTTPException(status_code=400, detail=f"Unknown channel: {part}")
+    
+    # Drop duplicates while keeping the requested order
+    return list({c['id']: c for c in selected}.values())
+
+def parse_minute_of_day(value: str) -> int:
+    """Parse minutes since midnight given as an integer or HH:MM (hours past 23 reach into the next day)"""
+    if value.isdigit():
+        return int(value)
+    match = re.fullmatch(r'(\d{1,2}):(\d{2})', value)
+    if not match:
+        raise HTTPException(status_code=400, detail=f"Invalid time: {value}, expected minutes or HH:MM")
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+def show_overlaps(show: ShowRecord, window_start: int, window_end: int) -> bool:
+    if show.start_minute is None:
+        return False
+    end_minute = show.start_minute + (show.duration or DEFAULT_LAST_SHOW_MINUTES)
+    return show.start_minute < window_end and end_minute > window_start
+
 @api_router.get("/schedule", response_model=ScheduleResponse)
-async def get_schedule(date: Optional[str] = None):
-    """Get schedule for all channels"""
+async def get_schedule(
+    request: Request,
+    date: Optional[str] = None,
+    channels: Optional[str] = None,
+    from_: Optional[str] = Query(None, alias="from"),
+    to: Optional[str] = None,
+    fields: Optional[str] = None,
+    programs: bool = False,
+    deadline_ms: Optional[int] = Query(None, ge=0)
+):
+    """Get schedule for all channels.
+    
+    Optional viewport slicing: ?channels= (ids and/or index ranges like 0-9),
+    ?from=/?to= (minutes or HH:MM; only shows overlapping the window are
+    returned) and ?fields= (comma-separated Show fields to include).
+    
+    ?programs=true returns slim airings plus one `programs` table holding the
+    program fields of every airing in the response, each program once.
+    
+    ?deadline_ms= bounds how long stale or pending channels wait on their
+    refresh; past it they are served as they are and marked in `status`.
+    
+    Responses carry a strong ETag over the requested view and the version of
+    every channel in it; current_time is the time that version was rendered.
+    """
     try:
+        deadline = request_deadline(deadline_ms)
+        
         # Use current date if none provided
         if date is None:
             et_tz = pytz.timezone('America/New_York')
@@ -240,55 +1336,226 @@ async def get_schedule(date: Optional[str] = None):
         else:
             target_date = date
         
-        # Create aiohttp session
-        connector = aiohttp.TCPConnector(limit=10)
-        timeout = aiohttp.ClientTimeout(total=30)
+        # Every channel by default, like the stream; the deadline bounds how long slow ones can hold the response
+        priority_channels = select_channels(channels) if channels else CHANNELS
         
-        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-            # Scrape all channels concurrently (but limit concurrency)
-            semaphore = asyncio.Semaphore(5)  # Limit to 5 concurrent requests
-            
-            async def scrape_with_semaphore(channel):
-                async with semaphore:
-                    return await scrape_channel_schedule(session, channel, target_date)
-            
-            # Scrape first 10 channels initially for quick response
-            priority_channels = CHANNELS[:10]
-            tasks = [scrape_with_semaphore(channel) for channel in priority_channels]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Build response
-            channels_data = []
+        window_start = parse_minute_of_day(from_) if from_ is not None else None
+        window_end = parse_minute_of_day(to) if to is not None else None
+        
+        projection = None
+        if fields:
+            projection = {f.strip() for f in fields.split(',') if f.strip()}
+            unknown = projection - set(Show.model_fields)
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        
+        # Load channels concurrently, as many at once as the streaming endpoint
+        semaphore = asyncio.Semaphore(SCHEDULE_STREAM_CONCURRENCY)
+        
+        tasks = [
+            resolve_channel_day(channel, target_date, deadline, semaphore, 'schedule')
+            for channel in priority_channels
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        resolved = [
+            result if not isinstance(result, Exception) else (ChannelDay(channel['id'], target_date, []), "pending")
+            for channel, result in zip(priority_channels, results)
+        ]
+        days = [day for day, _ in resolved]
+        
+        etag = make_etag(
+            "schedule", target_date, window_start, window_end,
+            ','.join(sorted(projection)) if projection is not None else None,
+            "programs" if programs else None,
+            *(f"{day.channel_id}:{day.version}:{status}" for day, status in resolved)
+        )
+        
+        def render() -> bytes:
+            # Build response from pre-serialized channel days; sliced views serialize just their shows
+            sliced = window_start is not None or window_end is not None or projection is not None
+            channel_fragments = []
+            program_table: Dict[str, Dict[str, Any]] = {}
             
-            for i, channel in enumerate(priority_channels):
-                shows_data = results[i] if not isinstance(results[i], Exception) else []
+            for channel, (day, status) in zip(priority_channels, resolved):
+                shows_data = day.shows
+                if window_start is not None or window_end is not None:
+                    shows_data = [
+                        show for show in shows_data
+                        if show_overlaps(
+                            show,
+                            window_start if window_start is not None else 0,
+                            window_end if window_end is not None else 2 * 1440
+                        )
+                    ]
+                if programs:
+                    for show in shows_data:
+                        program_table.setdefault(show.program_id, show.program_dict())
                 
-                channel_schedule = ChannelSchedule(
-                    channel_id=channel['id'],
-                    channel_name=channel['name'],
-                    date=target_date,
-                    shows=shows_data
+                if not sliced:
+                    shows_json = day.airings_json() if programs else day.shows_json()
+                else:
+                    shows_dicts = [show.airing_dict() if programs else show.to_dict() for show in shows_data]
+                    if projection is not None:
+                        # Airings keep their program_id, or the programs table could not be used
+                        kept = projection | {'program_id'} if programs else projection
+                        shows_dicts = [{k: v for k, v in show.items() if k in kept} for show in shows_dicts]
+                    shows_json = dumps(shows_dicts)
+                
+                channel_fragments.append(
+                    channel_schedule_json(channel['id'], channel['name'], target_date, shows_json, status)
                 )
-                channels_data.append(channel_schedule)
+            
+            programs_json = None
+            if programs:
+                if projection is not None:
+                    program_table = {
+                        program_id: {k: v for k, v in program.items() if k in projection}
+                        for program_id, program in program_table.items()
+                    }
+                programs_json = dumps(program_table)
             
             # Get current time in ET
             et_tz = pytz.timezone('America/New_York')
             current_time = datetime.now(et_tz).strftime('%Y-%m-%d %H:%M:%S')
+            return schedule_response_json(channel_fragments, current_time, "America/New_York", programs_json)
+        
+        return versioned_response(request, etag, render)
             
-            return ScheduleResponse(
-                channels=channels_data,
-                current_time=current_time,
-                timezone="America/New_York"
-            )
-            
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error getting schedule: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.get("/schedule/{channel_id}")
-async def get_channel_schedule(channel_id: str, date: Optional[str] = None):
-    """Get schedule for a specific channel"""
+@api_router.get("/schedule/stream")
+async def stream_schedule(
+    date: Optional[str] = None,
+    format: str = "ndjson",
+    programs: bool = False,
+    deadline_ms: Optional[int] = Query(None, ge=0)
+):
+    """Stream every channel's schedule as it becomes ready, as NDJSON or Server-Sent Events.
+    
+    With ?programs=true rows hold slim airings, and each channel event carries
+    the programs of its airings that no earlier event in the stream sent.
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    
+    deadline = request_deadline(deadline_ms)
+    et_tz = pytz.timezone('America/New_York')
+    target_date = date if date is not None else datetime.now(et_tz).strftime('%Y-%m-%d')
+    
+    async def events():
+        meta = {
+            "type": "meta",
+            "version": await current_change_version(),
+            "date": target_date,
+            "current_time": datetime.now(et_tz).strftime('%Y-%m-%d %H:%M:%S'),
+            "timezone": "America/New_York",
+            "total": len(CHANNELS)
+        }
+        yield format_stream_event("meta", dumps(meta), format)
+        
+        sent_programs = set()
+        async for index, day, status in iter_channel_schedules(CHANNELS, target_date, deadline):
+            channel = CHANNELS[index]
+            payload = b'{"type":"channel","index":' + str(index).encode()
+            if programs:
+                new_programs = {
+                    program_id: program for program_id, program in day.programs().items()
+                    if program_id not in sent_programs
+                }
+                sent_programs.update(new_programs)
+                schedule_json = channel_schedule_json(channel['id'], channel['name'], target_date, day.airings_json(), status)
+                payload += b',"programs":' + dumps(new_programs)
+            else:
+                schedule_json = channel_schedule_json(channel['id'], channel['name'], target_date, day.shows_json(), status)
+            payload += b',"schedule":' + schedule_json + b'}'
+            yield format_stream_event("channel", payload, format)
+        
+        yield format_stream_event("done", dumps({"type": "done", "total": len(CHANNELS)}), format)
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        events(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/schedule/changes")
+async def get_schedule_changes(
+    since: Optional[int] = Query(None, ge=0),
+    date: Optional[str] = None,
+    channels: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=5000)
+):
+    """Added, modified and removed shows since a change-feed version.
+    
+    Without ?since= only the current version is returned, as a starting cursor.
+    Pass the returned version as the next ?since=; when `reset` is true the
+    client should reload the schedule.
+    """
+    try:
+        if since is None:
+            return {"version": await current_change_version(), "reset": False, "more": False, "changes": []}
+        
+        channel_ids = [c['id'] for c in select_channels(channels)] if channels else None
+        return Response(
+            content=dumps(await read_schedule_changes(since, date, channel_ids, limit)),
+            media_type="application/json"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error getting schedule changes: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/schedule/changes/stream")
+async def stream_schedule_changes(
+    since: Optional[int] = Query(None, ge=0),
+    date: Optional[str] = None,
+    channels: Optional[str] = None
+):
+    """Push change-feed entries as Server-Sent Events as soon as they are recorded"""
+    channel_ids = [c['id'] for c in select_channels(channels)] if channels else None
+    
+    async def events():
+        cursor = since if since is not None else await current_change_version()
+        yield format_stream_event("version", dumps({"version": cursor}), "sse")
+        
+        while True:
+            page = await read_schedule_changes(cursor, date, channel_ids, 500)
+            if page['reset']:
+                yield format_stream_event("reset", dumps({"version": page['version']}), "sse")
+                return
+            for change in page['changes']:
+                yield format_stream_event("change", dumps(change), "sse")
+            cursor = page['version']
+            
+            # Changes recorded by this worker wake the stream at once; other workers' are seen on the next poll
+            if not page['more'] and not await change_signal.wait(CHANGE_POLL_SECONDS):
+                yield b": keepalive\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/schedule/{channel_id}", response_model=ChannelSchedule)
+async def get_channel_schedule(
+    request: Request,
+    channel_id: str,
+    date: Optional[str] = None,
+    programs: bool = False,
+    deadline_ms: Optional[int] = Query(None, ge=0)
+):
+    """Get schedule for a specific channel; ?programs=true returns slim airings and a `programs` table"""
     try:
+        deadline = request_deadline(deadline_ms)
+        
         # Find channel
         channel = next((c for c in CHANNELS if c['id'] == channel_id), None)
         if not channel:
@@ -301,19 +1568,22 @@ async def get_channel_schedule(channel_id: str, date: Optional[str] = None):
         else:
             target_date = date
         
-        # Create aiohttp session and scrape
-        connector = aiohttp.TCPConnector(limit=1)
-        timeout = aiohttp.ClientTimeout(total=30)
+        day = await get_cached_channel_schedule(channel, target_date)
+        day, status = await freshen_channel_day(channel, day, deadline)
+        channels_served.labels(status).inc()
         
-        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-            shows = await scrape_channel_schedule(session, channel, target_date)
-            
-            return ChannelSchedule(
-                channel_id=channel['id'],
-                channel_name=channel['name'],
-                date=target_date,
-                shows=shows
-            )
+        def render() -> bytes:
+            if programs:
+                return channel_schedule_json(
+                    channel['id'], channel['name'], target_date, day.airings_json(), status, dumps(day.programs())
+                )
+            return channel_schedule_json(channel['id'], channel['name'], target_date, day.shows_json(), status)
+        
+        return versioned_response(
+            request,
+            make_etag("channel", channel['id'], target_date, day.version, status, "programs" if programs else None),
+            render
+        )
             
     except HTTPException:
         raise
@@ -321,17 +1591,253 @@ async def get_channel_schedule(channel_id: str, date: Optional[str] = None):
         logging.error(f"Error getting channel schedule: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def parse_query_time(value: str) -> datetime:
+    """Parse a unix timestamp or ISO 8601 time; times without an offset are taken as ET"""
+    if re.fullmatch(r'\d+(\.\d+)?', value):
+        return datetime.fromtimestamp(float(value), timezone.utc)
+    
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = pytz.timezone('America/New_York').localize(parsed)
+    return parsed
+
+def airing_at(moment: datetime) -> Response:
+    epoch = int(moment.timestamp())
+    channels = []
+    for channel in CHANNELS:
+        show = interval_index.at(channel['id'], epoch)
+        channels.append({
+            "channel_id": channel['id'],
+            "channel_name": channel['name'],
+            "show": show.to_dict() if show else None
+        })
+    
+    airing = {
+        "time": moment.astimezone(pytz.timezone('America/New_York')).strftime('%Y-%m-%d %H:%M:%S'),
+        "epoch": epoch,
+        "timezone": "America/New_York",
+        "channels": channels
+    }
+    return Response(content=dumps(airing), media_type="application/json")
+
+@api_router.get("/now")
+async def get_airing_now():
+    """What is airing on every channel right now"""
+    return airing_at(datetime.now(timezone.utc))
+
+@api_router.get("/at")
+async def get_airing_at(time: str):
+    """What is airing on every channel at ?time= (unix seconds or ISO 8601, ET if no offset)"""
+    try:
+        moment = parse_query_time(time)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="time must be unix seconds or an ISO 8601 datetime")
+    return airing_at(moment)
+
+@api_router.get("/search")
+async def search_shows(q: str, limit: int = Query(50, ge=1, le=500), upcoming: bool = False):
+    """Find shows on any channel and day by title, episode, description, type or year.
+    
+    Every word must match; the last one also matches as a prefix. Results are
+    ordered by start time, optionally only those that have not started yet.
+    """
+    after_epoch = int(datetime.now(timezone.utc).timestamp()) if upcoming else None
+    total, shows = search_index.search(q, limit=limit, after_epoch=after_epoch)
+    return Response(
+        content=dumps({
+            "query": q,
+            "total": total,
+            "results": [show.to_dict() for show in shows],
+            "index": search_index.stats()
+        }),
+        media_type="application/json"
+    )
+
+def export_dates(date: Optional[str], days: int) -> List[str]:
+    try:
+        start = datetime.strptime(date, '%Y-%m-%d') if date else datetime.strptime(today_et(), '%Y-%m-%d')
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+    return [(start + timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(days)]
+
+async def iter_export_shows(channels: List[Dict[str, str]], dates: List[str]) -> AsyncIterator[Dict[str, Any]]:
+    """Stored shows with their program fields, channel by channel in air order, fetched a batch at a time.
+    
+    An airing listed under two dates (after midnight on one day's page and at
+    the top of the next) is yielded once.
+    """
+    for channel in channels:
+        last_epoch = None
+        batch = []
+        cursor = db.shows.find(
+            {"channel_id": channel['id'], "date": {"$in": dates}},
+            {"_id": 0, "expires_at": 0}
+        ).sort([("date", 1), ("start_minute", 1)]).batch_size(EXPORT_BATCH_SIZE)
+        async for document in cursor:
+            epoch = document.get('start_epoch')
+            if epoch is None or (last_epoch is not None and epoch <= last_epoch):
+                continue
+            last_epoch = epoch
+            batch.append(document)
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                for show in await with_programs(batch):
+                    yield show
+                batch = []
+        for show in await with_programs(batch):
+            yield show
+
+async def export_xmltv(channels: List[Dict[str, str]], dates: List[str]) -> AsyncIterator[bytes]:
+    yield XMLTV_HEADER
+    for channel in channels:
+        yield xmltv_channel(channel)
+    async for show in iter_export_shows(channels, dates):
+        yield xmltv_programme(show)
+    yield XMLTV_FOOTER
+
+async def export_jsonl(channels: List[Dict[str, str]], dates: List[str], programs: bool = False) -> AsyncIterator[bytes]:
+    for channel in channels:
+        yield jsonl_channel(channel)
+    sent_programs = set()
+    async for show in iter_export_shows(channels, dates):
+        if not programs:
+            yield jsonl_show(show)
+            continue
+        if show['program_id'] not in sent_programs:
+            sent_programs.add(show['program_id'])
+            yield jsonl_program(show)
+        yield jsonl_airing(show)
+
+def export_response(request: Request, body: AsyncIterator[bytes], media_type: str, filename: str) -> StreamingResponse:
+    """Stream an export in ~64KB writes, gzipped on the fly when the client accepts it"""
+    async def logged(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in chunks:
+                yield chunk
+        except Exception as e:
+            # Headers are already sent: cut the stream short so the client sees an incomplete document
+            logging.error(f"Error streaming {filename}: {str(e)}")
+            raise
+    
+    headers = {"Content-Disposition": f'inline; filename="{filename}"', "Vary": "Accept-Encoding"}
+    stream = buffered(logged(body))
+    if accepted_encodings(request.headers.get('accept-encoding')).get('gzip', 0) > 0:
+        headers["Content-Encoding"] = "gzip"
+        stream = gzip_stream(stream)
+    return StreamingResponse(stream, media_type=media_type, headers=headers)
+
+@api_router.get("/export/xmltv")
+async def get_xmltv_export(
+    request: Request,
+    days: int = Query(7, ge=1),
+    date: Optional[str] = None,
+    channels: Optional[str] = None
+):
+    """XMLTV guide for ?days= days from ?date= (default today), streamed from the store"""
+    selected = select_channels(channels) if channels else CHANNELS
+    dates = export_dates(date, min(days, EXPORT_MAX_DAYS))
+    return export_response(request, export_xmltv(selected, dates), "application/xml", "schedule.xml")
+
+@api_router.get("/export/jsonl")
+async def get_jsonl_export(
+    request: Request,
+    days: int = Query(7, ge=1),
+    date: Optional[str] = None,
+    channels: Optional[str] = None,
+    programs: bool = False
+):
+    """The XMLTV export as JSON lines: one {"type": "channel"} line per channel, then one {"type": "show"} per airing.
+    
+    With ?programs=true each airing is a slim {"type": "airing"} line, preceded
+    the first time its program comes up by a {"type": "program"} line.
+    """
+    selected = select_channels(channels) if channels else CHANNELS
+    dates = export_dates(date, min(days, EXPORT_MAX_DAYS))
+    return export_response(request, export_jsonl(selected, dates, programs), "application/x-ndjson", "schedule.jsonl")
+
+# Counters the caches, upstream pool and scheduler already keep, read when metrics are rendered
+for _name, _kind, _documentation, _read in (
+    ('schedule_cache_hits_total', 'counter', 'Schedule cache hits', lambda: schedule_cache.hits),
+    ('schedule_cache_misses_total', 'counter', 'Schedule cache misses', lambda: schedule_cache.misses),
+    ('schedule_cache_coalesced_total', 'counter', 'Schedule cache misses that joined a load already in flight', lambda: schedule_cache.coalesced),
+    ('schedule_cache_evictions_total', 'counter', 'Schedule cache LRU evictions', lambda: schedule_cache.evictions),
+    ('schedule_cache_entries', 'gauge', 'Channel-days held in the schedule cache', lambda: schedule_cache.stats()['size']),
+    ('response_cache_hits_total', 'counter', 'Rendered responses served from the response cache', lambda: response_cache.hits),
+    ('response_cache_misses_total', 'counter', 'Responses rendered because their ETag was not cached', lambda: response_cache.misses),
+    ('response_not_modified_total', 'counter', 'Schedule requests answered with 304', lambda: response_cache.not_modified),
+    ('upstream_requests_total', 'counter', 'Requests sent through the upstream pool', lambda: upstream.requests),
+    ('upstream_connections_created_total', 'counter', 'New upstream connections opened', lambda: upstream.connections_created),
+    ('upstream_connections_reused_total', 'counter', 'Upstream requests served on a kept-alive connection', lambda: upstream.connections_reused),
+    ('upstream_connections_waiting', 'gauge', 'Upstream requests waiting for a free connection', lambda: upstream.connections_waiting),
+    ('upstream_concurrency_limit', 'gauge', 'Current adaptive limit on concurrent upstream requests', lambda: upstream_client.concurrency.limit),
+    ('upstream_circuits_open', 'gauge', 'Channels whose upstream circuit is open or half-open', lambda: len(upstream_client.stats()['open_circuits'])),
+    ('upstream_short_circuited_total', 'counter', 'Fetches skipped because the channel circuit was open', lambda: upstream_client.short_circuited),
+    ('upstream_pages_skipped_total', 'counter', 'Refreshes skipped as not modified or unchanged', lambda: page_validators.not_modified + page_validators.unchanged),
+    ('refresh_queued', 'gauge', 'Channel-days waiting in the refresh queue', lambda: refresh_scheduler.stats()['queued']),
+    ('refresh_succeeded_total', 'counter', 'Channel-day refreshes that succeeded', lambda: refresh_scheduler.refreshed),
+    ('refresh_failed_total', 'counter', 'Channel-day refreshes that failed', lambda: refresh_scheduler.failed),
+    ('refresh_leader', 'gauge', '1 if this worker schedules the refresh cycles', lambda: int(refresh_scheduler.is_leader)),
+    ('refresh_lease_contended_total', 'counter', 'Refreshes left to another worker that held the lease', lambda: refresh_leases.contended),
+):
+    metrics.callback(_name, _documentation, _kind, _read)
+
+@api_router.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics in the text exposition format"""
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+@api_router.get("/cache/stats")
+async def get_cache_stats():
+    """Hit, miss and coalescing counters for the schedule cache, plus rendered-response reuse"""
+    return {**schedule_cache.stats(), "responses": response_cache.stats(), "programs": program_catalog.stats()}
+
+@api_router.get("/upstream/stats")
+async def get_upstream_stats():
+    """Connection pool utilization, rate control, circuit breakers and skipped-refresh counters for upstream fetches"""
+    return {**upstream.stats(), "control": upstream_client.stats(), "conditional": page_validators.stats()}
+
+@api_router.get("/archive/stats")
+async def get_archive_stats():
+    """Size, age range and write/prune counters of the raw page archive"""
+    if page_archive is None:
+        return {"enabled": False}
+    stats = await asyncio.get_running_loop().run_in_executor(None, page_archive.stats)
+    return {"enabled": True, **stats}
+
 @api_router.get("/refresh")
-async def refresh_schedule():
-    """Manually refresh the schedule data"""
+async def refresh_schedule(channel_id: Optional[str] = None, date: Optional[str] = None):
+    """Queue a refresh of every channel, or just ?channel_id=, for today and the next days (or ?date=)"""
     try:
-        # This endpoint can be used to trigger a manual refresh
-        # For now, it just returns success
-        return {"message": "Schedule refresh initiated", "status": "success"}
+        channel_ids = None
+        if channel_id is not None:
+            if not any(c['id'] == channel_id for c in CHANNELS):
+                raise HTTPException(status_code=404, detail="Channel not found")
+            channel_ids = [channel_id]
+        
+        job = refresh_scheduler.submit(channel_ids, [date] if date else None)
+        return {"message": "Schedule refresh initiated", "status": "success", "job": job.to_dict()}
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error refreshing schedule: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.get("/refresh/status")
+async def get_refresh_status():
+    """Background refresh scheduler state, including whether this worker leads the refresh cycles"""
+    return {
+        **refresh_scheduler.stats(),
+        "leases": refresh_leases.stats(),
+        "channels": refresh_scheduler.policy.stats()
+    }
+
+@api_router.get("/refresh/{job_id}")
+async def get_refresh_job(job_id: str):
+    """Progress of a refresh job queued through /api/refresh"""
+    job = refresh_scheduler.job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Refresh job not found")
+    return job.to_dict()
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -341,6 +1847,7 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 # Configure logging
@@ -350,6 +1857,33 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def startup_db_client():
+    global parse_executor, peer_sync_task
+    parse_executor = create_parse_executor()
+    await upstream.start()
+    # The snapshot is local and small: serve a full grid from it while the store is still being set up
+    if SNAPSHOT_PATH:
+        restore_schedule_snapshot()
+        background_tasks.append(asyncio.create_task(snapshot_loop()))
+    if REFRESH_ENABLED:
+        refresh_scheduler.start()
+    peer_sync_task = asyncio.create_task(follow_peer_refreshes())
+    background_tasks.append(asyncio.create_task(prepare_store()))
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if peer_sync_task is not None:
+        peer_sync_task.cancel()
+    for task in background_tasks:
+        task.cancel()
+    await refresh_scheduler.stop()
+    if SNAPSHOT_PATH and refresh_scheduler.is_leader:
+        try:
+            await save_schedule_snapshot()
+        except Exception as e:
+            logger.error(f"Error writing schedule snapshot: {str(e)}")
+    await upstream.close()
+    if parse_executor is not None:
+        parse_executor.shutdown(wait=False)
     client.close()
\ No newline at end of file
@@ -0,0 +1,195 @@
+import hashlib
+import re
+import sys
+import unicodedata
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import orjson
+
+# Fixed namespace so the same airing always gets the same id across scrapes and workers
+SHOW_ID_NAMESPACE = uuid.UUID('5d7b4c1e-2f0a-4a53-9a57-3c8e6f1b2d90')
+
+# Fields whose values repeat across airings, channels and days
+INTERNED_FIELDS = (
+    'title', 'show_type', 'year', 'season', 'episode', 'episode_title',
+    'description', 'start_time', 'end_time', 'genre', 'channel_id', 'date',
+)
+
+# Output order of the public Show model
+SHOW_FIELDS = (
+    'id', 'program_id', 'title', 'show_type', 'year', 'season', 'episode', 'episode_title',
+    'description', 'start_time', 'start_minute', 'start_epoch', 'end_time',
+    'duration', 'genre', 'channel_id', 'date', 'timestamp',
+)
+
+# What a show is, shared by every airing of it on any channel or day
+PROGRAM_FIELDS = ('title', 'show_type', 'year', 'season', 'episode', 'episode_title', 'description', 'genre')
+
+# When and where it airs: a Show without its program fields
+AIRING_FIELDS = tuple(name for name in SHOW_FIELDS if name not in PROGRAM_FIELDS)
+
+# Fields that are bookkeeping rather than listing content, ignored when deciding a show changed
+VOLATILE_FIELDS = ('timestamp',)
+
+# The airing fields a listing's version covers
+CONTENT_AIRING_FIELDS = tuple(name for name in AIRING_FIELDS if name not in VOLATILE_FIELDS)
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+# Naive datetimes read back from Mongo are UTC; emit "Z" like the pydantic models do
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+def show_id(channel_id: str, date: str, start: Any) -> str:
+    """Deterministic id for the airing at `start` on a channel's listing for a date"""
+    return str(uuid.uuid5(SHOW_ID_NAMESPACE, f"{channel_id}|{date}|{start}"))
+
+
+def _normalize(value: Optional[str]) -> str:
+    if value is None:
+        return ''
+    return WHITESPACE_RE.sub(' ', unicodedata.normalize('NFKC', value)).strip().casefold()
+
+
+def program_fingerprint(fields: Dict[str, Any]) -> str:
+    """Fingerprint of a program's metadata, ignoring case and whitespace.
+
+    Airings of the same movie or episode on any channel or day get the same id;
+    any difference in the listing (another description, say) gives another.
+    """
+    key = '\x1f'.join(_normalize(fields.get(name)) for name in PROGRAM_FIELDS)
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest()
+
+
+@dataclass(slots=True)
+class ShowRecord:
+    """Internal, slotted form of a Show: no per-instance dict and no validation on creation"""
+    title: str
+    show_type: str
+    start_time: str
+    channel_id: str
+    date: str
+    timestamp: datetime
+    year: Optional[str] = None
+    season: Optional[str] = None
+    episode: Optional[str] = None
+    episode_title: Optional[str] = None
+    description: Optional[str] = None
+    start_minute: Optional[int] = None
+    start_epoch: Optional[int] = None
+    end_time: Optional[str] = None
+    duration: Optional[int] = None
+    genre: Optional[str] = None
+    id: str = ''
+    program_id: str = ''
+
+    @classmethod
+    def from_fields(cls, fields: Dict[str, Any], channel_id: str, date: str, timestamp: datetime) -> 'ShowRecord':
+        """Build a record from parser output, interning the repeated strings"""
+        values = {name: _intern(fields.get(name)) for name in INTERNED_FIELDS if name in fields}
+        return cls(
+            channel_id=sys.intern(channel_id),
+            date=sys.intern(date),
+            timestamp=timestamp,
+            program_id=program_fingerprint(values),
+            **values
+        )
+
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> 'ShowRecord':
+        """Build a record from a stored shows document with its program fields filled in"""
+        values = {name: document.get(name) for name in SHOW_FIELDS if name in document}
+        for name in INTERNED_FIELDS:
+            if name in values:
+                values[name] = _intern(values[name])
+        if not values.get('program_id'):
+            # Stored before the program catalog
+            values['program_id'] = program_fingerprint(values)
+        return cls(**values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in SHOW_FIELDS}
+
+    def airing_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in AIRING_FIELDS}
+
+    def program_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in PROGRAM_FIELDS}
+
+
+class ChannelDay:
+    """One channel's records for a date, with the shows and airings arrays each serialized at most once"""
+    __slots__ = ('channel_id', 'date', 'shows', 'refreshed_at', '_shows_json', '_airings_json', '_version')
+
+    def __init__(self, channel_id: str, date: str, shows: List[ShowRecord], refreshed_at: Optional[float] = None):
+        self.channel_id = channel_id
+        self.date = date
+        self.shows = shows
+        # Unix time the listing was last confirmed against upstream, None if never
+        self.refreshed_at = refreshed_at
+        self._shows_json: Optional[bytes] = None
+        self._airings_json: Optional[bytes] = None
+        self._version: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.shows)
+
+    def __iter__(self) -> Iterator[ShowRecord]:
+        return iter(self.shows)
+
+    def shows_json(self) -> bytes:
+        if self._shows_json is None:
+            self._shows_json = dumps([show.to_dict() for show in self.shows])
+        return self._shows_json
+
+    def airings_json(self) -> bytes:
+        """The shows as slim airings that reference their programs by id"""
+        if self._airings_json is None:
+            self._airings_json = dumps([show.airing_dict() for show in self.shows])
+        return self._airings_json
+
+    def programs(self) -> Dict[str, Dict[str, Any]]:
+        return {show.program_id: show.program_dict() for show in self.shows}
+
+    @property
+    def version(self) -> str:
+        """Content hash of the airings: equal listings give equal versions on every worker.
+
+        Program ids are fingerprints of the program fields, so the airings cover
+        the full content. Bookkeeping fields are left out: the scrape timestamp
+        changes on every republish and comes back from Mongo truncated and naive.
+        """
+        if self._version is None:
+            content = [
+                {name: getattr(show, name) for name in CONTENT_AIRING_FIELDS}
+                for show in self.shows
+            ]
+            self._version = hashlib.blake2b(dumps(content), digest_size=12).hexdigest()
+        return self._version
+
+
+def dumps(payload: Any) -> bytes:
+    return orjson.dumps(payload, option=ORJSON_OPTIONS)
+
+
+def channel_schedule_json(channel_id: str, channel_name: str, date: str, shows_json: bytes,
+                          status: str = "fresh", programs_json: Optional[bytes] = None) -> bytes:
+    """A ChannelSchedule object assembled around an already serialized shows array (and programs table)"""
+    head = dumps({"channel_id": channel_id, "channel_name": channel_name, "date": date, "status": status})
+    programs = b',"programs":' + programs_json if programs_json is not None else b''
+    return head[:-1] + b',"shows":' + shows_json + programs + b'}'
+
+
+def schedule_response_json(channel_fragments: List[bytes], current_time: str, timezone: str,
+                           programs_json: Optional[bytes] = None) -> bytes:
+    """A ScheduleResponse assembled from serialized ChannelSchedule fragments (and a programs table)"""
+    tail = dumps({"current_time": current_time, "timezone": timezone})
+    programs = b'"programs":' + programs_json + b',' if programs_json is not None else b''
+    return b'{"channels":[' + b','.join(channel_fragments) + b'],' + programs + tail[1:]
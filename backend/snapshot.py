@@ -0,0 +1,78 @@
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import orjson
+
+MAGIC = b'TVSCHED\x00'
+FORMAT_VERSION = 1
+
+# magic, format version, flags (unused), compressed payload length, blake2b-16 of the compressed payload
+HEADER = struct.Struct('<8sHHQ16s')
+
+
+class SnapshotError(ValueError):
+    """A snapshot file that is truncated, corrupt or from an incompatible format version"""
+
+
+def encode_snapshot(payload: Dict[str, Any], level: int = 6) -> bytes:
+    body = zlib.compress(orjson.dumps(payload, option=orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z), level)
+    digest = hashlib.blake2b(body, digest_size=16).digest()
+    return HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(body), digest) + body
+
+
+def decode_snapshot(data) -> Dict[str, Any]:
+    """Verify and unpack a snapshot from bytes or a memory map"""
+    if len(data) < HEADER.size:
+        raise SnapshotError("snapshot is shorter than its header")
+    magic, version, _, length, digest = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotError("not a schedule snapshot")
+    if version != FORMAT_VERSION:
+        raise SnapshotError(f"snapshot format {version} is not supported (expected {FORMAT_VERSION})")
+
+    body = memoryview(data)[HEADER.size:HEADER.size + length]
+    try:
+        if len(body) != length:
+            raise SnapshotError("snapshot is truncated")
+        if hashlib.blake2b(body, digest_size=16).digest() != digest:
+            raise SnapshotError("snapshot checksum mismatch")
+        return orjson.loads(zlib.decompress(body))
+    finally:
+        body.release()
+
+
+def write_snapshot(path: Path, payload: Dict[str, Any]) -> int:
+    """Write a snapshot atomically; returns its size in bytes. Blocking."""
+    data = encode_snapshot(payload)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return len(data)
+
+
+def read_snapshot(path: Path) -> Optional[Dict[str, Any]]:
+    """Map a snapshot file and decode it; None if there is none. Raises SnapshotError if it is unusable."""
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    with f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise SnapshotError("snapshot is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return decode_snapshot(mapped)
@@ -0,0 +1,510 @@
+import asyncio
+import hashlib
+import random
+import time
+from collections import deque
+import aiohttp
+from typing import Any, Callable, Deque, Dict, Hashable, List, Mapping, Optional
+
+
+class UpstreamPool:
+    """App-lifetime aiohttp session with a pooled keep-alive connector.
+
+    Created in the startup hook and closed on shutdown so every upstream
+    fetch reuses warm connections instead of paying a new TCP/TLS handshake.
+    """
+
+    def __init__(self, limit: int = 10, limit_per_host: int = 5, dns_ttl: int = 300,
+                 keepalive_timeout: float = 30, total_timeout: float = 30,
+                 on_connection_wait: Optional[Callable[[float], None]] = None):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.total_timeout = total_timeout
+        self.on_connection_wait = on_connection_wait
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.connections_waiting = 0
+
+    async def start(self):
+        if self._session is not None and not self._session.closed:
+            return
+
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_ttl,
+            keepalive_timeout=self.keepalive_timeout
+        )
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        trace_config.on_connection_queued_start.append(self._on_connection_queued_start)
+        trace_config.on_connection_queued_end.append(self._on_connection_queued_end)
+
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.total_timeout),
+            trace_configs=[trace_config]
+        )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            raise RuntimeError("Upstream session is not started")
+        return self._session
+
+    async def _on_request_start(self, session, context, params):
+        self.requests += 1
+
+    async def _on_connection_create_end(self, session, context, params):
+        self.connections_created += 1
+
+    async def _on_connection_reuseconn(self, session, context, params):
+        self.connections_reused += 1
+
+    async def _on_connection_queued_start(self, session, context, params):
+        # Every connection slot is taken; the request waits for one to free up
+        self.connections_waiting += 1
+        context.queued_at = time.monotonic()
+
+    async def _on_connection_queued_end(self, session, context, params):
+        self.connections_waiting -= 1
+        if self.on_connection_wait is not None:
+            self.on_connection_wait(time.monotonic() - context.queued_at)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool utilization: connections in use, idle keep-alive connections and reuse counts"""
+        stats: Dict[str, Any] = {
+            "started": self._session is not None and not self._session.closed,
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "dns_ttl_seconds": self.dns_ttl,
+            "keepalive_timeout_seconds": self.keepalive_timeout,
+            "requests": self.requests,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "connections_waiting": self.connections_waiting,
+            "in_use": 0,
+            "idle": 0,
+            "hosts": {},
+        }
+
+        if not stats["started"]:
+            return stats
+
+        # aiohttp has no public API for pool occupancy, so read the connector's bookkeeping
+        connector = self._session.connector
+        acquired = getattr(connector, '_acquired', set())
+        acquired_per_host = getattr(connector, '_acquired_per_host', {})
+        idle_per_host = getattr(connector, '_conns', {})
+
+        stats["in_use"] = len(acquired)
+        stats["idle"] = sum(len(conns) for conns in idle_per_host.values())
+
+        for key in set(acquired_per_host) | set(idle_per_host):
+            host = f"{key.host}:{key.port}"
+            stats["hosts"][host] = {
+                "in_use": len(acquired_per_host.get(key, ())),
+                "idle": len(idle_per_host.get(key, ())),
+            }
+
+        return stats
+
+
+def show_section(content: str) -> str:
+    """The part of a schedule page holding the show listings, from the first to the last container.
+
+    Hashing only this span keeps ads, timestamps and other page chrome from
+    making an unchanged schedule look new.
+    """
+    first = content.find('show-upcoming')
+    if first == -1:
+        return content
+    start = content.rfind('<a', 0, first)
+    last = content.rfind('show-upcoming')
+    end = content.find('</a>', last)
+    return content[max(start, 0):end + 4 if end != -1 else len(content)]
+
+
+class PageValidators:
+    """Per-page ETag/Last-Modified validators and listing hashes for skipping unchanged refreshes"""
+
+    def __init__(self):
+        self._entries: Dict[Hashable, Dict[str, Any]] = {}
+        self.fetched = 0
+        self.not_modified = 0
+        self.unchanged = 0
+        self.changed = 0
+        self.bytes_not_downloaded = 0
+
+    def request_headers(self, key: Hashable) -> Dict[str, str]:
+        """Conditional request headers for a page fetched before"""
+        entry = self._entries.get(key)
+        headers: Dict[str, str] = {}
+        if entry is None:
+            return headers
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record_not_modified(self, key: Hashable):
+        self.fetched += 1
+        self.not_modified += 1
+        self.bytes_not_downloaded += self._entries.get(key, {}).get('size', 0)
+
+    @staticmethod
+    def digest(content: str) -> str:
+        return hashlib.blake2b(show_section(content).encode('utf-8'), digest_size=16).hexdigest()
+
+    def is_unchanged(self, key: Hashable, digest: str) -> bool:
+        """True when a downloaded page lists exactly what was last processed"""
+        self.fetched += 1
+        entry = self._entries.get(key)
+        if entry is not None and entry['digest'] == digest:
+            self.unchanged += 1
+            return True
+        return False
+
+    def remember(self, key: Hashable, response_headers: Mapping[str, str], digest: str, size: int):
+        """Record a page once its listings have been processed successfully"""
+        self.changed += 1
+        self._entries[key] = {
+            'etag': response_headers.get('ETag'),
+            'last_modified': response_headers.get('Last-Modified'),
+            'digest': digest,
+            'size': size,
+        }
+
+    def forget(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def export(self) -> Dict[Hashable, Dict[str, Any]]:
+        """Remembered validators, for carrying conditional refreshes across a restart"""
+        return {key: dict(entry) for key, entry in self._entries.items()}
+
+    def restore(self, entries: Mapping[Hashable, Dict[str, Any]]):
+        for key, entry in entries.items():
+            self._entries.setdefault(key, dict(entry))
+
+    def stats(self) -> Dict[str, Any]:
+        skipped = self.not_modified + self.unchanged
+        return {
+            "tracked_pages": len(self._entries),
+            "fetched": self.fetched,
+            "not_modified": self.not_modified,
+            "unchanged": self.unchanged,
+            "changed": self.changed,
+            "skipped": skipped,
+            "skip_rate": round(skipped / self.fetched, 4) if self.fetched else 0.0,
+            "bytes_not_downloaded": self.bytes_not_downloaded,
+        }
+
+
+# Upstream answers that mean "try again later" rather than "this request is wrong"
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """Host-wide request rate limit: `rate` requests per second with bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        # The lock makes waiters take tokens in arrival order
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class AdaptiveConcurrency:
+    """Concurrency limit that grows while upstream is fast and halves when it pushes back (AIMD).
+
+    Every fast success adds 1/limit, so the limit grows by about one per
+    window of requests. A 429, 5xx or timeout halves it, and a success slower
+    than target_latency trims it by a tenth.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, target_latency: float):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted a slot just as we were cancelled: hand it on
+                self.release()
+            elif waiter in self._waiters:
+                # Otherwise _wake may already have dropped the cancelled waiter
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def record(self, overloaded: bool, latency: float):
+        if overloaded:
+            self.limit = max(self.minimum, self.limit / 2)
+        elif latency > self.target_latency:
+            self.limit = max(self.minimum, self.limit * 0.9)
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._wake()
+
+
+class CircuitBreaker:
+    """Stops requests to one page after repeated failures.
+
+    After `failure_threshold` failures in a row the circuit opens for
+    `cooldown` seconds, then lets a single trial request through. Each failed
+    trial doubles the cooldown, up to `max_cooldown`.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 60, max_cooldown: float = 900):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.failures = 0
+        self.trips = 0
+        self.opened_until = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if not self.opened_until:
+            return "closed"
+        return "open" if time.monotonic() < self.opened_until else "half_open"
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_until - time.monotonic())
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open" or self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.trips = 0
+        self.opened_until = 0.0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        trial_failed = self._trial_in_flight
+        self._trial_in_flight = False
+        if trial_failed or self.failures >= self.failure_threshold:
+            self.trips += 1
+            cooldown = min(self.max_cooldown, self.cooldown * 2 ** (self.trips - 1))
+            self.opened_until = time.monotonic() + cooldown
+
+    def abandon_trial(self):
+        """Let another trial through when one ended without an outcome, e.g. cancelled"""
+        self._trial_in_flight = False
+
+
+class Attempt:
+    """One upstream request: its HTTP status, or the exception that ended it"""
+    __slots__ = ('status', 'error', 'seconds')
+
+    def __init__(self, status: Optional[int], error: Optional[str], seconds: float):
+        self.status = status
+        self.error = error
+        self.seconds = seconds
+
+
+class UpstreamResult:
+    __slots__ = ('status', 'headers', 'text', 'attempts')
+
+    def __init__(self, status: int, headers: Mapping[str, str], text: str, attempts: List[Attempt]):
+        self.status = status
+        self.headers = headers
+        self.text = text
+        self.attempts = attempts
+
+
+class UpstreamError(Exception):
+    """Every attempt failed without a usable response"""
+
+    def __init__(self, message: str, attempts: List[Attempt]):
+        super().__init__(message)
+        self.attempts = attempts
+
+
+class CircuitOpenError(UpstreamError):
+    """The page's circuit is open, so no request was sent"""
+
+
+class UpstreamClient:
+    """Fetches upstream pages with per-attempt timeouts, bounded jittered retries,
+    a host-wide token bucket, adaptive concurrency and per-key circuit breakers.
+    """
+
+    def __init__(self, attempt_timeout: float = 10, max_attempts: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8,
+                 rate: float = 2, burst: int = 5,
+                 concurrency: Optional[AdaptiveConcurrency] = None,
+                 breaker_failures: int = 5, breaker_cooldown: float = 60, breaker_max_cooldown: float = 900):
+        self.attempt_timeout = attempt_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = TokenBucket(rate, burst)
+        self.concurrency = concurrency or AdaptiveConcurrency(4, 1, 8, target_latency=2)
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+        self.breaker_max_cooldown = breaker_max_cooldown
+        self._breakers: Dict[Hashable, CircuitBreaker] = {}
+        self.retries = 0
+        self.short_circuited = 0
+        self.wait_seconds = 0.0
+
+    def breaker(self, key: Hashable) -> CircuitBreaker:
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(
+                self.breaker_failures, self.breaker_cooldown, self.breaker_max_cooldown
+            )
+        return breaker
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full-jitter exponential backoff, stretched to honour a Retry-After in seconds"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        if retry_after and retry_after.strip().isdigit():
+            delay = max(delay, min(self.backoff_max, float(retry_after)))
+        return delay
+
+    async def fetch(self, session: aiohttp.ClientSession, key: Hashable, url: str,
+                    headers: Optional[Mapping[str, str]] = None) -> UpstreamResult:
+        """GET a page, retrying transient failures; the body is only read for 200 responses"""
+        breaker = self.breaker(key)
+        if not breaker.allow():
+            self.short_circuited += 1
+            raise CircuitOpenError(f"circuit open for another {breaker.retry_in():.0f}s", [])
+
+        try:
+            result, attempts, last_error = await self._attempts(session, url, headers)
+        except asyncio.CancelledError:
+            breaker.abandon_trial()
+            raise
+        except Exception:
+            # Anything unexpected (a body that does not decode, a bug) still counts against the page
+            breaker.record_failure()
+            raise
+
+        if result is not None and result.status < 400:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+
+        if result is None:
+            raise UpstreamError(f"{type(last_error).__name__}: {last_error}", attempts)
+        return result
+
+    async def _attempts(self, session: aiohttp.ClientSession, url: str, headers: Optional[Mapping[str, str]]):
+        """Up to max_attempts requests; returns the last result (None if it raised), the attempts and its error"""
+        attempts: List[Attempt] = []
+        result: Optional[UpstreamResult] = None
+        last_error: Optional[BaseException] = None
+        for attempt in range(1, self.max_attempts + 1):
+            waited = time.monotonic()
+            await self.rate_limiter.acquire()
+            await self.concurrency.acquire()
+            started = time.monotonic()
+            self.wait_seconds += started - waited
+
+            status = None
+            try:
+                async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=self.attempt_timeout)) as response:
+                    status = response.status
+                    text = await response.text() if status == 200 else ''
+                    result = UpstreamResult(status, response.headers, text, attempts)
+                last_error = None
+            except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+                result = None
+                last_error = e
+            finally:
+                self.concurrency.release()
+
+            elapsed = time.monotonic() - started
+            attempts.append(Attempt(status, type(last_error).__name__ if last_error else None, elapsed))
+            retryable = last_error is not None or status in RETRYABLE_STATUSES
+            self.concurrency.record(overloaded=retryable, latency=elapsed)
+
+            if not retryable or attempt == self.max_attempts:
+                break
+            self.retries += 1
+            retry_after = result.headers.get('Retry-After') if result is not None else None
+            await asyncio.sleep(self.backoff(attempt, retry_after))
+        return result, attempts, last_error
+
+    def stats(self) -> Dict[str, Any]:
+        open_circuits = {
+            str(key): {"state": breaker.state, "retry_in_seconds": round(breaker.retry_in(), 1), "failures": breaker.failures}
+            for key, breaker in self._breakers.items()
+            if breaker.state != "closed"
+        }
+        return {
+            "concurrency_limit": round(self.concurrency.limit, 2),
+            "in_flight": self.concurrency.in_flight,
+            "rate_per_second": self.rate_limiter.rate,
+            "burst": self.rate_limiter.burst,
+            "max_attempts": self.max_attempts,
+            "attempt_timeout_seconds": self.attempt_timeout,
+            "retries": self.retries,
+            "short_circuited": self.short_circuited,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "open_circuits": open_circuits,
+        }
@@ -1,10 +1,13 @@
 import React, { useState, useEffect, useRef, useCallback } from 'react';
 import './App.css';
 import { Calendar, ChevronLeft, ChevronRight, Clock, Film, Tv, Gamepad2, Loader2 } from 'lucide-react';
-import axios from 'axios';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
+// Unsettled rows are retried after 30s, doubling up to 5 minutes, and given up on after 6 tries
+const UNSETTLED_RETRY_MS = 30 * 1000;
+const UNSETTLED_RETRY_MAX_MS = 5 * 60 * 1000;
+const UNSETTLED_MAX_RETRIES = 6;
 
 const App = () => {
   const [scheduleData, setScheduleData] = useState(null);
@@ -12,7 +15,14 @@ const App = () => {
   const [currentDate, setCurrentDate] = useState(new Date());
   const [currentTime, setCurrentTime] = useState(new Date());
   const [error, setError] = useState(null);
+  const [unsettledRetries, setUnsettledRetries] = useState(0);
   const scrollContainerRef = useRef(null);
+  const streamControllerRef = useRef(null);
+  const versionRef = useRef(null);
+  // Program fields by program_id; streamed rows carry slim airings that point into it
+  const programsRef = useRef({});
+  // Last ETag seen per channel row, so re-checking an unsettled row costs a 304 when nothing moved
+  const channelEtagsRef = useRef({});
 
   // Format date for API
   const formatDate = (date) => {
@@ -47,21 +57,153 @@ const App = () => {
     return etTime.getHours() * 60 + etTime.getMinutes();
   }, []);
 
-  // Fetch schedule data
-  const fetchSchedule = useCallback(async (date) => {
+  // Stream schedule data, painting each channel row as soon as it arrives
+  const fetchSchedule = useCallback(async (date, { keepRows = false } = {}) => {
+    if (streamControllerRef.current) {
+      streamControllerRef.current.abort();
+    }
+    const controller = new AbortController();
+    streamControllerRef.current = controller;
+
+    const handleEvent = (event) => {
+      if (event.type === 'meta') {
+        versionRef.current = event.version;
+        setScheduleData((prev) => ({
+          current_time: event.current_time,
+          timezone: event.timezone,
+          channels: keepRows && prev ? prev.channels : new Array(event.total).fill(null),
+        }));
+      } else if (event.type === 'channel') {
+        Object.assign(programsRef.current, event.programs);
+        const schedule = {
+          ...event.schedule,
+          shows: event.schedule.shows.map((airing) => ({ ...programsRef.current[airing.program_id], ...airing })),
+        };
+        setScheduleData((prev) => {
+          const channels = [...prev.channels];
+          channels[event.index] = schedule;
+          return { ...prev, channels };
+        });
+        setLoading(false);
+      }
+    };
+
     try {
-      setLoading(true);
+      if (!keepRows) {
+        setLoading(true);
+      }
       setError(null);
-      const response = await axios.get(`${API}/schedule?date=${formatDate(date)}`);
-      setScheduleData(response.data);
+      const response = await fetch(`${API}/schedule/stream?date=${formatDate(date)}&programs=true`, {
+        signal: controller.signal,
+      });
+      if (!response.ok) {
+        throw new Error(`Schedule request failed with status ${response.status}`);
+      }
+
+      // NDJSON: one JSON event per line, possibly split across chunks
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffered = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        lines.filter((line) => line.trim()).forEach((line) => handleEvent(JSON.parse(line)));
+      }
     } catch (err) {
+      if (err.name === 'AbortError') return;
       console.error('Error fetching schedule:', err);
       setError('Failed to load TV schedule. Please try again.');
     } finally {
-      setLoading(false);
+      if (!controller.signal.aborted) {
+        setLoading(false);
+      }
     }
   }, []);
 
+  // Patch loaded rows with the shows added, changed or dropped since the last seen version
+  const applyChanges = useCallback(async (date) => {
+    const targetDate = formatDate(date);
+    try {
+      let more = true;
+      while (more) {
+        if (versionRef.current == null) {
+          return fetchSchedule(date, { keepRows: true });
+        }
+        const response = await fetch(`${API}/schedule/changes?since=${versionRef.current}&date=${targetDate}`);
+        if (!response.ok) {
+          throw new Error(`Changes request failed with status ${response.status}`);
+        }
+        const feed = await response.json();
+        if (feed.reset) {
+          return fetchSchedule(date, { keepRows: true });
+        }
+
+        if (feed.changes.length) {
+          setScheduleData((prev) => {
+            if (!prev) return prev;
+            const channels = prev.channels.map((schedule) => {
+              if (!schedule || schedule.date !== targetDate) return schedule;
+              const updates = feed.changes.filter((change) => change.channel_id === schedule.channel_id);
+              if (!updates.length) return schedule;
+
+              const showsById = new Map(schedule.shows.map((show) => [show.id, show]));
+              updates.forEach((change) => {
+                change.removed.forEach((id) => showsById.delete(id));
+                [...change.added, ...change.modified].forEach((show) => showsById.set(show.id, show));
+              });
+              const shows = [...showsById.values()].sort(
+                (a, b) => (a.start_minute ?? parseTime(a.start_time)) - (b.start_minute ?? parseTime(b.start_time))
+              );
+              return { ...schedule, shows, status: 'fresh' };
+            });
+            return { ...prev, channels };
+          });
+        }
+        versionRef.current = feed.version;
+        more = feed.more;
+      }
+    } catch (err) {
+      console.error('Error applying schedule changes:', err);
+    }
+  }, [fetchSchedule, parseTime]);
+
+  // Re-fetch only the rows still stale or pending, each with its own conditional request
+  const refetchUnsettled = useCallback(async (date, channels) => {
+    const targetDate = formatDate(date);
+    await Promise.all(channels.map(async (schedule, index) => {
+      if (!schedule || !schedule.status || schedule.status === 'fresh') return;
+      const etagKey = `${schedule.channel_id}:${targetDate}`;
+      try {
+        const headers = channelEtagsRef.current[etagKey] ? { 'If-None-Match': channelEtagsRef.current[etagKey] } : {};
+        const response = await fetch(`${API}/schedule/${schedule.channel_id}?date=${targetDate}&programs=true`, { headers });
+        if (response.status === 304) return;
+        if (!response.ok) {
+          throw new Error(`Channel request failed with status ${response.status}`);
+        }
+        channelEtagsRef.current[etagKey] = response.headers.get('ETag');
+        const channel = await response.json();
+        Object.assign(programsRef.current, channel.programs);
+        const updated = {
+          ...channel,
+          shows: channel.shows.map((airing) => ({ ...programsRef.current[airing.program_id], ...airing })),
+        };
+        delete updated.programs;
+        setScheduleData((prev) => {
+          const current = prev?.channels[index];
+          if (!current || current.channel_id !== updated.channel_id || current.date !== targetDate) return prev;
+          const rows = [...prev.channels];
+          rows[index] = updated;
+          return { ...prev, channels: rows };
+        });
+      } catch (err) {
+        console.error(`Error re-fetching ${schedule.channel_id} schedule:`, err);
+      }
+    }));
+  }, []);
+
   // Update current time every minute
   useEffect(() => {
     const updateTime = () => {
@@ -76,17 +218,39 @@ const App = () => {
 
   // Fetch initial data
   useEffect(() => {
+    setUnsettledRetries(0);
     fetchSchedule(currentDate);
+    return () => streamControllerRef.current?.abort();
   }, [currentDate, fetchSchedule]);
 
-  // Auto-refresh every 15 minutes
+  // Auto-refresh every 15 minutes, fetching only what changed
   useEffect(() => {
     const interval = setInterval(() => {
-      fetchSchedule(currentDate);
+      applyChanges(currentDate);
     }, 15 * 60 * 1000); // 15 minutes
 
     return () => clearInterval(interval);
-  }, [currentDate, fetchSchedule]);
+  }, [currentDate, applyChanges]);
+
+  // Rows served stale or still pending are re-fetched once their background refresh has had time to land,
+  // backing off while upstream stays unreachable
+  const hasUnsettledRows = Boolean(
+    scheduleData?.channels?.some((schedule) => schedule && schedule.status && schedule.status !== 'fresh')
+  );
+  useEffect(() => {
+    if (!hasUnsettledRows) {
+      setUnsettledRetries(0);
+      return undefined;
+    }
+    if (unsettledRetries >= UNSETTLED_MAX_RETRIES) return undefined;
+    const delay = Math.min(UNSETTLED_RETRY_MS * 2 ** unsettledRetries, UNSETTLED_RETRY_MAX_MS);
+    const timeout = setTimeout(async () => {
+      await refetchUnsettled(currentDate, scheduleData.channels);
+      setUnsettledRetries((retries) => retries + 1);
+    }, delay);
+
+    return () => clearTimeout(timeout);
+  }, [hasUnsettledRows, unsettledRetries, scheduleData, currentDate, refetchUnsettled]);
 
   // Handle date navigation
   const changeDate = (direction) => {
@@ -235,7 +399,7 @@ const App = () => {
 
           {/* Channels and Shows */}
           <div className="space-y-3" ref={scrollContainerRef}>
-            {scheduleData?.channels?.map((channel) => (
+            {scheduleData?.channels?.filter(Boolean).map((channel) => (
               <div key={channel.channel_id} className="flex bg-gray-900/50 rounded-lg border border-gray-800 hover:border-gray-700 transition-colors">
                 {/* Channel Logo/Name */}
                 <div className="w-48 p-4 border-r border-gray-800 flex items-center bg-gray-800/30">
@@ -244,7 +408,14 @@ const App = () => {
                   </div>
                   <div>
                     <h3 className="font-semibold text-sm">{channel.channel_name}</h3>
-                    <p className="text-xs text-gray-400">{channel.shows?.length || 0} programs</p>
+                    {channel.status === 'pending' ? (
+                      <p className="text-xs text-yellow-400">Updating…</p>
+                    ) : (
+                      <p className="text-xs text-gray-400">
+                        {channel.shows?.length || 0} programs
+                        {channel.status === 'stale' && <span className="ml-1 text-yellow-400" title="Showing the last known listing while it refreshes">• may be outdated</span>}
+                      </p>
+                    )}
                   </div>
                 </div>
 
@@ -252,8 +423,11 @@ const App = () => {
                 <div className="flex-1 relative overflow-x-auto">
                   <div className="flex min-w-[2880px]"> {/* 24 hours * 120px */}
                     {channel.shows?.map((show, index) => {
-                      const startMinutes = parseTime(show.start_time);
+                      // start_minute and duration are resolved once on the server
+                      const startMinutes = show.start_minute ?? parseTime(show.start_time);
+                      if (startMinutes >= 24 * 60) return null; // airs after midnight, belongs to the next day
                       const leftPosition = timeToPixels(startMinutes);
+                      const width = show.duration ? Math.max(timeToPixels(show.duration), 40) : 200;
                       
                       return (
                         <div
@@ -261,7 +435,7 @@ const App = () => {
                           className="absolute h-full cursor-pointer group"
                           style={{ 
                             left: `${leftPosition}px`,
-                            width: '200px', // Fixed width for now, could calculate based on duration
+                            width: `${width}px`,
                           }}
                           onClick={() => handleShowClick(show)}
                         >
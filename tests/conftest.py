@@ -0,0 +1,101 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Importing server must not start refreshes or touch the page archive and snapshot
+os.environ.setdefault('REFRESH_ENABLED', 'false')
+os.environ.setdefault('PAGE_ARCHIVE_DIR', '')
+os.environ.setdefault('SNAPSHOT_PATH', '')
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """server wired to an in-memory MongoDB, with no cached or indexed schedule state"""
+    mongomock_motor = pytest.importorskip('mongomock_motor')
+    import server
+
+    db = mongomock_motor.AsyncMongoMockClient()['tv_schedule_test']
+    monkeypatch.setattr(server, 'db', db)
+    monkeypatch.setattr(server.refresh_leases, 'collection', db.refresh_leases)
+    monkeypatch.setattr(server, 'page_archive', None)
+    server.discard_restored_state()
+    server.channel_scraped_at.clear()
+    yield db
+    server.discard_restored_state()
+    server.channel_scraped_at.clear()
+
+
+@pytest.fixture
+def api(store):
+    """GET through the ASGI app in-process: api('/api/schedule', headers) -> httpx response"""
+    import httpx
+    import server
+
+    async def request(path, headers):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await client.get(path, headers=headers or {})
+
+    return lambda path, headers=None: asyncio.run(request(path, headers))
+
+
+FIXTURES_DIR = BACKEND_DIR / 'benchmarks' / 'fixtures'
+# The day the fixture pages' day headings were written for
+FIXTURE_TODAY = '2026-10-17'
+
+
+class StubResponse:
+    def __init__(self, status, body, headers):
+        self.status = status
+        self.headers = headers
+        self._body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def text(self):
+        return self._body
+
+
+class StubSession:
+    """Stands in for the upstream aiohttp session: serves `pages` by channel url_name and counts requests"""
+
+    def __init__(self):
+        self.pages = {}
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        url_name = url.rstrip('/').split('/')[-2]
+        self.requests.append((url_name, dict(headers or {})))
+        body = self.pages.get(url_name)
+        if body is None:
+            return StubResponse(404, '', {})
+        etag = f'"{abs(hash(body))}"'
+        if (headers or {}).get('If-None-Match') == etag:
+            return StubResponse(304, '', {'ETag': etag})
+        return StubResponse(200, body, {'ETag': etag})
+
+
+@pytest.fixture
+def upstream_pages(store, monkeypatch):
+    """A stub upstream serving the benchmark fixture pages, with today pinned to the fixtures' day"""
+    import server
+    from upstream import UpstreamClient
+
+    session = StubSession()
+    for path in FIXTURES_DIR.glob('*.html'):
+        session.pages[path.stem] = path.read_text()
+    monkeypatch.setattr(server, 'upstream', type('StubPool', (), {'session': session})())
+    monkeypatch.setattr(server, 'today_et', lambda: FIXTURE_TODAY)
+    monkeypatch.setattr(server, 'page_validators', server.PageValidators())
+    monkeypatch.setattr(server, 'upstream_client', UpstreamClient(max_attempts=1, rate=1000, burst=100))
+    return session
@@ -0,0 +1,78 @@
+from datetime import datetime, timezone
+
+from change_feed import diff_shows
+from response_cache import etag_matches
+from show_records import ShowRecord
+
+SCRAPED_AT = datetime(2026, 10, 17, 12, tzinfo=timezone.utc)
+
+
+def show(start_time, title, timestamp=SCRAPED_AT):
+    record = ShowRecord.from_fields({'title': title, 'show_type': 'Series', 'start_time': start_time}, 'hbo', '2026-10-17', timestamp)
+    record.id = f'hbo:2026-10-17:{start_time}'
+    return record
+
+
+def test_diff_reports_added_modified_and_removed():
+    previous = [show('8:00 PM', 'Succession'), show('9:00 PM', 'Barbie'), show('10:00 PM', 'Dune')]
+    current = [show('8:00 PM', 'Succession'), show('9:00 PM', 'Oppenheimer'), show('11:00 PM', 'The Matrix')]
+    added, modified, removed = diff_shows(previous, current)
+    assert [s.title for s in added] == ['The Matrix']
+    assert [s.title for s in modified] == ['Oppenheimer']
+    assert removed == ['hbo:2026-10-17:10:00 PM']
+
+
+def test_diff_ignores_scrape_timestamps():
+    later = datetime(2026, 10, 17, 13, tzinfo=timezone.utc)
+    assert diff_shows([show('8:00 PM', 'Succession')], [show('8:00 PM', 'Succession', later)]) == ([], [], [])
+
+
+def test_etag_matches_exact_and_weak_tags():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+
+
+def test_etag_matches_any_tag_in_a_list():
+    assert etag_matches('"x", W/"abc" , "y"', '"abc"')
+    assert not etag_matches('"x", "y"', '"abc"')
+
+
+def test_etag_matches_wildcard_and_missing_header():
+    assert etag_matches('*', '"abc"')
+    assert not etag_matches(None, '"abc"')
+    assert not etag_matches('', '"abc"')
+
+
+def test_a_failed_store_write_records_no_change(store, monkeypatch):
+    import asyncio
+
+    import server
+    from server import harvest_shows
+
+    date = server.today_et()
+    shows = harvest_shows([
+        {'title': 'Succession', 'show_type': 'Series', 'start_time': '8:00 PM'},
+        {'title': 'Barbie', 'show_type': 'Feature Film', 'start_time': '9:00 PM'},
+    ], 'hbo', date, SCRAPED_AT)[date]
+    save = server.save_channel_shows
+
+    async def failing_save(channel_id, date, shows):
+        return False
+
+    async def scenario():
+        monkeypatch.setattr(server, 'save_channel_shows', failing_save)
+        failed = await server.publish_channel_shows('hbo', date, shows)
+        changes_after_failure = await store.schedule_changes.count_documents({})
+        monkeypatch.setattr(server, 'save_channel_shows', save)
+        retried = await server.publish_channel_shows('hbo', date, shows)
+        repeated = await server.publish_channel_shows('hbo', date, shows)
+        feed = await server.read_schedule_changes(0, date, None, 10)
+        return failed, changes_after_failure, retried, repeated, feed
+
+    failed, changes_after_failure, retried, repeated, feed = asyncio.run(scenario())
+    assert failed is None
+    assert changes_after_failure == 0
+    assert retried is True
+    assert repeated is False
+    assert [len(change['added']) for change in feed['changes']] == [2]
@@ -0,0 +1,96 @@
+import asyncio
+import gzip
+from datetime import datetime, timezone
+
+import server
+from response_cache import ResponseCache, choose_encoding
+
+DATE = '2026-10-17'
+SCRAPED_AT = datetime(2026, 10, 17, 12, tzinfo=timezone.utc)
+
+
+def publish(*titles):
+    fields = [
+        {'title': title, 'show_type': 'Series', 'start_time': f'{8 + hour}:00 PM', 'description': 'An episode. ' * 20}
+        for hour, title in enumerate(titles)
+    ]
+    asyncio.run(server.publish_channel_shows('hbo', DATE, server.harvest_shows(fields, 'hbo', DATE, SCRAPED_AT)[DATE]))
+
+
+def revalidates(api, path):
+    first = api(path)
+    assert first.status_code == 200
+    etag = first.headers['etag']
+    again = api(path, {'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.content == b''
+    assert again.headers['etag'] == etag
+    return etag
+
+
+def test_schedule_is_revalidated_until_a_channel_changes(api):
+    publish('Succession')
+    path = f'/api/schedule?date={DATE}&channels=hbo,cinemax'
+    etag = revalidates(api, path)
+
+    publish('Succession', 'Barbie')
+    changed = api(path, {'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['etag'] != etag
+    assert [show['title'] for show in changed.json()['channels'][0]['shows']] == ['Succession', 'Barbie']
+
+
+def test_channel_schedule_is_revalidated_until_it_changes(api):
+    publish('Succession')
+    path = f'/api/schedule/hbo?date={DATE}'
+    etag = revalidates(api, path)
+    assert revalidates(api, path + '&programs=true') != etag
+
+    publish('Barbie')
+    assert api(path, {'If-None-Match': etag}).status_code == 200
+
+
+def test_weak_and_listed_etags_match(api):
+    path = f'/api/schedule/hbo?date={DATE}'
+    etag = api(path).headers['etag']
+    assert api(path, {'If-None-Match': f'"other", W/{etag}'}).status_code == 304
+
+
+def test_bodies_are_compressed_for_clients_that_accept_it(api):
+    publish('Succession', 'Barbie')
+    path = f'/api/schedule?date={DATE}&channels=hbo'
+    response = api(path, {'Accept-Encoding': 'gzip'})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.headers['vary'] == 'Accept-Encoding'
+    plain = api(path, {'Accept-Encoding': 'identity'})
+    assert 'content-encoding' not in plain.headers
+    assert response.json() == plain.json()
+
+
+def test_encoding_negotiation():
+    assert choose_encoding('gzip, deflate') == 'gzip'
+    assert choose_encoding('gzip;q=0, identity') == 'identity'
+    assert choose_encoding('') == 'identity'
+    assert choose_encoding('*') in ('br', 'gzip')
+
+
+def test_rendered_bodies_are_reused_and_compressed_once():
+    cache = ResponseCache(max_entries=1)
+    renders = []
+    body = b'{"shows": []}' * 100
+
+    def render():
+        renders.append(1)
+        return body
+
+    entry = cache.get_or_render('"a"', render)
+    assert cache.get_or_render('"a"', render) is entry
+    assert gzip.decompress(cache.encode(entry, 'gzip')[0]) == body
+    cache.encode(entry, 'gzip')
+    assert cache.stats()['compressions'] == 1
+    assert len(renders) == 1
+
+    # Small bodies go out as they are
+    small = cache.get_or_render('"b"', lambda: b'{}')
+    assert cache.encode(small, 'gzip') == (b'{}', 'identity')
+    assert len(cache) == 1
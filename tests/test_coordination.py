@@ -0,0 +1,110 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+from coordination import LeaseManager
+
+DATE = '2026-10-17'
+SCRAPED_AT = datetime(2026, 10, 17, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def leases(store):
+    return store.refresh_leases
+
+
+def test_a_held_lease_is_refused_to_other_workers_until_released(leases):
+    ours, theirs = LeaseManager(leases, 'ours'), LeaseManager(leases, 'theirs')
+
+    async def scenario():
+        assert await ours.acquire('refresh:hbo', 60)
+        assert not await theirs.acquire('refresh:hbo', 60)
+        await ours.release('refresh:hbo')
+        assert await theirs.acquire('refresh:hbo', 60)
+
+    asyncio.run(scenario())
+    assert theirs.stats()['contended'] == 1
+    assert theirs.stats()['held'] == ['refresh:hbo']
+    assert ours.stats()['held'] == []
+
+
+def test_an_expired_lease_can_be_taken_over(leases):
+    ours, theirs = LeaseManager(leases, 'ours'), LeaseManager(leases, 'theirs')
+
+    async def scenario():
+        assert await theirs.acquire('refresh:hbo', 60)
+        expired = datetime.now(timezone.utc) - timedelta(seconds=1)
+        await leases.update_one({'_id': 'refresh:hbo'}, {'$set': {'expires_at': expired}})
+        assert await ours.acquire('refresh:hbo', 60)
+        return await leases.find_one({'_id': 'refresh:hbo'})
+
+    assert asyncio.run(scenario())['owner'] == 'ours'
+
+
+def test_a_lease_is_kept_until_its_last_local_holder_releases_it(leases):
+    ours, theirs = LeaseManager(leases, 'ours'), LeaseManager(leases, 'theirs')
+
+    async def scenario():
+        assert await ours.acquire('refresh:hbo', 60)
+        assert await ours.acquire('refresh:hbo', 60)
+        await ours.release('refresh:hbo')
+        assert not await theirs.acquire('refresh:hbo', 60)
+        await ours.release('refresh:hbo')
+        assert await theirs.acquire('refresh:hbo', 60)
+
+    asyncio.run(scenario())
+
+
+def test_wait_released_gives_up_after_the_timeout(leases):
+    ours = LeaseManager(leases, 'ours')
+
+    async def scenario():
+        await ours.acquire('refresh:hbo', 60)
+        assert not await ours.wait_released('refresh:hbo', 0.05, poll=0.01)
+        asyncio.get_running_loop().call_later(0.05, lambda: asyncio.ensure_future(ours.release('refresh:hbo')))
+        assert await ours.wait_released('refresh:hbo', 1, poll=0.01)
+
+    asyncio.run(scenario())
+
+
+def test_an_unreachable_store_fails_open():
+    class Unreachable:
+        async def update_one(self, *args, **kwargs):
+            raise ConnectionError('no route to host')
+
+    lease = LeaseManager(Unreachable(), 'ours')
+    assert asyncio.run(lease.acquire('refresh:hbo', 60))
+    assert lease.stats()['errors'] == 1
+
+
+def test_peer_refreshes_reach_this_workers_cache_and_indexes(store, monkeypatch):
+    fields = [{'title': 'Succession', 'show_type': 'Series', 'start_time': '8:00 PM'}]
+    shows = server.harvest_shows(fields, 'hbo', DATE, SCRAPED_AT)[DATE]
+    since = datetime.now(timezone.utc)
+
+    # Another worker publishes; this one has none of it in memory
+    worker = server.WORKER_ID
+    monkeypatch.setattr(server, 'WORKER_ID', 'peer')
+    asyncio.run(server.publish_channel_shows('hbo', DATE, shows))
+    monkeypatch.setattr(server, 'WORKER_ID', worker)
+    server.discard_restored_state()
+    server.schedule_cache.put(('hbo', DATE), server.build_channel_day('hbo', DATE, []))
+
+    asyncio.run(server.apply_peer_refreshes(since))
+    assert server.known_versions[('hbo', DATE)] == server.build_channel_day('hbo', DATE, shows).version
+    assert server.schedule_cache.get(('hbo', DATE)) is None
+    assert server.interval_index.at('hbo', shows[0].start_epoch).title == 'Succession'
+    assert server.search_index.search('succession')[0] == 1
+
+
+def test_own_refreshes_are_not_applied_again(store):
+    fields = [{'title': 'Succession', 'show_type': 'Series', 'start_time': '8:00 PM'}]
+    shows = server.harvest_shows(fields, 'hbo', DATE, SCRAPED_AT)[DATE]
+    since = datetime.now(timezone.utc)
+    asyncio.run(server.publish_channel_shows('hbo', DATE, shows))
+    cached = server.schedule_cache.get(('hbo', DATE))
+
+    asyncio.run(server.apply_peer_refreshes(since))
+    assert server.schedule_cache.get(('hbo', DATE)) is cached
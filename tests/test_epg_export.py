@@ -0,0 +1,95 @@
+import asyncio
+import json
+import xml.etree.ElementTree as ElementTree
+from datetime import datetime, timezone
+
+import server
+from epg_export import xmltv_programme
+
+SCRAPED_AT = datetime(2026, 10, 17, 12, tzinfo=timezone.utc)
+
+
+def publish(channel_id, date, listings):
+    fields = [
+        {'title': title, 'show_type': show_type, 'start_time': start_time, **extra}
+        for start_time, title, show_type, extra in listings
+    ]
+    shows = server.harvest_shows(fields, channel_id, date, SCRAPED_AT)[date]
+    asyncio.run(server.publish_channel_shows(channel_id, date, shows))
+
+
+def publish_two_days():
+    publish('hbo', '2026-10-17', [
+        ('8:00 PM', 'Succession', 'Series', {'season': 'Season 4', 'episode': 'Episode 10', 'episode_title': 'With Open Eyes'}),
+        ('11:00 PM', 'Barbie & Ken', 'Feature Film', {'year': '2023'}),
+        # Past midnight: the same airing heads the next day's listing
+        ('1:00 AM', 'Dune', 'Feature Film', {}),
+    ])
+    publish('hbo', '2026-10-18', [('1:00 AM', 'Dune', 'Feature Film', {}), ('3:30 AM', 'Real Time', 'Series', {})])
+
+
+def test_programme_times_are_eastern_and_fields_are_escaped():
+    programme = ElementTree.fromstring(xmltv_programme({
+        'channel_id': 'hbo', 'start_epoch': 1792281600, 'duration': None, 'title': 'Barbie & Ken\x07',
+        'show_type': 'Feature Film', 'year': '2023', 'season': 'Season 2', 'episode': 'Episode 5',
+    }))
+    assert programme.get('start') == '20261017200000 -0400'
+    # No known length: the default hour
+    assert programme.get('stop') == '20261017210000 -0400'
+    assert programme.findtext('title') == 'Barbie & Ken'
+    assert programme.findtext('category') == 'Feature Film'
+    assert [num.text for num in programme.findall('episode-num')] == ['1.4.', 'S2E5']
+
+
+def test_xmltv_export_lists_channels_then_each_airing_once(api):
+    publish_two_days()
+    response = api('/api/export/xmltv?date=2026-10-17&days=2&channels=hbo,tnt')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/xml')
+    guide = ElementTree.fromstring(response.content)
+    assert [channel.get('id') for channel in guide.findall('channel')] == ['hbo', 'tnt']
+    programmes = guide.findall('programme')
+    assert [programme.findtext('title') for programme in programmes] == [
+        'Succession', 'Barbie & Ken', 'Dune', 'Real Time'
+    ]
+    assert programmes[0].findtext('sub-title') == 'With Open Eyes'
+    assert programmes[1].get('stop') == programmes[2].get('start')
+
+
+def test_export_covers_only_the_requested_days(api):
+    publish_two_days()
+    guide = ElementTree.fromstring(api('/api/export/xmltv?date=2026-10-18&days=1&channels=hbo').content)
+    assert [programme.findtext('title') for programme in guide.findall('programme')] == ['Dune', 'Real Time']
+
+
+def test_jsonl_export_sends_each_program_before_its_first_airing(api):
+    publish_two_days()
+    publish('tnt', '2026-10-17', [('9:00 PM', 'Dune', 'Feature Film', {})])
+    response = api('/api/export/jsonl?date=2026-10-17&days=2&channels=hbo,tnt&programs=true')
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line['type'] for line in lines[:2]] == ['channel', 'channel']
+    seen = set()
+    for line in lines[2:]:
+        if line['type'] == 'program':
+            assert line['program_id'] not in seen
+            seen.add(line['program_id'])
+        else:
+            assert line['type'] == 'airing' and line['program_id'] in seen
+            assert 'title' not in line
+    assert sum(line['type'] == 'airing' for line in lines) == 5
+    assert sum(line['type'] == 'program' for line in lines) == 4
+
+    plain = api('/api/export/jsonl?date=2026-10-17&days=2&channels=hbo').text.splitlines()
+    assert json.loads(plain[1])['type'] == 'show' and json.loads(plain[1])['title'] == 'Succession'
+
+
+def test_export_is_gzipped_on_the_fly_for_clients_that_accept_it(api):
+    publish_two_days()
+    path = '/api/export/xmltv?date=2026-10-17&days=2&channels=hbo'
+    zipped = api(path, {'Accept-Encoding': 'gzip'})
+    assert zipped.headers['content-encoding'] == 'gzip'
+    assert zipped.content == api(path, {'Accept-Encoding': 'identity'}).content
+
+
+def test_export_rejects_a_malformed_date(api):
+    assert api('/api/export/xmltv?date=17-10-2026').status_code == 400
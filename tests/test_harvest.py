@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+from pathlib import Path
+
+from schedule_parser import parse_schedule
+from server import harvest_shows
+
+SCRAPED_AT = datetime(2026, 10, 17, 12, tzinfo=timezone.utc)
+FIXTURE = Path(__file__).resolve().parent.parent / 'backend' / 'benchmarks' / 'fixtures' / 'hbo.html'
+
+
+def fields(start_time, title, day=None):
+    entry = {'title': title, 'show_type': 'Series', 'start_time': start_time}
+    if day is not None:
+        entry['day'] = day
+    return entry
+
+
+def test_listings_are_dated_by_their_day_heading():
+    harvest = harvest_shows([
+        fields('8:00 PM', 'Succession', 'Saturday, October 17'),
+        fields('10:00 PM', 'Barbie', 'Saturday, October 17'),
+        fields('6:00 AM', 'Dune', 'Sunday, October 18'),
+    ], 'hbo', '2026-10-17', SCRAPED_AT)
+    assert list(harvest) == ['2026-10-17', '2026-10-18']
+    assert [show.title for show in harvest['2026-10-17']] == ['Succession', 'Barbie']
+    assert all(show.date == '2026-10-18' and show.channel_id == 'hbo' for show in harvest['2026-10-18'])
+
+
+def test_unheaded_page_rolls_over_at_midnight():
+    harvest = harvest_shows([
+        fields('10:00 PM', 'Succession'),
+        fields('11:30 PM', 'Barbie'),
+        fields('1:00 AM', 'Dune'),
+    ], 'hbo', '2026-10-17', SCRAPED_AT)
+    assert [show.title for show in harvest['2026-10-17']] == ['Succession', 'Barbie']
+    assert [show.title for show in harvest['2026-10-18']] == ['Dune']
+
+
+def test_last_show_of_a_day_ends_where_the_next_day_starts():
+    harvest = harvest_shows([
+        fields('10:00 PM', 'Succession', 'Saturday, October 17'),
+        fields('11:30 PM', 'Barbie', 'Saturday, October 17'),
+        fields('1:00 AM', 'Dune', 'Sunday, October 18'),
+    ], 'hbo', '2026-10-17', SCRAPED_AT)
+    succession, barbie = harvest['2026-10-17']
+    assert succession.end_time == '11:30 PM'
+    assert barbie.end_time == '1:00 AM'
+    assert barbie.duration == 90
+
+
+def test_fixture_page_is_harvested_into_every_listed_day():
+    show_fields = parse_schedule(FIXTURE.read_text())
+    harvest = harvest_shows(show_fields, 'hbo', '2026-10-17', SCRAPED_AT)
+    assert list(harvest) == sorted(harvest)
+    assert sum(len(shows) for shows in harvest.values()) == len(show_fields)
+    for date, shows in harvest.items():
+        epochs = [show.start_epoch for show in shows if show.start_epoch is not None]
+        assert epochs == sorted(epochs)
+        assert len({show.id for show in shows}) == len(shows)
+        assert all(show.date == date for show in shows)
@@ -0,0 +1,72 @@
+import asyncio
+from datetime import datetime, timezone
+
+import server
+from interval_index import DEFAULT_LAST_SHOW_SECONDS, IntervalIndex
+
+DATE = '2026-10-17'
+SCRAPED_AT = datetime(2026, 10, 17, 12, tzinfo=timezone.utc)
+
+
+def shows(*listings, date=DATE):
+    fields = [{'title': title, 'show_type': 'Series', 'start_time': start_time} for start_time, title in listings]
+    return server.harvest_shows(fields, 'hbo', date, SCRAPED_AT)[date]
+
+
+def test_each_show_covers_until_the_next_one_starts():
+    index = IntervalIndex()
+    succession, barbie = shows(('8:00 PM', 'Succession'), ('9:00 PM', 'Barbie'))
+    index.update('hbo', DATE, [succession, barbie])
+    assert index.at('hbo', succession.start_epoch - 1) is None
+    assert index.at('hbo', succession.start_epoch) is succession
+    assert index.at('hbo', barbie.start_epoch - 1) is succession
+    assert index.at('hbo', barbie.start_epoch + DEFAULT_LAST_SHOW_SECONDS - 1) is barbie
+    assert index.at('hbo', barbie.start_epoch + DEFAULT_LAST_SHOW_SECONDS) is None
+    assert index.at('cinemax', succession.start_epoch) is None
+
+
+def test_later_date_wins_for_an_airing_listed_on_both():
+    index = IntervalIndex()
+    late_show, = shows(('11:00 PM', 'Succession'))
+    # The same start time listed again under the next day, as a page carried past midnight does
+    carried = shows(('11:00 PM', 'Barbie'))[0]
+    carried.date = '2026-10-18'
+    index.update('hbo', DATE, [late_show])
+    index.update('hbo', '2026-10-18', [carried])
+    assert index.at('hbo', late_show.start_epoch).title == 'Barbie'
+
+
+def test_only_the_most_recent_days_are_kept():
+    index = IntervalIndex(max_days=2)
+    for day in ('2026-10-17', '2026-10-18', '2026-10-19'):
+        index.update('hbo', day, shows(('8:00 PM', day), date=day))
+    first, = shows(('8:00 PM', 'Succession'), date='2026-10-17')
+    last, = shows(('8:00 PM', 'Succession'), date='2026-10-19')
+    assert index.at('hbo', first.start_epoch) is None
+    assert index.at('hbo', last.start_epoch).title == '2026-10-19'
+
+
+def test_at_answers_from_published_listings(api):
+    asyncio.run(server.publish_channel_shows('hbo', DATE, shows(('8:00 PM', 'Succession'), ('9:00 PM', 'Barbie'))))
+
+    # No offset means Eastern time
+    airing = api('/api/at?time=2026-10-17T20:30:00').json()
+    assert airing['time'] == '2026-10-17 20:30:00'
+    assert len(airing['channels']) == len(server.CHANNELS)
+    on_air = {channel['channel_id']: channel['show'] for channel in airing['channels']}
+    assert on_air['hbo']['title'] == 'Succession'
+    assert on_air['cinemax'] is None
+
+    airing = api(f"/api/at?time={airing['epoch'] + 3600}").json()
+    assert airing['time'] == '2026-10-17 21:30:00'
+    assert {channel['channel_id']: channel['show'] for channel in airing['channels']}['hbo']['title'] == 'Barbie'
+
+
+def test_at_rejects_an_unreadable_time(api):
+    assert api('/api/at?time=tonight').status_code == 400
+
+
+def test_now_lists_every_channel(api):
+    airing = api('/api/now').json()
+    assert airing['timezone'] == 'America/New_York'
+    assert [channel['channel_id'] for channel in airing['channels']] == [c['id'] for c in server.CHANNELS]
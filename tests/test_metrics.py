@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+import server
+from metrics import MetricsRegistry
+
+HBO = next(channel for channel in server.CHANNELS if channel['id'] == 'hbo')
+
+
+def sample(text, line_start):
+    """The value of the first exposition line starting with `line_start`"""
+    return float(next(line for line in text.splitlines() if line.startswith(line_start)).rsplit(' ', 1)[1])
+
+
+def test_registry_renders_the_text_exposition_format():
+    registry = MetricsRegistry(namespace='tv')
+    served = registry.counter('served_total', 'Things served', ['status'])
+    served.labels('fresh').inc()
+    served.labels('fresh').inc(2)
+    served.labels('say "hi"').inc()
+    registry.gauge('in_flight', 'Running now').set(4)
+    registry.callback('entries', 'Read when rendered', 'gauge', lambda: 7)
+
+    assert registry.render().splitlines() == [
+        '# HELP tv_served_total Things served',
+        '# TYPE tv_served_total counter',
+        'tv_served_total{status="fresh"} 3',
+        'tv_served_total{status="say \\"hi\\""} 1',
+        '# HELP tv_in_flight Running now',
+        '# TYPE tv_in_flight gauge',
+        'tv_in_flight 4',
+        '# HELP tv_entries Read when rendered',
+        '# TYPE tv_entries gauge',
+        'tv_entries 7',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    seconds = registry.histogram('fetch_seconds', 'Fetch time', buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.7, 3):
+        seconds.observe(value)
+    text = registry.render()
+    assert sample(text, 'fetch_seconds_bucket{le="0.1"}') == 1
+    assert sample(text, 'fetch_seconds_bucket{le="1.0"}') == 3
+    assert sample(text, 'fetch_seconds_bucket{le="+Inf"}') == 4
+    assert sample(text, 'fetch_seconds_count') == 4
+    assert sample(text, 'fetch_seconds_sum') == pytest.approx(4.25)
+
+
+def test_registry_rejects_duplicates_and_wrong_labels():
+    registry = MetricsRegistry()
+    served = registry.counter('served_total', 'Things served', ['status'])
+    with pytest.raises(ValueError):
+        registry.counter('served_total', 'Again')
+    with pytest.raises(ValueError):
+        served.labels('fresh', 'extra')
+
+
+def test_a_failing_callback_does_not_break_the_scrape():
+    registry = MetricsRegistry()
+    registry.callback('broken', 'Raises', 'gauge', lambda: 1 / 0)
+    registry.gauge('fine', 'Works').set(1)
+    assert registry.render().splitlines()[-1] == 'fine 1'
+
+
+def test_scrape_is_instrumented_per_channel(upstream_pages, api):
+    before = api('/api/metrics').text
+    assert asyncio.run(server.scrape_and_publish(HBO, server.today_et()))
+
+    response = api('/api/metrics')
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    text = response.text
+    responses = 'tv_upstream_responses_total{channel="hbo",status="200"}'
+    assert sample(text, responses) == (sample(before, responses) if responses in before else 0) + 1
+    for stage in ('fetch', 'parse', 'build', 'serialize'):
+        assert f'tv_scrape_stage_seconds_count{{channel="hbo",stage="{stage}"}}' in text
+    assert sample(text, 'tv_scrapes_in_flight') == 0
@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+
+import replay_archive
+import server
+from page_archive import PageArchive
+
+from .conftest import FIXTURE_TODAY, FIXTURES_DIR
+
+# Noon in New York on the day the fixture pages were written for
+FETCHED_AT = datetime(2026, 10, 17, 16, tzinfo=timezone.utc)
+
+
+def test_pages_are_stored_compressed_and_read_back(tmp_path):
+    archive = PageArchive(tmp_path)
+    path = archive.store('hbo', '<html>Succession</html>', FETCHED_AT)
+    assert path.name.startswith('20261017T160000Z-') and path.suffixes == ['.html', '.gz']
+    page, = archive.entries()
+    assert (page.channel_id, page.fetched_at, page.path) == ('hbo', FETCHED_AT, path)
+    assert page.read() == '<html>Succession</html>'
+    assert not list(tmp_path.glob('*/*.tmp'))
+
+
+def test_a_page_identical_to_the_previous_one_is_not_stored_again(tmp_path):
+    archive = PageArchive(tmp_path)
+    assert archive.store('hbo', 'first', FETCHED_AT)
+    assert archive.store('hbo', 'first', FETCHED_AT + timedelta(minutes=15)) is None
+    assert archive.store('hbo', 'second', FETCHED_AT + timedelta(minutes=30))
+    assert archive.store('tnt', 'first', FETCHED_AT)
+    assert archive.stats()['pages'] == 3
+    assert archive.stats()['duplicates'] == 1
+
+
+def test_entries_filter_by_channel_and_fetch_time(tmp_path):
+    archive = PageArchive(tmp_path)
+    for hours in range(3):
+        archive.store('hbo', f'page {hours}', FETCHED_AT + timedelta(hours=hours))
+    archive.store('tnt', 'page', FETCHED_AT)
+    later = archive.entries(['hbo'], since=FETCHED_AT + timedelta(hours=1))
+    assert [page.read() for page in later] == ['page 1', 'page 2']
+    assert [page.read() for page in archive.entries(until=FETCHED_AT)] == ['page 0', 'page']
+    assert archive.latest('hbo').read() == 'page 2'
+
+
+def test_prune_drops_expired_pages_then_the_oldest_over_the_size_cap(tmp_path):
+    now = datetime.now(timezone.utc)
+    archive = PageArchive(tmp_path, retention_days=1)
+    for hours in (3, 2, 1):
+        archive.store('hbo', os.urandom(64).hex(), now - timedelta(hours=hours))
+    # Stored after the first write ran its prune, so it is still on disk
+    archive.store('hbo', 'expired', now - timedelta(days=2))
+    kept = list(archive.entries())[-2:]
+    archive.max_bytes = sum(page.size for page in kept)
+    assert archive.prune() == 2
+    assert [page.path for page in archive.entries()] == [page.path for page in kept]
+
+
+def replay(archive_dir, **options):
+    args = argparse.Namespace(**{
+        'archive': str(archive_dir), 'channels': None, 'since': None, 'until': None,
+        'latest': False, 'workers': 1, 'concurrency': 4, 'dry_run': False, **options
+    })
+    return asyncio.run(replay_archive.run(args))
+
+
+def test_replay_publishes_every_day_on_the_archived_page(tmp_path, store):
+    PageArchive(tmp_path).store('hbo', (FIXTURES_DIR / 'hbo.html').read_text(), FETCHED_AT)
+
+    report = replay(tmp_path, channels='hbo,tnt')
+    assert report['pages'] == 1
+    assert report['published'] == report['channel_days'] == 3
+    assert sorted(asyncio.run(store.shows.distinct('date'))) == ['2026-10-17', '2026-10-18', '2026-10-19']
+    # Replayed days carry the time their page was fetched, not the time of the replay
+    refresh = asyncio.run(store.channel_refreshes.find_one({'_id': f'hbo:{FIXTURE_TODAY}'}))
+    assert refresh['refreshed_at'].replace(tzinfo=timezone.utc) == FETCHED_AT
+    assert server.schedule_cache.get(('hbo', FIXTURE_TODAY)).refreshed_at == FETCHED_AT.timestamp()
+
+
+def test_the_newest_page_listing_a_day_wins(tmp_path, store):
+    archive = PageArchive(tmp_path)
+    archive.store('hbo', (FIXTURES_DIR / 'hbo.html').read_text(), FETCHED_AT)
+    # Any later page listing the same days will do
+    newer = (FIXTURES_DIR / 'tnt.html').read_text()
+    archive.store('hbo', newer, FETCHED_AT + timedelta(hours=1))
+
+    replay(tmp_path)
+    show_fields, _ = server.parse_schedule_counted(newer, 'lxml')
+    expected = server.harvest_shows(show_fields, 'hbo', FIXTURE_TODAY, FETCHED_AT)[FIXTURE_TODAY]
+    shows = asyncio.run(server.load_stored_schedule(['hbo'], FIXTURE_TODAY))['hbo']
+    assert [show.title for show in shows] == [show.title for show in expected]
+
+
+def test_dry_run_writes_nothing(tmp_path, store):
+    PageArchive(tmp_path).store('hbo', (FIXTURES_DIR / 'hbo.html').read_text(), FETCHED_AT)
+    report = replay(tmp_path, dry_run=True)
+    assert report['channel_days'] == 3
+    assert report['published'] == 0
+    assert asyncio.run(store.shows.count_documents({})) == 0
@@ -0,0 +1,90 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import server
+from program_catalog import ProgramCatalog
+from show_records import program_fingerprint
+
+DATE = '2026-10-17'
+SCRAPED_AT = datetime(2026, 10, 17, 12, tzinfo=timezone.utc)
+DUNE = {'title': 'Dune', 'show_type': 'Feature Film', 'year': '2021', 'description': 'Paul Atreides leaves Caladan.'}
+
+
+def publish(channel_id, start_time, program):
+    shows = server.harvest_shows([{**program, 'start_time': start_time}], channel_id, DATE, SCRAPED_AT)[DATE]
+    asyncio.run(server.publish_channel_shows(channel_id, DATE, shows))
+    return shows
+
+
+def test_fingerprint_ignores_case_and_whitespace_but_not_content():
+    respaced = {**DUNE, 'title': ' DUNE ', 'description': 'Paul  Atreides leaves Caladan.'}
+    assert program_fingerprint(DUNE) == program_fingerprint(respaced)
+    assert program_fingerprint(DUNE) != program_fingerprint({**DUNE, 'description': 'Paul Atreides arrives on Arrakis.'})
+    assert program_fingerprint(DUNE) != program_fingerprint({**DUNE, 'year': '1984'})
+
+
+def test_catalog_evicts_least_recently_used_programs():
+    catalog = ProgramCatalog(max_entries=2)
+    catalog.put('a', {'title': 'A'})
+    catalog.put('b', {'title': 'B'})
+    catalog.get('a')
+    catalog.put('c', {'title': 'C'})
+    assert catalog.get('b') is None
+    assert catalog.missing(['a', 'b', 'c', 'b']) == ['b']
+    assert catalog.stats()['evictions'] == 1
+
+
+def test_catalog_remembers_how_long_the_store_keeps_a_program():
+    catalog = ProgramCatalog()
+    expires_at = datetime(2026, 10, 25, tzinfo=timezone.utc)
+    catalog.put('a', {'title': 'A'})
+    assert catalog.needs_store('a', expires_at)
+    catalog.mark_stored('a', expires_at)
+    assert not catalog.needs_store('a', expires_at - timedelta(days=1))
+    assert catalog.needs_store('a', expires_at + timedelta(days=1))
+
+
+def test_a_program_airing_on_two_channels_is_stored_once(store):
+    publish('hbo', '8:00 PM', DUNE)
+    publish('hbo2', '10:00 PM', DUNE)
+
+    assert asyncio.run(store.programs.count_documents({})) == 1
+    airings = asyncio.run(store.shows.find({}, {'_id': 0}).to_list(length=None))
+    assert len(airings) == 2
+    assert len({airing['program_id'] for airing in airings}) == 1
+    assert all('title' not in airing for airing in airings)
+
+
+def test_a_republished_program_is_not_written_again(store, monkeypatch):
+    publish('hbo', '8:00 PM', DUNE)
+    writes = []
+    bulk_write = store.programs.bulk_write
+
+    async def counting_bulk_write(operations, **kwargs):
+        writes.append(len(operations))
+        return await bulk_write(operations, **kwargs)
+
+    monkeypatch.setattr(store.programs, 'bulk_write', counting_bulk_write)
+    publish('hbo2', '10:00 PM', DUNE)
+    assert writes == []
+
+
+def test_airings_are_joined_with_programs_from_the_store_after_a_restart(store):
+    shows = publish('hbo', '8:00 PM', DUNE)
+    server.discard_restored_state()
+
+    stored = asyncio.run(server.load_stored_schedule(['hbo'], DATE))['hbo']
+    assert [show.to_dict() for show in stored] == [
+        {**show.to_dict(), 'timestamp': stored[0].timestamp} for show in shows
+    ]
+    assert server.program_catalog.get(shows[0].program_id)['description'] == DUNE['description']
+
+
+def test_documents_stored_before_the_catalog_still_load(store):
+    asyncio.run(store.shows.insert_one({
+        **DUNE, 'id': 'legacy', 'start_time': '8:00 PM', 'start_minute': 1200, 'channel_id': 'hbo', 'date': DATE,
+        'timestamp': SCRAPED_AT.replace(tzinfo=None),
+    }))
+    show, = asyncio.run(server.load_stored_schedule(['hbo'], DATE))['hbo']
+    assert show.title == 'Dune'
+    assert show.program_id == program_fingerprint(DUNE)
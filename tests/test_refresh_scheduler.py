@@ -0,0 +1,165 @@
+import asyncio
+
+import pytest
+
+from refresh_scheduler import URGENT_PRIORITY, RefreshPolicy, RefreshScheduler
+
+CHANNELS = [{'id': 'hbo'}, {'id': 'cnn'}, {'id': 'tnt'}]
+DATES = ['2026-10-17', '2026-10-18', '2026-10-19']
+
+
+def drain_order(scheduler):
+    order = []
+    while not scheduler._queue.empty():
+        _, _, key = scheduler._queue.get_nowait()
+        order.append(key)
+    return order
+
+
+def make_scheduler(viewport=None):
+    async def refresh(channel, date):
+        return True
+
+    return RefreshScheduler(refresh, CHANNELS, today=lambda: DATES[0], days_ahead=2, jitter=0, viewport=viewport)
+
+
+def test_without_a_viewport_today_comes_first_in_grid_order():
+    async def scenario():
+        scheduler = make_scheduler()
+        scheduler.schedule_cycle()
+        return drain_order(scheduler)
+
+    order = asyncio.run(scenario())
+    assert order[:3] == [('hbo', DATES[0]), ('cnn', DATES[0]), ('tnt', DATES[0])]
+    assert order[-1] == ('tnt', DATES[2])
+
+
+def test_channels_missing_on_screen_hours_go_first():
+    coverage = {'2026-10-17': {'hbo': True, 'cnn': False, 'tnt': True}}
+
+    async def scenario():
+        scheduler = make_scheduler(lambda channel_id, date: coverage.get(date, {}).get(channel_id))
+        scheduler.schedule_cycle()
+        return drain_order(scheduler)
+
+    order = asyncio.run(scenario())
+    assert order[:3] == [('cnn', DATES[0]), ('hbo', DATES[0]), ('tnt', DATES[0])]
+    assert [date for _, date in order[3:]] == [DATES[1]] * 3 + [DATES[2]] * 3
+
+
+def test_tomorrow_joins_the_viewport_past_midnight():
+    coverage = {
+        '2026-10-17': {'hbo': True, 'cnn': True, 'tnt': True},
+        '2026-10-18': {'hbo': True, 'cnn': True, 'tnt': False},
+    }
+
+    async def scenario():
+        scheduler = make_scheduler(lambda channel_id, date: coverage.get(date, {}).get(channel_id))
+        scheduler.schedule_cycle()
+        return drain_order(scheduler)
+
+    order = asyncio.run(scenario())
+    assert order[0] == ('tnt', DATES[1])
+    assert {date for _, date in order[:6]} == {DATES[0], DATES[1]}
+
+
+def test_urgent_refreshes_run_before_everything():
+    async def scenario():
+        scheduler = make_scheduler(lambda channel_id, date: False)
+        scheduler.schedule_cycle()
+        scheduler.expedite('tnt', DATES[2])
+        return drain_order(scheduler)
+
+    order = asyncio.run(scenario())
+    assert order[0] == ('tnt', DATES[2])
+    assert URGENT_PRIORITY < (0, 0, 0)
+
+
+def test_a_key_just_attempted_is_not_expedited_again():
+    attempts = []
+
+    async def refresh(channel, date):
+        attempts.append((channel['id'], date))
+        return False
+
+    async def scenario():
+        scheduler = RefreshScheduler(refresh, CHANNELS, today=lambda: DATES[0], jitter=0, retry_after=60)
+        # A date the page does not list: the attempt fails and stores nothing
+        await scheduler._run(('hbo', DATES[0]))
+        assert not scheduler.expedite('hbo', DATES[0])
+        assert not await asyncio.wait_for(scheduler.wait_for('hbo', DATES[0], 5), 0.1)
+        assert scheduler.expedite('cnn', DATES[0])
+        return drain_order(scheduler)
+
+    assert asyncio.run(scenario()) == [('cnn', DATES[0])]
+    assert attempts == [('hbo', DATES[0])]
+
+
+def test_a_key_can_be_expedited_again_once_the_retry_window_passes():
+    async def refresh(channel, date):
+        return False
+
+    async def scenario():
+        scheduler = RefreshScheduler(refresh, CHANNELS, today=lambda: DATES[0], jitter=0, retry_after=0)
+        await scheduler._run(('hbo', DATES[0]))
+        return scheduler.expedite('hbo', DATES[0])
+
+    assert asyncio.run(scenario())
+
+
+def test_interval_shortens_for_channels_that_change_and_lengthens_for_those_that_do_not():
+    policy = RefreshPolicy(CHANNELS, min_interval=300, max_interval=3600)
+    assert policy.interval('hbo') == pytest.approx(1950)
+    for _ in range(30):
+        policy.record('hbo', True)
+        policy.record('cnn', False)
+    assert policy.interval('hbo') == pytest.approx(300, abs=5)
+    assert policy.interval('cnn') == pytest.approx(3600, abs=5)
+    assert policy.interval('hbo') >= 300 and policy.interval('cnn') <= 3600
+    assert policy.stats()['hbo']['fetches'] == 30 and policy.stats()['hbo']['changes'] == 30
+
+
+def test_channels_can_pin_or_narrow_their_interval():
+    channels = [
+        {'id': 'hbo', 'refresh_interval': 600},
+        {'id': 'cnn', 'min_refresh_interval': 1200},
+        {'id': 'tnt', 'max_refresh_interval': 100},
+    ]
+    policy = RefreshPolicy(channels, min_interval=300, max_interval=3600)
+    policy.record('hbo', True)
+    assert policy.bounds('hbo') == (600, 600) and policy.interval('hbo') == 600
+    assert policy.bounds('cnn') == (1200, 3600)
+    # A maximum below the minimum is raised to it
+    assert policy.bounds('tnt') == (300, 300)
+
+
+def test_learned_rates_survive_a_restore_without_overwriting_newer_ones():
+    policy = RefreshPolicy(CHANNELS, min_interval=300, max_interval=3600)
+    policy.record('hbo', True)
+    policy.record('cnn', False)
+    restored = RefreshPolicy(CHANNELS, min_interval=300, max_interval=3600)
+    restored.record('cnn', True)
+    restored.restore({**policy.export(), 'gone': {'rate': 1.0}})
+    assert restored.change_rate('hbo') == policy.change_rate('hbo')
+    assert restored.change_rate('cnn') != policy.change_rate('cnn')
+    assert 'gone' not in restored.export()
+
+
+def test_only_channels_whose_interval_elapsed_are_scheduled():
+    async def scenario():
+        policy = RefreshPolicy(CHANNELS, min_interval=300, max_interval=3600)
+        scheduler = RefreshScheduler(
+            lambda channel, date: None, CHANNELS, today=lambda: DATES[0], days_ahead=0, jitter=0, policy=policy
+        )
+        assert scheduler.schedule_due() == 3
+        drain_order(scheduler)
+        scheduler._queued.clear()
+        assert scheduler.schedule_due() == 0
+
+        # A fetch reschedules its channel from its new interval
+        scheduler.record_fetch('hbo', True)
+        scheduler._next_due['cnn'] = 0
+        assert scheduler.schedule_due() == 1
+        return drain_order(scheduler)
+
+    assert asyncio.run(scenario()) == [('cnn', DATES[0])]
@@ -0,0 +1,89 @@
+import asyncio
+
+from schedule_cache import ScheduleCache
+
+
+def test_concurrent_misses_share_one_load():
+    cache = ScheduleCache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ['show']
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_load('hbo', loader) for _ in range(10)))
+
+    results = asyncio.run(scenario())
+    assert results == [['show']] * 10
+    assert len(calls) == 1
+    assert cache.misses == 1
+    assert cache.coalesced == 9
+    assert cache.get('hbo') == ['show']
+
+
+def test_failed_load_is_not_cached():
+    cache = ScheduleCache()
+    attempts = []
+
+    async def loader():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError('store unavailable')
+        return ['show']
+
+    async def scenario():
+        try:
+            await cache.get_or_load('hbo', loader)
+        except RuntimeError:
+            pass
+        return await cache.get_or_load('hbo', loader)
+
+    assert asyncio.run(scenario()) == ['show']
+    assert len(attempts) == 2
+
+
+def test_empty_result_is_not_cached():
+    cache = ScheduleCache()
+
+    async def loader():
+        return []
+
+    assert asyncio.run(cache.get_or_load('hbo', loader)) == []
+    assert cache.get('hbo') is None
+
+
+def test_one_caller_cancelling_does_not_cancel_the_shared_load():
+    cache = ScheduleCache()
+
+    async def loader():
+        await asyncio.sleep(0.02)
+        return ['show']
+
+    async def scenario():
+        first = asyncio.ensure_future(cache.get_or_load('hbo', loader))
+        second = asyncio.ensure_future(cache.get_or_load('hbo', loader))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == ['show']
+    assert cache.get('hbo') == ['show']
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ScheduleCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.evictions == 1
+
+
+def test_expired_entry_is_dropped():
+    cache = ScheduleCache(ttl=0)
+    cache.put('a', 1)
+    assert cache.get('a') is None
@@ -0,0 +1,88 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+import server
+from refresh_scheduler import RefreshScheduler
+
+DATE = '2026-10-17'
+SCRAPED_AT = datetime(2026, 10, 17, 12, tzinfo=timezone.utc)
+
+
+def listing(title):
+    fields = [{'title': title, 'show_type': 'Series', 'start_time': '8:00 PM'}]
+    return server.harvest_shows(fields, 'hbo', DATE, SCRAPED_AT)[DATE]
+
+
+async def not_leader():
+    return False
+
+
+def serve(monkeypatch, refresh_seconds, requests):
+    """Run `requests(client, scheduler)` against the app with a started scheduler whose refresh of hbo takes refresh_seconds"""
+    monkeypatch.setattr(server, 'today_et', lambda: DATE)
+    refreshed = []
+
+    async def refresh(channel, date):
+        await asyncio.sleep(refresh_seconds)
+        await server.publish_channel_shows(channel['id'], date, listing('Barbie'))
+        refreshed.append((channel['id'], date))
+        return True
+
+    async def scenario():
+        # Not the leader, so only requests start refreshes
+        scheduler = RefreshScheduler(refresh, server.CHANNELS, today=lambda: DATE, jitter=0, leader=not_leader)
+        monkeypatch.setattr(server, 'refresh_scheduler', scheduler)
+        scheduler.start()
+        transport = httpx.ASGITransport(app=server.app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+                return await requests(client, scheduler)
+        finally:
+            await scheduler.stop()
+
+    return asyncio.run(scenario()), refreshed
+
+
+def test_pending_channel_waits_for_a_refresh_that_lands_in_time(store, monkeypatch):
+    async def requests(client, scheduler):
+        return (await client.get(f'/api/schedule/hbo?date={DATE}&deadline_ms=2000')).json()
+
+    schedule, refreshed = serve(monkeypatch, 0.05, requests)
+    assert refreshed == [('hbo', DATE)]
+    assert schedule['status'] == 'fresh'
+    assert [show['title'] for show in schedule['shows']] == ['Barbie']
+
+
+def test_past_the_deadline_pending_is_served_while_the_refresh_carries_on(store, monkeypatch):
+    async def requests(client, scheduler):
+        started = time.monotonic()
+        response = await client.get(f'/api/schedule?date={DATE}&channels=hbo&deadline_ms=50')
+        elapsed = time.monotonic() - started
+        await asyncio.sleep(0.5)
+        return response.json(), elapsed
+
+    (schedule, elapsed), refreshed = serve(monkeypatch, 0.3, requests)
+    assert elapsed < 0.3
+    assert schedule['channels'][0]['status'] == 'pending'
+    assert schedule['channels'][0]['shows'] == []
+    assert refreshed == [('hbo', DATE)]
+    assert [show.title for show in server.schedule_cache.get(('hbo', DATE)).shows] == ['Barbie']
+
+
+def test_stale_channel_is_served_as_last_known_good_copy(store, monkeypatch):
+    long_ago = time.time() - 7 * 24 * 3600
+    asyncio.run(server.publish_channel_shows('hbo', DATE, listing('Succession'), refreshed_at=long_ago))
+
+    async def requests(client, scheduler):
+        response = await client.get(f'/api/schedule/hbo?date={DATE}&deadline_ms=0')
+        key = ('hbo', DATE)
+        return response.json(), key in scheduler._queued or key in scheduler._running
+
+    (schedule, requested), _ = serve(monkeypatch, 5, requests)
+    assert schedule['status'] == 'stale'
+    assert [show['title'] for show in schedule['shows']] == ['Succession']
+    # A zero budget still asks for the refresh
+    assert requested
@@ -0,0 +1,48 @@
+from datetime import date, timedelta
+
+import pytest
+
+from schedule_parser import heading_date, parse_schedule, parse_schedule_counted
+
+from .conftest import FIXTURE_TODAY, FIXTURES_DIR
+
+# Synthetic pages: tvinsider was unreachable when they were written (see benchmarks/README.md)
+FIXTURES = sorted(FIXTURES_DIR.glob('*.html'))
+
+
+def test_fixtures_present():
+    assert len(FIXTURES) == 10
+
+
+@pytest.mark.parametrize('fixture', FIXTURES, ids=lambda path: path.stem)
+def test_lxml_matches_bs4(fixture):
+    content = fixture.read_text()
+    expected = parse_schedule(content, 'bs4')
+    assert expected
+    assert parse_schedule(content, 'lxml') == expected
+
+
+@pytest.mark.parametrize('fixture', FIXTURES, ids=lambda path: path.stem)
+def test_error_counts_match(fixture):
+    content = fixture.read_text()
+    assert parse_schedule_counted(content, 'lxml')[1] == parse_schedule_counted(content, 'bs4')[1]
+
+
+@pytest.mark.parametrize('fixture', FIXTURES, ids=lambda path: path.stem)
+def test_day_headings_resolve_to_consecutive_dates(fixture):
+    today = date.fromisoformat(FIXTURE_TODAY)
+    days = list(dict.fromkeys(fields['day'] for fields in parse_schedule(fixture.read_text(), 'lxml')))
+    assert [heading_date(day, today) for day in days] == [today + timedelta(days=i) for i in range(len(days))]
+
+
+@pytest.mark.parametrize('heading, expected', [
+    ('Saturday, October 17', date(2026, 10, 17)),
+    ('Today', date(2026, 10, 17)),
+    ('Tomorrow, Oct. 18th', date(2026, 10, 18)),
+    ('Sat Oct 17, 2026', date(2026, 10, 17)),
+    ('Monday', date(2026, 10, 19)),
+    ('Thursday, January 1', date(2027, 1, 1)),
+    ('Schedule', None),
+])
+def test_heading_date(heading, expected):
+    assert heading_date(heading, date(2026, 10, 17)) == expected
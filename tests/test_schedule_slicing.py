@@ -0,0 +1,66 @@
+import asyncio
+from datetime import datetime, timezone
+
+import server
+
+DATE = '2026-10-17'
+SCRAPED_AT = datetime(2026, 10, 17, 12, tzinfo=timezone.utc)
+
+
+def publish_evening():
+    fields = [
+        {'title': 'Succession', 'show_type': 'Series', 'start_time': '8:00 PM'},
+        {'title': 'Barbie', 'show_type': 'Feature Film', 'start_time': '9:00 PM'},
+        {'title': 'Dune', 'show_type': 'Feature Film', 'start_time': '11:00 PM'},
+    ]
+    shows = server.harvest_shows(fields, 'hbo', DATE, SCRAPED_AT)[DATE]
+    asyncio.run(server.publish_channel_shows('hbo', DATE, shows))
+
+
+def test_select_channels_by_id_and_index_range():
+    ids = [c['id'] for c in server.CHANNELS]
+    assert [c['id'] for c in server.select_channels('0-2')] == ids[:3]
+    assert [c['id'] for c in server.select_channels(f'{ids[5]},1, 0-1')] == [ids[5], ids[1], ids[0]]
+
+
+def test_channel_subset(api):
+    schedule = api(f'/api/schedule?date={DATE}&channels=hbo,2-3').json()
+    ids = [c['id'] for c in server.CHANNELS]
+    assert [channel['channel_id'] for channel in schedule['channels']] == ['hbo', ids[2], ids[3]]
+
+
+
+def test_every_channel_by_default(api):
+    schedule = api(f'/api/schedule?date={DATE}&deadline_ms=0').json()
+    assert [channel['channel_id'] for channel in schedule['channels']] == [c['id'] for c in server.CHANNELS]
+
+
+def test_unknown_channel_is_rejected(api):
+    response = api(f'/api/schedule?date={DATE}&channels=hbo,nope')
+    assert response.status_code == 400
+    assert 'nope' in response.json()['detail']
+
+
+def test_time_window_keeps_overlapping_shows(api):
+    publish_evening()
+    # Barbie runs 21:00-23:00, so a window starting inside it keeps it
+    schedule = api(f'/api/schedule?date={DATE}&channels=hbo&from=21:30&to=23:00').json()
+    assert [show['title'] for show in schedule['channels'][0]['shows']] == ['Barbie']
+    schedule = api(f'/api/schedule?date={DATE}&channels=hbo&from={20 * 60}').json()
+    assert [show['title'] for show in schedule['channels'][0]['shows']] == ['Succession', 'Barbie', 'Dune']
+
+
+def test_fields_projection(api):
+    publish_evening()
+    schedule = api(f'/api/schedule?date={DATE}&channels=hbo&fields=title,start_time').json()
+    assert schedule['channels'][0]['shows'][0] == {'title': 'Succession', 'start_time': '8:00 PM'}
+
+    # Airings keep the program_id their projected programs are looked up by
+    schedule = api(f'/api/schedule?date={DATE}&channels=hbo&fields=title,start_time&programs=true').json()
+    airing = schedule['channels'][0]['shows'][0]
+    assert set(airing) == {'start_time', 'program_id'}
+    assert schedule['programs'][airing['program_id']] == {'title': 'Succession'}
+
+
+def test_unknown_field_is_rejected(api):
+    assert api(f'/api/schedule?date={DATE}&fields=title,rating').status_code == 400
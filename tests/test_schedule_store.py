@@ -0,0 +1,47 @@
+import asyncio
+from datetime import datetime, timezone
+
+import server
+
+from .conftest import FIXTURE_TODAY
+
+HBO = next(channel for channel in server.CHANNELS if channel['id'] == 'hbo')
+
+
+def test_requests_are_served_from_the_store_without_scraping(upstream_pages, store, api):
+    assert asyncio.run(server.scrape_and_publish(HBO, FIXTURE_TODAY))
+    fetches = len(upstream_pages.requests)
+    stored = asyncio.run(store.shows.count_documents({'channel_id': 'hbo', 'date': FIXTURE_TODAY}))
+    server.schedule_cache.clear()
+
+    response = api(f'/api/schedule/hbo?date={FIXTURE_TODAY}')
+    assert response.status_code == 200
+    schedule = response.json()
+    assert schedule['status'] == 'fresh'
+    assert len(schedule['shows']) == stored > 0
+    assert [show['start_minute'] for show in schedule['shows']] == sorted(show['start_minute'] for show in schedule['shows'])
+    assert len(upstream_pages.requests) == fetches
+
+
+def test_channel_with_nothing_stored_is_pending(upstream_pages, api):
+    schedule = api(f'/api/schedule/hbo?date={FIXTURE_TODAY}').json()
+    assert schedule['status'] == 'pending'
+    assert schedule['shows'] == []
+    assert upstream_pages.requests == []
+
+
+def test_unknown_channel_is_not_found(api):
+    assert api('/api/schedule/no-such-channel').status_code == 404
+
+
+def test_republishing_drops_shows_no_longer_listed(store):
+    harvest = server.harvest_shows([
+        {'title': 'Succession', 'show_type': 'Series', 'start_time': '8:00 PM'},
+        {'title': 'Barbie', 'show_type': 'Feature Film', 'start_time': '9:00 PM'},
+    ], 'hbo', FIXTURE_TODAY, datetime.now(timezone.utc))
+    shows = harvest[FIXTURE_TODAY]
+    assert asyncio.run(server.save_channel_shows('hbo', FIXTURE_TODAY, shows))
+    assert asyncio.run(server.save_channel_shows('hbo', FIXTURE_TODAY, shows[:1]))
+
+    stored = asyncio.run(server.load_stored_schedule(['hbo'], FIXTURE_TODAY))
+    assert [show.title for show in stored['hbo']] == ['Succession']
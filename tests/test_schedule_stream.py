@@ -0,0 +1,60 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import server
+
+DATE = '2026-10-17'
+SCRAPED_AT = datetime(2026, 10, 17, 12, tzinfo=timezone.utc)
+
+
+def publish(channel_id, listings):
+    shows = server.harvest_shows(listings, channel_id, DATE, SCRAPED_AT)[DATE]
+    asyncio.run(server.publish_channel_shows(channel_id, DATE, shows))
+
+
+def events(response):
+    return [json.loads(line) for line in response.text.splitlines() if line.strip()]
+
+
+def test_stream_sends_meta_every_channel_once_and_done(api):
+    publish('hbo', [{'title': 'Succession', 'show_type': 'Series', 'start_time': '8:00 PM'}])
+
+    response = api(f'/api/schedule/stream?date={DATE}')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    meta, *channels, done = events(response)
+    assert meta['type'] == 'meta' and meta['date'] == DATE and meta['total'] == len(server.CHANNELS)
+    assert done == {'type': 'done', 'total': len(server.CHANNELS)}
+    assert sorted(event['index'] for event in channels) == list(range(len(server.CHANNELS)))
+
+    rows = {event['schedule']['channel_id']: event['schedule'] for event in channels}
+    assert [show['title'] for show in rows['hbo']['shows']] == ['Succession']
+    assert rows['hbo']['status'] == 'fresh'
+    assert rows['cinemax']['status'] == 'pending'
+
+
+def test_stream_sends_each_program_once(api):
+    listings = [{'title': 'Barbie', 'show_type': 'Feature Film', 'start_time': '9:00 PM'}]
+    publish('hbo', listings)
+    publish('hbo2', listings)
+
+    channels = [event for event in events(api(f'/api/schedule/stream?date={DATE}&programs=true')) if event['type'] == 'channel']
+    sent = [program_id for event in channels for program_id in event['programs']]
+    airings = [show for event in channels for show in event['schedule']['shows']]
+    assert len(airings) == 2
+    assert sent == [airings[0]['program_id']] == [airings[1]['program_id']]
+    assert 'title' not in airings[0]
+
+
+def test_stream_as_server_sent_events(api):
+    response = api(f'/api/schedule/stream?date={DATE}&format=sse')
+    assert response.headers['content-type'].startswith('text/event-stream')
+    blocks = [block for block in response.text.split('\n\n') if block]
+    assert blocks[0].startswith('event: meta\ndata: {')
+    assert blocks[-1].startswith('event: done\n')
+    assert sum(block.startswith('event: channel\n') for block in blocks) == len(server.CHANNELS)
+
+
+def test_stream_rejects_unknown_format(api):
+    assert api('/api/schedule/stream?format=xml').status_code == 400
@@ -0,0 +1,57 @@
+import asyncio
+
+import server
+
+FIXTURE_DATES = ['2026-10-17', '2026-10-18', '2026-10-19']
+HBO = next(channel for channel in server.CHANNELS if channel['id'] == 'hbo')
+
+
+def test_scrape_publishes_every_listed_date(upstream_pages, store):
+    assert asyncio.run(server.scrape_and_publish(HBO, FIXTURE_DATES[0]))
+    assert server.harvested_dates['hbo'] == FIXTURE_DATES
+    assert sorted(asyncio.run(store.shows.distinct('date'))) == FIXTURE_DATES
+    assert server.page_validators.stats()['tracked_pages'] == 1
+
+
+def test_unchanged_page_is_revalidated_without_republishing(upstream_pages, store):
+    asyncio.run(server.scrape_and_publish(HBO, FIXTURE_DATES[0]))
+    changes = asyncio.run(store.schedule_changes.count_documents({}))
+    assert asyncio.run(server.scrape_and_publish(HBO, FIXTURE_DATES[1]))
+    assert upstream_pages.requests[-1][1].get('If-None-Match')
+    assert server.page_validators.stats()['not_modified'] == 1
+    assert asyncio.run(store.schedule_changes.count_documents({})) == changes
+
+
+def test_failed_store_write_keeps_the_page_unvalidated(upstream_pages, monkeypatch):
+    save = server.save_channel_shows
+
+    async def failing_save(channel_id, date, shows):
+        return False
+
+    monkeypatch.setattr(server, 'save_channel_shows', failing_save)
+    asyncio.run(server.scrape_and_publish(HBO, FIXTURE_DATES[0]))
+    assert server.page_validators.stats()['tracked_pages'] == 0
+
+    monkeypatch.setattr(server, 'save_channel_shows', save)
+    asyncio.run(server.scrape_and_publish(HBO, FIXTURE_DATES[0]))
+    assert 'If-None-Match' not in upstream_pages.requests[-1][1]
+    assert server.page_validators.stats()['tracked_pages'] == 1
+
+
+def test_publish_error_keeps_the_bookkeeping_for_dates_already_published(upstream_pages, monkeypatch):
+    publish = server.publish_channel_shows
+    fetches = []
+
+    async def failing_on_the_second_date(channel_id, date, shows, refreshed_at=None):
+        if date == FIXTURE_DATES[1]:
+            raise RuntimeError('store went away')
+        return await publish(channel_id, date, shows, refreshed_at)
+
+    monkeypatch.setattr(server, 'publish_channel_shows', failing_on_the_second_date)
+    monkeypatch.setattr(server.refresh_scheduler, 'record_fetch', lambda channel_id, changed: fetches.append(changed))
+
+    assert asyncio.run(server.scrape_and_publish(HBO, FIXTURE_DATES[0]))
+    assert not asyncio.run(server.scrape_and_publish(HBO, FIXTURE_DATES[1]))
+    assert fetches == [True, False]
+    assert server.harvested_dates['hbo'] == [FIXTURE_DATES[0]]
+    assert server.page_validators.stats()['tracked_pages'] == 0
@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime, timezone
+
+import server
+from search_index import SearchIndex, tokenize
+
+DATE = '2026-10-17'
+SCRAPED_AT = datetime(2026, 10, 17, 12, tzinfo=timezone.utc)
+
+
+def shows(channel_id, *listings, date=DATE):
+    fields = [
+        {'title': title, 'show_type': 'Series', 'start_time': start_time, 'description': description}
+        for start_time, title, description in listings
+    ]
+    return server.harvest_shows(fields, channel_id, date, SCRAPED_AT)[date]
+
+
+def indexed():
+    index = SearchIndex()
+    index.update('hbo', DATE, shows(
+        'hbo',
+        ('8:00 PM', 'Succession', 'The Roy family fights over Waystar.'),
+        ('9:00 PM', 'The Last of Us', 'Joel and Ellie cross a ruined country.'),
+    ))
+    index.update('cinemax', DATE, shows('cinemax', ('7:00 PM', 'Pokémon: The Movie', 'Ash heads for a new region.')))
+    return index
+
+
+def test_tokens_are_lowercase_and_accent_folded():
+    assert tokenize('Pokémon: The Movie 2000') == ['pokemon', 'the', 'movie', '2000']
+
+
+def test_every_word_must_match_and_the_last_as_a_prefix():
+    index = indexed()
+    assert [show.title for show in index.search('roy fam')[1]] == ['Succession']
+    assert index.search('roy ellie') == (0, [])
+    assert index.search('fam', prefix=False) == (0, [])
+    assert [show.title for show in index.search('POKEMON')[1]] == ['Pokémon: The Movie']
+
+
+def test_results_are_ordered_by_start_time_and_limited():
+    total, results = indexed().search('the', limit=2)
+    assert total == 3
+    assert [show.title for show in results] == ['Pokémon: The Movie', 'Succession']
+
+
+def test_results_can_be_limited_to_shows_not_started_yet():
+    index = indexed()
+    succession = index.search('succession')[1][0]
+    assert [show.title for show in index.search('the', after_epoch=succession.start_epoch)[1]] == [
+        'Succession', 'The Last of Us'
+    ]
+
+
+def test_update_replaces_a_day_and_drops_unused_tokens():
+    index = indexed()
+    index.update('hbo', DATE, shows('hbo', ('8:00 PM', 'Barbie', 'A doll leaves Barbieland.')))
+    assert index.search('succession') == (0, [])
+    assert [show.title for show in index.search('barb')[1]] == ['Barbie']
+    assert index.stats() == {'documents': 2, 'tokens': len(index._vocabulary), 'channel_days': 2}
+    assert 'waystar' not in index._vocabulary
+
+
+def test_only_the_most_recent_days_of_a_channel_are_kept():
+    index = SearchIndex(max_days=2)
+    for date in ('2026-10-17', '2026-10-18', '2026-10-19'):
+        index.update('hbo', date, shows('hbo', ('8:00 PM', 'Succession', date), date=date))
+    assert sorted(show.date for show in index.search('succession')[1]) == ['2026-10-18', '2026-10-19']
+
+
+def test_search_endpoint_finds_published_shows(api):
+    # A day long gone, so the show has already started
+    past = '2024-01-15'
+    asyncio.run(server.publish_channel_shows('hbo', past, shows(
+        'hbo', ('8:00 PM', 'Succession', 'The Roy family fights over Waystar.'), date=past
+    )))
+    found = api('/api/search?q=waystar%20roy').json()
+    assert found['query'] == 'waystar roy'
+    assert found['total'] == 1
+    assert found['results'][0]['title'] == 'Succession'
+    assert found['results'][0]['channel_id'] == 'hbo'
+    assert found['index']['documents'] == 1
+
+    assert api('/api/search?q=succession&upcoming=true').json()['total'] == 0
+    assert api('/api/search?q=succession&limit=0').status_code == 422
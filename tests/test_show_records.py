@@ -0,0 +1,66 @@
+import json
+from datetime import datetime, timezone
+
+import orjson
+
+from server import ChannelSchedule, ScheduleResponse, Show, harvest_shows
+from show_records import ChannelDay, channel_schedule_json, dumps, schedule_response_json
+
+DATE = '2026-10-17'
+SCRAPED_AT = datetime(2026, 10, 17, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+
+def shows(timestamp=SCRAPED_AT):
+    return harvest_shows([
+        {'title': 'Succession', 'show_type': 'Series', 'start_time': '8:00 PM', 'season': '4', 'episode': '10'},
+        {'title': 'Barbie', 'show_type': 'Feature Film', 'start_time': '9:00 PM', 'year': '2023'},
+    ], 'hbo', DATE, timestamp)[DATE]
+
+
+def test_records_serialize_like_the_pydantic_model():
+    for show in shows():
+        assert orjson.loads(dumps(show.to_dict())) == json.loads(Show(**show.to_dict()).model_dump_json())
+
+
+def test_channel_fragment_is_a_valid_channel_schedule():
+    day = ChannelDay('hbo', DATE, shows())
+    fragment = channel_schedule_json('hbo', 'HBO', DATE, day.shows_json(), 'stale')
+    schedule = ChannelSchedule.model_validate_json(fragment)
+    assert schedule.status == 'stale'
+    assert [show.title for show in schedule.shows] == ['Succession', 'Barbie']
+
+    fragment = channel_schedule_json('hbo', 'HBO', DATE, day.airings_json(), programs_json=dumps(day.programs()))
+    schedule = ChannelSchedule.model_validate_json(fragment)
+    assert set(schedule.programs) == {show.program_id for show in day}
+
+
+def test_schedule_response_is_assembled_from_fragments():
+    day = ChannelDay('hbo', DATE, shows())
+    fragments = [
+        channel_schedule_json('hbo', 'HBO', DATE, day.shows_json()),
+        channel_schedule_json('cinemax', 'Cinemax', DATE, b'[]', 'pending'),
+    ]
+    body = schedule_response_json(fragments, '2026-10-17 20:00:00', 'America/New_York')
+    response = ScheduleResponse.model_validate_json(body)
+    assert [channel.channel_id for channel in response.channels] == ['hbo', 'cinemax']
+    assert response.programs is None
+    assert response.current_time == '2026-10-17 20:00:00'
+
+
+def test_channel_day_serializes_once():
+    day = ChannelDay('hbo', DATE, shows())
+    assert day.shows_json() is day.shows_json()
+    assert day.airings_json() is day.airings_json()
+
+
+def test_version_follows_content_not_scrape_time():
+    later = datetime(2026, 10, 17, 18, tzinfo=timezone.utc)
+    assert ChannelDay('hbo', DATE, shows()).version == ChannelDay('hbo', DATE, shows(later)).version
+
+    changed = shows()
+    changed[1].start_time = '9:30 PM'
+    assert ChannelDay('hbo', DATE, changed).version != ChannelDay('hbo', DATE, shows()).version
+
+
+def test_records_have_no_instance_dict():
+    assert not hasattr(shows()[0], '__dict__')
@@ -0,0 +1,118 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import server
+from snapshot import SnapshotError, encode_snapshot, read_snapshot, write_snapshot
+
+SCRAPED_AT = datetime(2026, 10, 17, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, monkeypatch):
+    path = tmp_path / 'schedule_snapshot.bin'
+    monkeypatch.setattr(server, 'SNAPSHOT_PATH', str(path))
+    server.discard_restored_state()
+    yield path
+    server.discard_restored_state()
+
+
+def snapshot_payload():
+    date = server.resident_dates()[1]
+    harvest = server.harvest_shows([
+        {'title': 'Succession', 'show_type': 'Series', 'start_time': '8:00 PM', 'description': 'Family business.'},
+        {'title': 'Barbie', 'show_type': 'Feature Film', 'start_time': '9:00 PM'},
+    ], 'hbo', date, SCRAPED_AT)
+    shows = harvest[date]
+    return shows, {
+        "created_at": SCRAPED_AT,
+        "days": [{
+            "channel_id": 'hbo',
+            "date": date,
+            "refreshed_at": SCRAPED_AT.timestamp(),
+            "shows": [show.airing_dict() for show in shows],
+        }],
+        "programs": {show.program_id: show.program_dict() for show in shows},
+        "validators": {},
+        "harvested_dates": {'hbo': [date]},
+        "refresh_policy": {'hbo': {'rate': 0.25, 'fetches': 4, 'changes': 1}},
+    }
+
+
+def test_snapshot_round_trips_through_a_file(tmp_path):
+    path = tmp_path / 'snapshot.bin'
+    payload = {"days": [{"channel_id": "hbo", "shows": [{"title": "Succession"}]}]}
+    assert write_snapshot(path, payload) == path.stat().st_size
+    assert read_snapshot(path) == payload
+
+
+def test_missing_snapshot_reads_as_none(tmp_path):
+    assert read_snapshot(tmp_path / 'missing.bin') is None
+
+
+@pytest.mark.parametrize('damage', ['flip', 'truncate', 'empty', 'magic'])
+def test_damaged_snapshot_is_rejected(tmp_path, damage):
+    data = bytearray(encode_snapshot({"days": [{"channel_id": "hbo"}]}))
+    if damage == 'flip':
+        data[-1] ^= 0xFF
+    elif damage == 'truncate':
+        data = data[:-5]
+    elif damage == 'empty':
+        data = bytearray()
+    else:
+        data[:4] = b'JUNK'
+    path = tmp_path / 'snapshot.bin'
+    path.write_bytes(bytes(data))
+    with pytest.raises(SnapshotError):
+        read_snapshot(path)
+
+
+def test_restore_fills_the_cache_indexes_and_policy(snapshot_path):
+    shows, payload = snapshot_payload()
+    date = shows[0].date
+    write_snapshot(snapshot_path, payload)
+
+    assert server.restore_schedule_snapshot() == 1
+    day = server.schedule_cache.get(('hbo', date))
+    assert [show.title for show in day.shows] == ['Succession', 'Barbie']
+    assert day.shows[0].description == 'Family business.'
+    assert server.known_versions[('hbo', date)] == day.version
+    assert server.search_index.search('barb')[0] == 1
+    assert server.harvested_dates['hbo'] == [date]
+    assert server.refresh_scheduler.policy.change_rate('hbo') == 0.25
+
+
+def test_corrupt_snapshot_starts_cold(snapshot_path):
+    shows, payload = snapshot_payload()
+    date = shows[0].date
+    data = bytearray(encode_snapshot(payload))
+    data[-1] ^= 0xFF
+    snapshot_path.write_bytes(bytes(data))
+
+    assert server.restore_schedule_snapshot() == 0
+    assert server.schedule_cache.get(('hbo', date)) is None
+
+
+@pytest.mark.parametrize('break_schema', ['missing_program', 'missing_shows', 'bad_timestamp'])
+def test_snapshot_from_another_schema_starts_cold(snapshot_path, break_schema):
+    shows, payload = snapshot_payload()
+    date = shows[0].date
+    # A valid day restored before the broken one must not survive either; it carries its own program fields
+    good_day = dict(payload['days'][0], channel_id='tnt', shows=[show.to_dict() for show in shows])
+    broken_day = payload['days'][0]
+    if break_schema == 'missing_program':
+        payload['programs'] = {}
+    elif break_schema == 'missing_shows':
+        del broken_day['shows']
+    else:
+        broken_day['shows'][0]['timestamp'] = 'yesterday'
+    payload['days'] = [good_day, broken_day]
+    write_snapshot(snapshot_path, payload)
+
+    assert server.restore_schedule_snapshot() == 0
+    assert server.schedule_cache.get(('tnt', date)) is None
+    assert server.schedule_cache.get(('hbo', date)) is None
+    assert not server.known_versions
+    assert not server.harvested_dates
+    assert server.search_index.search('barbie')[0] == 0
+    assert server.interval_index.channel_count() == 0
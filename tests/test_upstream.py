@@ -0,0 +1,202 @@
+import asyncio
+
+import pytest
+
+from upstream import AdaptiveConcurrency, CircuitBreaker, UpstreamPool
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=60)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == 'closed'
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+    assert 0 < breaker.retry_in() <= 60
+
+
+def test_half_open_breaker_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+    breaker.record_failure()
+    breaker.opened_until = 1.0  # cooldown over
+    assert breaker.state == 'half_open'
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_successful_trial_closes_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+    breaker.record_failure()
+    breaker.opened_until = 1.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow()
+    assert breaker.allow()
+
+
+def test_failed_trial_doubles_the_cooldown_up_to_the_cap():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=60, max_cooldown=100)
+    breaker.record_failure()
+    breaker.opened_until = 1.0
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert 60 < breaker.retry_in() <= 100
+
+
+def test_abandoned_trial_lets_another_through():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+    breaker.record_failure()
+    breaker.opened_until = 1.0
+    assert breaker.allow()
+    breaker.abandon_trial()
+    assert breaker.state == 'half_open'
+    assert breaker.allow()
+
+
+def test_concurrency_limit_halves_on_overload_and_respects_the_minimum():
+    concurrency = AdaptiveConcurrency(initial=8, minimum=2, maximum=16, target_latency=2)
+    concurrency.record(overloaded=True, latency=0.1)
+    assert concurrency.limit == 4
+    for _ in range(5):
+        concurrency.record(overloaded=True, latency=0.1)
+    assert concurrency.limit == 2
+
+
+def test_concurrency_limit_grows_on_fast_successes_and_shrinks_on_slow_ones():
+    concurrency = AdaptiveConcurrency(initial=4, minimum=1, maximum=5, target_latency=2)
+    for _ in range(4):
+        concurrency.record(overloaded=False, latency=0.1)
+    assert 4.9 < concurrency.limit <= 5
+    for _ in range(50):
+        concurrency.record(overloaded=False, latency=0.1)
+    assert concurrency.limit == 5
+    concurrency.record(overloaded=False, latency=5)
+    assert concurrency.limit == 4.5
+
+
+def test_concurrency_acquire_waits_for_a_free_slot():
+    concurrency = AdaptiveConcurrency(initial=2, minimum=1, maximum=2, target_latency=2)
+    peak = 0
+
+    async def request():
+        nonlocal peak
+        await concurrency.acquire()
+        peak = max(peak, concurrency.in_flight)
+        await asyncio.sleep(0.01)
+        concurrency.release()
+
+    async def scenario():
+        await asyncio.gather(*(request() for _ in range(6)))
+
+    asyncio.run(scenario())
+    assert peak == 2
+    assert concurrency.in_flight == 0
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    concurrency = AdaptiveConcurrency(initial=1, minimum=1, maximum=1, target_latency=2)
+
+    async def scenario():
+        await concurrency.acquire()
+        waiter = asyncio.ensure_future(concurrency.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        concurrency.release()
+        await asyncio.wait_for(concurrency.acquire(), 1)
+        concurrency.release()
+
+    asyncio.run(scenario())
+    assert concurrency.in_flight == 0
+
+
+def test_waiter_cancelled_after_wake_dropped_it_raises_cancelled_error():
+    concurrency = AdaptiveConcurrency(initial=1, minimum=1, maximum=1, target_latency=2)
+
+    async def scenario():
+        await concurrency.acquire()
+        waiter = asyncio.ensure_future(concurrency.acquire())
+        await asyncio.sleep(0)
+        # The waiter's future is cancelled, then released past before the task resumes
+        waiter.cancel()
+        concurrency.release()
+        return await asyncio.gather(waiter, return_exceptions=True)
+
+    (outcome,) = asyncio.run(scenario())
+    assert isinstance(outcome, asyncio.CancelledError)
+    assert concurrency.in_flight == 0
+    assert not concurrency._waiters
+
+
+def test_woken_waiter_cancelled_before_it_runs_passes_the_slot_on():
+    concurrency = AdaptiveConcurrency(initial=1, minimum=1, maximum=1, target_latency=2)
+
+    async def scenario():
+        await concurrency.acquire()
+        first = asyncio.ensure_future(concurrency.acquire())
+        second = asyncio.ensure_future(concurrency.acquire())
+        await asyncio.sleep(0)
+        concurrency.release()
+        first.cancel()
+        outcomes = await asyncio.gather(first, second, return_exceptions=True)
+        concurrency.release()
+        return outcomes
+
+    first, second = asyncio.run(scenario())
+    assert isinstance(first, asyncio.CancelledError)
+    assert second is None
+    assert concurrency.in_flight == 0
+
+
+def test_pool_reuses_one_keep_alive_connection():
+    from aiohttp import web
+
+    async def listing(request):
+        return web.Response(text='listing')
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_get('/', listing)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0).start()
+        url = f"http://127.0.0.1:{runner.addresses[0][1]}/"
+
+        pool = UpstreamPool()
+        await pool.start()
+        session = pool.session
+        await pool.start()
+        try:
+            for _ in range(3):
+                async with pool.session.get(url) as response:
+                    assert await response.text() == 'listing'
+            assert pool.session is session
+            return pool.stats()
+        finally:
+            await pool.close()
+            await runner.cleanup()
+
+    stats = asyncio.run(scenario())
+    assert stats['requests'] == 3
+    assert stats['connections_created'] == 1
+    assert stats['connections_reused'] == 2
+    assert stats['idle'] == 1
+
+
+def test_pool_session_is_only_available_while_started():
+    pool = UpstreamPool()
+    with pytest.raises(RuntimeError):
+        pool.session
+
+    async def open_and_close():
+        await pool.start()
+        assert not pool.session.closed
+        await pool.close()
+
+    asyncio.run(open_and_close())
+    with pytest.raises(RuntimeError):
+        pool.session
+    assert not pool.stats()['started']